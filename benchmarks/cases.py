@@ -0,0 +1,167 @@
+"""
+Benchmark cases of the decision logic, the planner and the repositories
+
+A case prepares its input in setup, outside of the timing, and returns the
+number of items it processes so the runner can report the time per item.
+"""
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import update
+
+from benchmarks.data import SyntheticApp, csl_records
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], int]
+    setup: Optional[Callable[[], None]] = None
+    description: str = ""
+
+
+class StubDriver:
+    """Play Console driver answering every console action as done, without a browser"""
+
+    def __init__(self):
+        self.stopped = 0
+        self.applied = 0
+
+    def stop_experiment(self, experiment_id: str) -> bool:
+        self.stopped += 1
+        return True
+
+    def apply_experiment(self, experiment_id: str, winning_variant: str) -> bool:
+        self.applied += 1
+        return True
+
+
+def build_cases(session, apps: List[SyntheticApp], scale) -> List[Case]:
+    """
+    Build the benchmark cases over the synthetic apps
+
+    Args:
+        session: Session of the synthetic database
+        apps: Apps returned by benchmarks.data.generate
+        scale: Scale the apps were generated at
+
+    Returns:
+        The cases, in the order they are run
+    """
+    from src.modules.app.snapshot import get_graph_snapshot
+    from src.modules.csl.repository import add_csls, invalidate_name_resolver
+    from src.modules.experiment.models import ExperimentModel, ExperimentStatus
+    from src.modules.experiment.repository import (
+        get_app_experiments, get_experiments_by_play_ids, get_next_experiment_and_variants, update_experiment_statuses,
+    )
+    from src.database.unit_of_work import UnitOfWork
+    from src.utils.helpers import (
+        experiment_1000_installs_kill, experiment_negative_performance_kill, process_running_experiments,
+    )
+
+    snapshots = {
+        app.id: app
+        for publisher in get_graph_snapshot(session).active_publishers()
+        for app in publisher.apps
+    }
+    experiments_by_app: Dict[int, list] = {}
+
+    def load_experiments():
+        invalidate_name_resolver(session)
+        for synthetic in apps:
+            experiments_by_app[synthetic.app.id] = get_app_experiments(session, synthetic.app.id)
+
+    def next_experiment() -> int:
+        count = 0
+        for synthetic in apps:
+            experiments = experiments_by_app[synthetic.app.id]
+            get_next_experiment_and_variants(session, experiments, synthetic.csls, synthetic.running)
+            count += len(experiments)
+        return count
+
+    def reset_urls():
+        # Every started experiment is written again
+        session.execute(update(ExperimentModel).values(url=None))
+        session.commit()
+
+    def experiment_statuses() -> int:
+        count = 0
+        for synthetic in apps:
+            update_experiment_statuses(
+                session, synthetic.app.id, synthetic.running, synthetic.previous, "1", synthetic.app.play_console_id
+            )
+            count += len(synthetic.running) + len(synthetic.previous)
+        return count
+
+    def csls_unchanged() -> int:
+        for synthetic in apps:
+            add_csls(session, synthetic.csl_records)
+        return sum(len(synthetic.csl_records) for synthetic in apps)
+
+    # Two CSL overviews per app, each run switches to the other one
+    rng = random.Random(scale.seed + 1)
+    alternate_records = {synthetic.app.id: csl_records(synthetic.app, scale, rng) for synthetic in apps}
+    changed_records = {}
+
+    def switch_csls():
+        for synthetic in apps:
+            app_id = synthetic.app.id
+            current = changed_records.get(app_id, synthetic.csl_records)
+            changed_records[app_id] = alternate_records[app_id] if current is synthetic.csl_records else synthetic.csl_records
+
+    def csls_changed() -> int:
+        for synthetic in apps:
+            add_csls(session, changed_records[synthetic.app.id])
+        return sum(len(records) for records in changed_records.values())
+
+    driver = StubDriver()
+
+    def reset_running():
+        # The stub stops and applies experiments, put them back in progress
+        session.execute(
+            update(ExperimentModel)
+            .where(ExperimentModel.google_play_experiment_id.in_([
+                r.play_experiment_id for synthetic in apps for r in synthetic.running
+            ]))
+            .values(status=ExperimentStatus.IN_PROGRESS)
+        )
+        session.commit()
+        session.expire_all()
+
+    def running_experiments() -> int:
+        for synthetic in apps:
+            with UnitOfWork(session, synthetic.app.package_id):
+                process_running_experiments(synthetic.running, snapshots[synthetic.app.id], driver, session)
+        return sum(len(synthetic.running) for synthetic in apps)
+
+    decisions_input = []
+
+    def load_decisions():
+        decisions_input.clear()
+        for synthetic in apps:
+            experiments = get_experiments_by_play_ids(
+                session, synthetic.app.id, [r.experiment_id for r in synthetic.running]
+            )
+            for r in synthetic.running:
+                experiment = experiments.get(r.play_experiment_id)
+                if experiment is not None:
+                    decisions_input.append((r, experiment.settings))
+
+    def kill_decisions() -> int:
+        for running, settings in decisions_input:
+            experiment_negative_performance_kill(running, settings)
+            experiment_1000_installs_kill(running, settings)
+        return len(decisions_input)
+
+    return [
+        Case("get_next_experiment_and_variants", next_experiment, load_experiments,
+             "Pick the next experiment to create of every app"),
+        Case("update_experiment_statuses", experiment_statuses, reset_urls,
+             "Reconcile the statuses of the running and previous experiments"),
+        Case("add_csls_unchanged", csls_unchanged, None, "Store CSL overviews identical to the stored ones"),
+        Case("add_csls_changed", csls_changed, switch_csls, "Store CSL overviews with other locales"),
+        Case("process_running_experiments", running_experiments, reset_running,
+             "Stop and apply decisions of the running experiments with a stub driver"),
+        Case("kill_decisions", kill_decisions, load_decisions,
+             "Negative performance and early kill rules of the running experiments"),
+    ]
@@ -0,0 +1,214 @@
+"""
+Synthetic publishers, apps, CSLs, locales, experiments and variants for the benchmarks
+
+The data is generated from a seed, so two runs at the same scale work on the
+same rows and their timings can be compared.
+"""
+import random
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+
+@dataclass(frozen=True)
+class Scale:
+    publishers: int = 2
+    apps_per_publisher: int = 5
+    csls_per_app: int = 10
+    locales_per_csl: int = 5
+    experiments_per_app: int = 200
+    variants_per_experiment: int = 3
+    # Share of the experiments of an app running in the console
+    running_ratio: float = 0.1
+    seed: int = 42
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+SCALES = {
+    "small": Scale(publishers=1, apps_per_publisher=2, csls_per_app=3, locales_per_csl=3, experiments_per_app=30),
+    "medium": Scale(),
+    "large": Scale(publishers=5, apps_per_publisher=10, csls_per_app=30, locales_per_csl=10, experiments_per_app=1000),
+}
+
+# Console results of the running experiments, winners and losers
+RESULTS = ("Variant A won", "Variant B won", "Current listing won", "Draw", "More data needed", "Not enough data")
+
+LANGUAGES = ("German", "French", "Spanish", "Italian", "Japanese", "Korean", "Dutch", "Polish", "Turkish", "Swedish")
+
+
+@dataclass
+class SyntheticApp:
+    """An app of the synthetic data with what the console would show for it"""
+    app: object
+    csls: Dict[str, List[str]]
+    # CSL overview records as returned by get_store_csls with their locales
+    csl_records: List[Dict]
+    running: List = field(default_factory=list)
+    previous: List = field(default_factory=list)
+
+
+def locale_name(index: int) -> str:
+    """Locale name as listed in the console, eg: "German – de-01" """
+    language = LANGUAGES[index % len(LANGUAGES)]
+    return f"{language} – {language[:2].lower()}-{index:02d}"
+
+
+def csl_records(app, scale: Scale, rng: random.Random) -> List[Dict]:
+    """Build the CSL overview of an app, one record per CSL locale as add_csls expects"""
+    from src.modules.csl.schemas import csl_fingerprint
+
+    records = []
+    for c in range(scale.csls_per_app):
+        name = "Default store listing" if c == 0 else f"Listing {c}"
+        play_console_id = "" if c == 0 else str(10_000 + c)
+        locales = rng.sample(range(scale.locales_per_csl * 3), scale.locales_per_csl)
+        for index in locales:
+            records.append({
+                "app": app,
+                "csl_play_console_id": play_console_id,
+                "name": name,
+                "locale": locale_name(index),
+                "fingerprint": csl_fingerprint(name, play_console_id, f"{name} {len(locales)} languages"),
+                "locales_fetched_at": datetime.now(timezone.utc),
+            })
+    return records
+
+
+def scraped_experiment(experiment, csl_name: str, locale_code: str, scale: Scale, rng: random.Random, finished: bool = False):
+    """Build the console view of a started experiment"""
+    from src.modules.experiment.schemas import ScrapedExperiment, ScrapedVariant
+
+    variants = [ScrapedVariant(
+        name="Current listing", audience=50, installs=rng.randint(500, 5000), installs_scaled=rng.randint(500, 5000),
+    )]
+    for v in range(scale.variants_per_experiment - 1):
+        start = rng.uniform(-6, 3)
+        variants.append(ScrapedVariant(
+            name=f"Variant {chr(65 + v)}",
+            audience=50 / (scale.variants_per_experiment - 1),
+            installs=rng.randint(100, 5000),
+            installs_scaled=rng.randint(500, 5000),
+            performance_start=start,
+            performance_end=start + rng.uniform(0, 8),
+        ))
+    start_time = datetime.now() - timedelta(days=rng.randint(1, 40), hours=rng.randint(0, 23))
+    return ScrapedExperiment(
+        app_id=experiment.app_id,
+        experiment_name=experiment.experiment_name_auto_populated,
+        experiment_id=str(experiment.google_play_experiment_id),
+        locale=locale_code,
+        store_listing=csl_name,
+        experiment_type="Translated",
+        start_date=start_time.replace(hour=0, minute=0),
+        start_time=start_time,
+        status=rng.choice(RESULTS),
+        variants=tuple(variants),
+        kill=finished and rng.random() < 0.2,
+    )
+
+
+def generate(session, scale: Scale) -> List[SyntheticApp]:
+    """
+    Insert the synthetic data of a scale
+
+    Args:
+        session: Session of an empty database with the tables created
+        scale: Number of rows to generate
+
+    Returns:
+        The generated apps with their CSLs and console experiments
+    """
+    from src.modules.organization.models import OrganizationModel
+    from src.modules.publisher.models import PublisherModel, PublisherStatus
+    from src.modules.app.models import AppModel, AppStatus
+    from src.modules.csl.models import CSLModel
+    from src.modules.csl.repository import add_csls
+    from src.modules.csl.schemas import split_locale_code
+    from src.modules.csl.service import get_csl_locales
+    from src.modules.experiment.models import ExperimentModel, ExperimentSettingsModel, VariantModel
+    from src.modules.experiment.schemas import (
+        ApplySetting, ApplyOnPercentile, AssetType, ConfidenceIntervalEnum,
+        ExperimentStatus, ExperimentType, MinimumDetectableEffectEnum, TargetMetric,
+    )
+
+    rng = random.Random(scale.seed)
+    settings = [
+        ExperimentSettingsModel(
+            apply_setting=apply_setting, apply_on_percentile=ApplyOnPercentile.PERCENTILE_75,
+            apply_min_installs_variants=100, apply_min_installs_experiment=1000,
+            min_duration_days=7, max_duration_days=28, audience_skew=0,
+            minimum_detectable_effect=MinimumDetectableEffectEnum.EFFECT_2_5,
+            confidence_interval=ConfidenceIntervalEnum.CI_90,
+            target_metric=TargetMetric.FIRST_TIME_INSTALLERS,
+            early_kill_min_installs=1000, early_kill_cvr_decrease=-0.1, kill_performance_value=0,
+        )
+        for apply_setting in ApplySetting
+    ]
+    session.add_all(settings)
+
+    organization = OrganizationModel(name="benchmarks")
+    session.add(organization)
+    session.flush()
+
+    apps = []
+    play_experiment_id = 1_000_000
+    for p in range(scale.publishers):
+        publisher = PublisherModel(
+            organization_id=organization.id, name=f"publisher {p}", link_code=f"bench-{p}",
+            status=PublisherStatus.ACTIVE, play_console_id=p + 1, dataset=f"bench_{p}",
+        )
+        session.add(publisher)
+        session.flush()
+        for a in range(scale.apps_per_publisher):
+            app = AppModel(
+                publisher_id=publisher.id, name=f"app {p}-{a}", abbreviation=f"B{p}{a}",
+                package_id=f"com.pressplay.bench{p}.app{a}", play_console_id=str(a + 1), status=AppStatus.ACTIVE,
+            )
+            session.add(app)
+            session.flush()
+
+            records = csl_records(app, scale, rng)
+            add_csls(session, records)
+            csls = session.query(CSLModel).filter(CSLModel.app_id == app.id).all()
+            synthetic = SyntheticApp(app=app, csls=get_csl_locales(records), csl_records=records)
+
+            experiments = []
+            for e in range(scale.experiments_per_app):
+                csl = rng.choice(csls)
+                locale = rng.choice(csl.locales)
+                draw = rng.random()
+                if draw < scale.running_ratio:
+                    status = ExperimentStatus.IN_PROGRESS
+                elif draw < scale.running_ratio * 2:
+                    status = ExperimentStatus.FINISHED
+                else:
+                    status = ExperimentStatus.READY
+                started = status != ExperimentStatus.READY
+                if started:
+                    play_experiment_id += 1
+                experiment = ExperimentModel(
+                    settings_id=rng.choice(settings).id, app_id=app.id, csl_id=str(csl.id), locale_id=str(locale.id),
+                    internal_experiment_id=e, experiment_title=f"experiment {e}", priority=rng.randint(0, 100),
+                    status=status, asset_type=AssetType.ICON, experiment_type=ExperimentType.MANUAL,
+                    google_play_experiment_id=play_experiment_id if started else None,
+                    experiment_name_auto_populated=f"{app.abbreviation}-{e:06d}-{split_locale_code(locale.name)}",
+                    variants=[
+                        VariantModel(name=f"Variant {chr(65 + v)}", icon=f"https://example.com/icon_{e}_{v}.png")
+                        for v in range(scale.variants_per_experiment - 1)
+                    ],
+                )
+                experiments.append((experiment, csl.name, split_locale_code(locale.name)))
+            session.add_all([experiment for experiment, _, _ in experiments])
+            session.flush()
+
+            for experiment, csl_name, locale_code in experiments:
+                if experiment.status == ExperimentStatus.IN_PROGRESS:
+                    synthetic.running.append(scraped_experiment(experiment, csl_name, locale_code, scale, rng))
+                elif experiment.status == ExperimentStatus.FINISHED:
+                    synthetic.previous.append(scraped_experiment(experiment, csl_name, locale_code, scale, rng, True))
+            apps.append(synthetic)
+
+    session.commit()
+    return apps
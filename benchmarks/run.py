@@ -0,0 +1,203 @@
+"""
+Benchmark the decision logic, the planner and the repositories on synthetic SQLite data
+
+Synthetic publishers, apps, CSLs, locales, experiments and variants are
+generated into an in-memory SQLite database, each case is timed over
+several runs and the results are written as JSON, so two commits can be
+compared:
+
+    python benchmarks/run.py --scale medium
+    python benchmarks/run.py --scale medium --compare benchmarks/results/before.json
+    python benchmarks/run.py --compare before.json after.json --fail-over 10
+
+The Play Console is replaced by a stub driver and the Slack hooks are
+disabled, nothing leaves the host.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from benchmarks.data import SCALES, Scale  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the decision logic and the repositories")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="medium", help="Size of the synthetic data")
+    parser.add_argument("--experiments", type=int, default=None, help="Override the experiments per app of the scale")
+    parser.add_argument("--apps", type=int, default=None, help="Override the apps per publisher of the scale")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs of each case")
+    parser.add_argument("--case", action="append", default=None, help="Only run this case, can be repeated")
+    parser.add_argument("--url", type=str, default="sqlite://", help="SQLAlchemy URL (default: in-memory SQLite)")
+    parser.add_argument(
+        "--output", type=str, default=None,
+        help="Results JSON file (default: benchmarks/results/<date>_<commit>_<scale>.json)"
+    )
+    parser.add_argument(
+        "--compare", nargs="+", metavar="RESULTS", default=None,
+        help="Compare with a results file, or compare two results files without running"
+    )
+    parser.add_argument(
+        "--fail-over", type=float, default=None, metavar="PERCENT",
+        help="Exit with 1 if a case median is this many percent slower than the baseline"
+    )
+    parser.add_argument("--verbose", action="store_true", help="Keep the INFO logs of the benchmarked code")
+    return parser.parse_args()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_case(case, repeat: int) -> Dict:
+    """Run a case once to warm up, then time it repeat times"""
+    if case.setup:
+        case.setup()
+    case.run()
+
+    runs = []
+    items = 0
+    for _ in range(repeat):
+        if case.setup:
+            case.setup()
+        start = time.perf_counter()
+        items = case.run()
+        runs.append(time.perf_counter() - start)
+
+    median = statistics.median(runs)
+    return {
+        "description": case.description,
+        "items": items,
+        "runs": [round(run, 6) for run in runs],
+        "min": round(min(runs), 6),
+        "median": round(median, 6),
+        "mean": round(statistics.mean(runs), 6),
+        "stdev": round(statistics.stdev(runs), 6) if len(runs) > 1 else 0.0,
+        "per_item_us": round(median / items * 1e6, 2) if items else None,
+    }
+
+
+def run_benchmarks(args, scale: Scale) -> Dict:
+    os.environ["DATABASE_URL"] = args.url
+
+    from src.config.settings import SLACK_HOOKS
+    from src.database.connection import Base, get_database
+    from src.modules.app.models import AppModel  # noqa: F401
+    from src.modules.publisher.models import PublisherModel  # noqa: F401
+    from src.modules.publishing_overview.models import PublishingOverviewModel  # noqa: F401
+    from src.modules.previous_experiment.models import PreviousExperimentModel  # noqa: F401
+    from src.modules.job.models import JobModel  # noqa: F401
+    from benchmarks.cases import build_cases
+    from benchmarks.data import generate
+
+    # Nothing is posted to Slack by the benchmarked code
+    for key in SLACK_HOOKS:
+        SLACK_HOOKS[key] = None
+    if not args.verbose:
+        for name in list(logging.root.manager.loggerDict):
+            if name.endswith("_logger"):
+                logging.getLogger(name).setLevel(logging.WARNING)
+
+    database = get_database()
+    Base.metadata.create_all(database.engine)
+
+    results = {}
+    with database.session() as session:
+        start = time.perf_counter()
+        apps = generate(session, scale)
+        print(f"Generated {len(apps)} apps in {time.perf_counter() - start:.1f}s")
+
+        for case in build_cases(session, apps, scale):
+            if args.case and case.name not in args.case:
+                continue
+            results[case.name] = time_case(case, args.repeat)
+            r = results[case.name]
+            print(f"{case.name:<36} median={r['median'] * 1000:9.2f}ms min={r['min'] * 1000:9.2f}ms items={r['items']}")
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "database": database.engine.dialect.name,
+        "scale": scale.to_dict(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, fail_over: Optional[float]) -> bool:
+    """
+    Print the median change of every case, returns False if one is slower than fail_over percent
+    """
+    if baseline.get("scale") != current.get("scale"):
+        print("Warning: the results were not run at the same scale")
+    print(f"\n{'case':<36}{'baseline ms':>13}{'current ms':>13}{'change':>9}")
+    ok = True
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<36}{'-':>13}{result['median'] * 1000:>13.2f}{'new':>9}")
+            continue
+        change = (result["median"] - before["median"]) / before["median"] * 100 if before["median"] else 0.0
+        flag = ""
+        if fail_over is not None and change > fail_over:
+            flag = "  SLOWER"
+            ok = False
+        print(f"{name:<36}{before['median'] * 1000:>13.2f}{result['median'] * 1000:>13.2f}{change:>+8.1f}%{flag}")
+    return ok
+
+
+def load(path: str) -> Dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def main():
+    args = parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        ok = compare(load(args.compare[0]), load(args.compare[1]), args.fail_over)
+        sys.exit(0 if ok else 1)
+
+    scale = SCALES[args.scale]
+    overrides = {}
+    if args.experiments is not None:
+        overrides["experiments_per_app"] = args.experiments
+    if args.apps is not None:
+        overrides["apps_per_publisher"] = args.apps
+    if overrides:
+        scale = Scale(**{**scale.to_dict(), **overrides})
+
+    current = run_benchmarks(args, scale)
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results",
+        f"{datetime.now():%Y%m%d_%H%M%S}_{current['commit'] or 'nocommit'}_{args.scale}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(current, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        ok = compare(load(args.compare[0]), current, args.fail_over)
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,147 +1,117 @@
-import os
-from src.clients.play_console_driver import PlayConsoleDriver
 from dotenv import load_dotenv
 import src.utils.logger as logger
 import argparse
-from src.modules.publisher.repository import get_publishers_with_apps
+from functools import partial
+from src.modules.app.snapshot import get_graph_snapshot
+from src.modules.app.repository import update_apps_csls_sync_status
 from src.modules.csl.repository import add_csls
-from src.database.connection import get_db_session
-from datetime import datetime, timezone, timedelta
+from src.modules.csl.service import fetch_app_csls
+from src.database.connection import get_database, dispose_database
 from src.modules.app.schemas import AppStatus
+from src.services.play_console import get_driver, run_publisher, shutdown
+from src.services.worker_pool import run_in_workers
+from src.utils.watchdog import BudgetExceeded, time_budget
 load_dotenv()
 
-gpc = None
 
- 
-
-def main(client_id=None, manual=False):
+def main(client_id=None, manual=False, workers=1):
     """
     Main function to fetch CSLs from Play Console
     
     Args:
         client_id: Optional client ID to process specific publisher
         manual: If True, only process apps with sync_now=True
+        workers: Number of worker processes, publishers are spread across them
     """
-    global gpc
-    publishers = get_publishers_with_apps()
-    
+    with get_database().session() as session:
+        publishers = get_graph_snapshot(session).active_publishers()
+
+    publishers = [
+        publisher for publisher in publishers
+        if (client_id is None or publisher.id == client_id) and _get_apps_to_process(publisher, manual)
+    ]
+
+    if workers > 1:
+        run_in_workers(
+            [publisher.id for publisher in publishers], run_publisher, shutdown, workers,
+            select_apps=partial(_get_apps_to_process, manual=manual), process=fetch_csls
+        )
+        dispose_database()
+        return
+
     for publisher in publishers:
-        if client_id is not None and publisher.id != client_id:
-            continue
-            
-        # Filter apps based on manual flag
-        apps_to_process = []
-        for app in publisher.apps:
-            if manual:
-                # In manual mode, only process apps with sync_now=True
-                if app.sync_csls_now:
-                    apps_to_process.append(app)
-            else:
-                # In automatic mode, process all apps
+        fetch_csls(publisher, _get_apps_to_process(publisher, manual))
+
+    shutdown()
+
+def _get_apps_to_process(publisher, manual):
+    """Get the apps of a publisher, only the ones with sync_csls_now=True in manual mode"""
+    apps_to_process = []
+    for app in publisher.apps:
+        if manual:
+            # In manual mode, only process apps with sync_now=True
+            if app.sync_csls_now:
                 apps_to_process.append(app)
-        
-        # Update publisher's apps to only process the filtered ones
-        publisher.apps = apps_to_process
-        
-        if apps_to_process:
-            fetch_csls(publisher)
-            
-    if gpc is not None:
-        gpc.clean()
+        else:
+            # In automatic mode, process all apps
+            apps_to_process.append(app)
+    return apps_to_process
 
-def fetch_csls(publisher):
+def fetch_csls(publisher, apps):
     """
-    Fetch current CSLs for all the client sheets apps from the play console
+    Fetch current CSLs for all the client sheets apps from the play console,
+    returns the apps whose fetch timed out
     """
-    global gpc
-    all_csls = _fetch_all_csls(publisher)
+    all_csls, fetched_apps = _fetch_all_csls(publisher, apps)
     apps_data = _process_csls_by_app(all_csls)
-    _update_database(publisher, apps_data)
+    _update_database(fetched_apps, apps_data)
+    return [app for app in apps if _should_fetch_app_csls(app) and app not in fetched_apps]
 
-def _fetch_all_csls(publisher):
-    """Fetch CSLs for all apps from the publisher"""
-    global gpc
+def _fetch_all_csls(publisher, apps):
+    """Fetch CSLs for all apps from the publisher, returns the records and the apps fetched"""
     all_csls = []
+    fetched_apps = []
     
-    for app in publisher.apps:
+    for app in apps:
         if not _should_fetch_app_csls(app):
             continue
             
-        gpc = _ensure_gpc_initialized(gpc, publisher, app)
-        csls = _fetch_app_csls(gpc, publisher, app)
-        if csls:
-            all_csls.extend(csls)
+        gpc = get_driver(publisher, app)
+        logger.set_app_context(app.package_id)
+        try:
+            logger.logger.info(f"Getting CSLS for {app.package_id}")
+            with time_budget("CSLS"):
+                all_csls.extend(fetch_app_csls(gpc, publisher, app))
+        except BudgetExceeded as e:
+            # The app stays due and is fetched again on the next run
+            logger.logger.error(f"Timeout in fetching CSLs of {app.package_id}: {e}")
+            gpc.reset_page()
+            continue
+        finally:
+            # The publisher and run records are not tagged with the last app
+            logger.set_app_context(None)
+        fetched_apps.append(app)
             
-    return all_csls
+    return all_csls, fetched_apps
 
 def _should_fetch_app_csls(app):
     """Check if app CSLs should be fetched"""
     return app.status == AppStatus.ACTIVE or app.status == AppStatus.CONNECTING
 
-def _ensure_gpc_initialized(gpc, publisher, app):
-    """Ensure Google Play Console driver is initialized"""
-    if gpc is None:
-        gpc = PlayConsoleDriver(
-            publisher,
-            app,
-            email=os.getenv("email"),
-            password=os.getenv("password"),
-            otp_code=os.getenv("otp_code"),
-            session=None
-        )
-    return gpc
-
-def _fetch_app_csls(gpc, publisher, app):
-    """Fetch CSLs for a single app"""
-    logger.logger_app_package = app.package_id
-    logger.logger = logger.get_logger(logger.logger_app_package)
-    logger.logger.info(f"Getting CSLS for {app.package_id}")
-    
-    gpc.set_publisher_app(publisher, app)
-    csls = gpc.get_store_csls()
-    
-    if len(csls) == 0:
-        logger.logger.info(f'No CSLs for this {app.package_id}')
-        return None
-        
-    return gpc.get_csls_possible_locales(csls)
-
 def _process_csls_by_app(all_csls):
-    """Process and group CSLs by app"""
+    """Group the CSL records by app"""
     apps_data = {}
-    for csl in all_csls:
-        app = csl["app"]
-        if app not in apps_data:
-            apps_data[app] = []
-        
-        for locale in csl["locales"]:
-            # Remove "Default - " prefix from locale names
-            cleaned_locale = locale.replace("Default – ", "").replace("Default - ", "")
-            record = {
-                "app": app,
-                "csl_play_console_id": csl["csl_play_console_id"],
-                "name": csl["name"],
-                "locale": cleaned_locale,
-            }
-            apps_data[app].append(record)
+    for record in all_csls:
+        apps_data.setdefault(record["app"], []).append(record)
     return apps_data
 
-def _update_database(publisher, apps_data):
+def _update_database(apps, apps_data):
     """Update database with new CSL data"""
-    with get_db_session() as session:
+    with get_database().session() as session:
         for app, data in apps_data.items():
             add_csls(session, data)
         
-        _update_app_sync_status(session, publisher)
-        session.commit()
-
-def _update_app_sync_status(session, publisher):
-    """Update sync status for all publisher apps"""
-    now = datetime.now(timezone.utc)
-    for app in publisher.apps:
-        app.sync_csls_now = False
-        app.last_sync = now
-        app.next_sync = now + timedelta(hours=12)
+        update_apps_csls_sync_status([app.id for app in apps], session)
 
 
 
@@ -157,12 +127,18 @@ if __name__ == "__main__":
     )
 
     parser.add_argument(
-        "--manual", 
-        type=bool, 
-        default=False, 
-        help="If True, only process apps with sync_now=True"
+        "--manual",
+        action="store_true",
+        help="Only process apps with sync_csls_now=True"
+    )
+
+    parser.add_argument(
+        "--workers", 
+        type=int, 
+        default=1, 
+        help="Number of worker processes, each with its own browser"
     )
 
     args = parser.parse_args() 
     
-    main(client_id=args.client_id, manual=args.manual)
+    main(client_id=args.client_id, manual=args.manual, workers=args.workers)
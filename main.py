@@ -1,5 +1,5 @@
 from dotenv import load_dotenv
-import os
+from functools import partial
 from src.clients.play_console_driver import PlayConsoleDriver
 import src.utils.logger as logger
 from src.services.slack import send_message_to_slack_channel 
@@ -7,22 +7,30 @@ import argparse
 import time
 import traceback
 from src.utils.helpers import process_running_experiments
-from src.modules.publisher.repository import get_publishers_with_apps
-from src.modules.app.models import AppModel
+from src.modules.app.snapshot import AppSnapshot, PublisherSnapshot, get_graph_snapshot
+from src.modules.app.schemas import AppStatus
 from src.modules.experiment.models import ExperimentModel, ExperimentStatus
-from src.database.connection import get_db_session
+from src.modules.experiment.schemas import ScrapedExperiment
+from src.database.connection import get_database, dispose_database
+from src.database.unit_of_work import UnitOfWork, checkpoint
 from sqlalchemy.orm import Session
-from src.modules.app.repository import get_publisher_apps, get_app_csls, update_app_sync_status
-from src.modules.experiment.repository import update_experiment_statuses, get_next_experiment_and_variants, update_experiments_with_error, update_experiment_after_creation
-from typing import List, Dict, Tuple
-from src.config.settings import SLACK_HOOKS
+from src.modules.app.repository import get_app_overview_fingerprint, mark_app_timed_out, update_app_overview_fingerprint, update_app_sync_status
+from src.modules.previous_experiment.repository import save_previous_experiments
+from src.modules.experiment.repository import get_app_experiments, update_experiment_statuses, get_next_experiment_and_variants, update_experiments_with_error, update_experiment_after_creation, has_pending_experiment_actions, has_experiments_in_status, get_experiments_by_play_ids
+from src.modules.app.cadence import compute_next_sync, get_threshold_delays
+from src.modules.publishing_overview.repository import has_recent_publishing_changes
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from src.config.settings import AUTOMATION, CADENCE, SLACK_HOOKS
+from src.services.play_console import get_driver, run_publisher, shutdown
+from src.services.worker_pool import run_in_workers
+from src.utils.watchdog import BudgetExceeded, time_budget
+from src.services.run_journal import close_run, is_stage_done, mark_stage_done, start_run
+from src.utils import tracing
 load_dotenv(override=True)
 
 
-gpc = None
-
-
-def main(app_id: str = None, client_id: int = None, manual: bool = False):
+def main(app_id: str = None, client_id: int = None, manual: bool = False, workers: int = 1, resume: bool = False):
     """
     Main function to run the automation
     
@@ -30,100 +38,130 @@ def main(app_id: str = None, client_id: int = None, manual: bool = False):
         app_id: str Google Play Console App ID
         client_id: int Client ID
         manual: bool If True, only process apps with sync_now=True
+        workers: int Number of worker processes, publishers are spread across them
+        resume: bool If True, resume the last run that did not finish, skipping
+            the apps and stages it completed
     """
-    global gpc
-    # Get publishers with apps from database
-    publishers = get_publishers_with_apps(active_only=True)
+    journal = start_run("main", resume)
+    tracing.start_trace(journal.run_id)
+
+    # Get publishers with apps, CSLs and locales from the graph snapshot
+    with get_database().session() as session:
+        publishers = get_graph_snapshot(session).active_publishers()
 
     if client_id is not None:
         # Filter for specific publisher if client_id provided
         publishers = [p for p in publishers if p.id == client_id]
 
+    publishers = [p for p in publishers if _get_apps_to_process(p, manual)]
+
+    if workers > 1:
+        results = run_in_workers(
+            [p.id for p in publishers], run_publisher, shutdown, workers,
+            select_apps=partial(_get_apps_to_process, manual=manual), process=process_publisher,
+            trace_id=journal.run_id, run_id=journal.run_id, script="main"
+        )
+        dispose_database()
+        # A publisher with failed apps or whose worker died is left to --resume
+        if all(result.ok for result in results):
+            journal.finish()
+        close_run()
+        tracing.finish_trace()
+        return
+
+    failed = []
     for publisher in publishers:
         # logger.logger.info(f"Processing publisher {publisher.name}")
-        
-        # Filter apps based on manual flag
-        apps_to_process = []
-        for app in publisher.apps:
-            if manual:
-                # In manual mode, only process apps with sync_now=True
-                if app.sync_now:
-                    apps_to_process.append(app)
-            else:
-                # In automatic mode, process all apps
+        failed.extend(process_publisher(publisher, _get_apps_to_process(publisher, manual)))
+
+    shutdown()
+    # The failed apps are left to --resume
+    if failed:
+        logger.logger.error(f"{len(failed)} apps failed: {', '.join(app.package_id for app in failed)}")
+    else:
+        journal.finish()
+    close_run()
+    tracing.finish_trace()
+
+def _get_apps_to_process(publisher: PublisherSnapshot, manual: bool) -> List[AppSnapshot]:
+    """
+    Get the active apps of a publisher, only the ones with sync_now=True in manual mode,
+    without the apps the journaled run already completed
+    """
+    apps_to_process = []
+    for app in publisher.apps:
+        if app.status != AppStatus.ACTIVE or is_stage_done(app.id):
+            continue
+        if manual:
+            # In manual mode, only process apps with sync_now=True
+            if app.sync_now:
                 apps_to_process.append(app)
-        
-        # Update publisher's apps to only process the filtered ones
-        publisher.apps = apps_to_process
-        
-        if apps_to_process:
-            process_publisher(publisher)
-
-    if gpc is not None:
-        gpc.clean()
-
-def process_publisher(publisher):
-    """Process on publisher apps"""
-    global gpc
-    session = get_db_session()
-    
-    try:
-        # Get apps with eager loaded relationships
-        apps = get_publisher_apps(publisher.id, session)
-        
-        if not apps:
-            return
-            
+        else:
+            # In automatic mode, process all apps
+            apps_to_process.append(app)
+    return apps_to_process
+
+def process_publisher(publisher: PublisherSnapshot, apps: List[AppSnapshot]) -> List[AppSnapshot]:
+    """Process on publisher apps, returns the apps that failed"""
+    with tracing.span("publisher", tracing.PUBLISHER, publisher=publisher.id), get_database().session() as session:
         # Initialize GPC with first app
-        app = apps[0]
-        if gpc is None:
-            gpc = PlayConsoleDriver(
-                publisher,
-                app,
-                email=os.getenv("email"),
-                password=os.getenv("password"),
-                otp_code=os.getenv("otp_code"),
-                session=session
-            )
+        gpc = get_driver(publisher, apps[0], session)
 
         # Process each app
+        failed = []
         for app in apps:
             try:
-                logger.logger_app_package = app.package_id
-                logger.logger = logger.get_logger(logger.logger_app_package)
-                
+                logger.set_app_context(app.package_id)
+            
                 # Get CSLs mapping
-                csls = get_app_csls(app)
-                print(f"csls: {csls}")
-                # Run automation
-                automate_experiments_for_app(session, app, gpc, csls)
-                
-                # Update sync status
-                update_app_sync_status(app, session)
+                csls = app.csl_locales
+                # One transaction per app, committed after each console action
+                with tracing.span("app", tracing.APP, app=app.package_id), time_budget("APP"), UnitOfWork(session, app.package_id):
+                    # Run automation
+                    next_sync = automate_experiments_for_app(session, publisher, app, gpc, csls)
                 
+                    # Update sync status
+                    update_app_sync_status(app.id, session, next_sync)
+
+                mark_stage_done(app.id)
+
+            except BudgetExceeded as e:
+                # Its next sync is not moved so it is retried, the timeout is recorded on the app
+                logger.logger.error(f"Timeout in processing app {app.package_id}: {e}")
+                gpc.reset_page()
+                mark_app_timed_out(app.id, session, e.name)
+                failed.append(app)
+                continue
             except Exception as e:
                 logger.logger.error(str(e))
                 logger.logger.error(f"Error in processing app {app.package_id}")
                 logger.logger.error(traceback.format_exc())
+                failed.append(app)
                 continue
-    finally:
-        session.close()
+            finally:
+                # The publisher and run records are not tagged with the last app
+                logger.set_app_context(None)
+        return failed
 
-def automate_experiments_for_app(session, app: AppModel, gpc: PlayConsoleDriver, csls):
+def automate_experiments_for_app(session, publisher: PublisherSnapshot, app: AppSnapshot, gpc: PlayConsoleDriver, csls) -> datetime:
     """
     Run experiments automation for an app
     
     Args:
         session: Database session
-        app: App model instance
+        publisher: Publisher of the app
+        app: App snapshot
         gpc: Play Console driver instance
         csls: Dictionary mapping CSL IDs to locale names
+
+    Returns:
+        When the app should be synced next, see compute_next_sync
     """
     logger.logger.info("-------------------------------------")
     logger.logger.info(f"Running experiments automation for app {app.package_id}")
 
     # Set the app for the GPC Driver
-    gpc.set_publisher_app(app.publisher, app)
+    gpc.set_publisher_app(publisher, app)
 
     # 1- Check if we have console access
     # response = gpc.check_url(gpc.experiments_url)
@@ -133,59 +171,107 @@ def automate_experiments_for_app(session, app: AppModel, gpc: PlayConsoleDriver,
 
     # 2- Accept publishing changes
     logger.logger.info("\n2- Accept Publishing Changes")
-    gpc.accept_publishing_changes()
-    
-    # 3- Get running experiments
-    running_experiments = gpc.get_running_experiments(csls)
-    # print(f"running_experiments: {running_experiments}")
-    # 4- Process running experiments
-    number_of_applied, number_of_stopped = process_running_experiments(
-        running_experiments, 
-        app, 
-        gpc, 
-        session
-    )
+    if not is_stage_done(app.id, "publishing_changes"):
+        with tracing.span("accept_changes"), time_budget("PUBLISHING_CHANGES"):
+            gpc.accept_publishing_changes()
+        mark_stage_done(app.id, "publishing_changes")
+
+    # Skip the scrapes when nothing changed since the last full run
+    overview_fingerprint = gpc.get_experiments_overview_fingerprint()
+    last_run = get_app_overview_fingerprint(app.id, session)
+    if _is_app_unchanged(session, app, overview_fingerprint, last_run):
+        logger.logger.info(f"Experiments overview unchanged and no experiment to create or stop, skipping {app.package_id}")
+        # The next duration threshold is the one stored by the last full run
+        threshold_at = last_run[2]
+        return compute_next_sync(
+            running=has_experiments_in_status(session, app.id, [ExperimentStatus.IN_PROGRESS]),
+            threshold_delays=[_as_utc(threshold_at) - datetime.now(timezone.utc)] if threshold_at else [],
+            active=_has_recent_activity(session, app.id),
+        )
+
+    with time_budget("RUNNING_EXPERIMENTS"):
+        # 3- Get running experiments
+        with tracing.span("running_scrape"):
+            running_experiments = gpc.get_running_experiments(csls)
+        # print(f"running_experiments: {running_experiments}")
+        # 4- Process running experiments, once per run
+        number_of_applied, number_of_stopped = 0, 0
+        if not is_stage_done(app.id, "running_experiments"):
+            with tracing.span("decisions"):
+                number_of_applied, number_of_stopped = process_running_experiments(
+                    running_experiments, 
+                    app, 
+                    gpc, 
+                    session
+                )
+            mark_stage_done(app.id, "running_experiments")
     
-    # 5- Refresh running experiments if any changes
-    if number_of_applied > 0 or number_of_stopped > 0:
-        running_experiments = gpc.get_running_experiments(csls)
-
-    # 6- Create new experiments
-    logger.logger.info("\n6- Create experiments")
-    number_of_created, rest = create_experiments(
-        running_experiments,
-        app.experiments,
-        gpc,
-        csls,
-        app.publisher.play_console_id,
-        app.play_console_id,
-        app.package_id,
-        session,
-        SLACK_HOOKS['PHITURE_BUGS'],
-        SLACK_HOOKS['PHITURE_HOOK'],
-        app.slack_hook_url,
-    )
+        # 5- Refresh running experiments if any changes
+        if number_of_applied > 0 or number_of_stopped > 0:
+            with tracing.span("running_scrape"):
+                running_experiments = gpc.get_running_experiments(csls)
+
+    number_of_created = 0
+    with tracing.span("create"), time_budget("CREATE_EXPERIMENTS"):
+        # 6- Create new experiments
+        logger.logger.info("\n6- Create experiments")
+        if not is_stage_done(app.id, "create_experiments"):
+            number_of_created, rest = create_experiments(
+                running_experiments,
+                get_app_experiments(session, app.id),
+                gpc,
+                csls,
+                publisher.play_console_id,
+                app.play_console_id,
+                app.package_id,
+                session,
+                SLACK_HOOKS['PHITURE_BUGS'],
+                SLACK_HOOKS['PHITURE_HOOK'],
+                app.slack_hook_url,
+            )
+            mark_stage_done(app.id, "create_experiments")
 
-    # 7- Accept any pending changes
-    # gpc.accept_publishing_changes()
+        # 7- Accept any pending changes
+        # gpc.accept_publishing_changes()
 
-    # 8- Refresh running experiments if new ones created
-    if number_of_created > 0:
-        running_experiments = gpc.get_running_experiments(csls)
+        # 8- Refresh running experiments if new ones created
+        if number_of_created > 0:
+            running_experiments = gpc.get_running_experiments(csls)
 
     # 9- Get previous experiments
     logger.logger.info("\n8- Fetch Previous Changes")
-    previous_experiments = gpc.get_previous_experiments(csls)
-
-    # 10- Update experiment statuses in database
-    update_experiment_statuses(
-        session,
-        app.id,
-        running_experiments,
-        previous_experiments,
-        app.publisher.play_console_id,
-        app.play_console_id
-    )
+    with tracing.span("previous_scrape"), time_budget("PREVIOUS_EXPERIMENTS"):
+        previous_experiments = gpc.get_previous_experiments(csls)
+
+    with tracing.span("reconcile"):
+        save_previous_experiments(
+            session,
+            app.id,
+            previous_experiments,
+            publisher.play_console_id,
+            app.play_console_id
+        )
+
+        # 10- Update experiment statuses in database
+        update_experiment_statuses(
+            session,
+            app.id,
+            running_experiments,
+            previous_experiments,
+            publisher.play_console_id,
+            app.play_console_id
+        )
+
+        # When the running experiments can next be stopped or applied
+        threshold_delays = get_threshold_delays(
+            running_experiments,
+            get_experiments_by_play_ids(session, app.id, [r.experiment_id for r in running_experiments])
+        )
+        threshold_at = datetime.now(timezone.utc) + min(threshold_delays) if threshold_delays else None
+
+        # The console was changed by this run, the next one runs in full
+        changed = number_of_applied > 0 or number_of_stopped > 0 or number_of_created > 0
+        update_app_overview_fingerprint(app.id, None if changed else overview_fingerprint, session, threshold_at)
 
     # Log results
     logger.logger.info(f"number_of_stopped_experiments={number_of_stopped}")
@@ -195,8 +281,57 @@ def automate_experiments_for_app(session, app: AppModel, gpc: PlayConsoleDriver,
         f"Max experiments are running {len(running_experiments)} for app {app.package_id}"
     )
 
+    # 11- Schedule the next sync from the experiments state
+    next_sync = compute_next_sync(
+        running=len(running_experiments) > 0,
+        threshold_delays=threshold_delays,
+        can_create=get_next_experiment_and_variants(
+            session, get_app_experiments(session, app.id), csls, running_experiments
+        )[0] is not None,
+        active=changed or _has_recent_activity(session, app.id),
+    )
+    logger.logger.info(f"Next sync of {app.package_id} at {next_sync:%Y-%m-%d %H:%M} UTC")
+    return next_sync
+
+def _has_recent_activity(session, app_id: int) -> bool:
+    """Check if publishing changes were recorded for the app in the last ACTIVITY_HOURS"""
+    since = datetime.now(timezone.utc) - timedelta(hours=CADENCE['ACTIVITY_HOURS'])
+    return has_recent_publishing_changes(session, app_id, since)
+
+def _is_app_unchanged(
+    session,
+    app: AppSnapshot,
+    overview_fingerprint: Optional[str],
+    last_run: Tuple[Optional[str], Optional[datetime], Optional[datetime]]
+) -> bool:
+    """
+    Check if the experiments automation of an app can be skipped
+
+    The app is unchanged when its experiments overview matches the one of its
+    last full run, no experiment is READY or STOPPING and the last full run is
+    less than MAX_SKIP_HOURS old. sync_now always runs the app in full, and so
+    does a running experiment reaching its min or max duration: the overview
+    shows start dates, it does not change when a threshold is crossed.
+    last_run is the stored state of the last full run, see get_app_overview_fingerprint.
+    """
+    if overview_fingerprint is None or app.sync_now:
+        return False
+    fingerprint, fingerprint_at, threshold_at = last_run
+    if fingerprint != overview_fingerprint or fingerprint_at is None:
+        return False
+    now = datetime.now(timezone.utc)
+    if now - _as_utc(fingerprint_at) >= timedelta(hours=AUTOMATION['MAX_SKIP_HOURS']):
+        return False
+    if threshold_at is not None and now >= _as_utc(threshold_at):
+        return False
+    return not has_pending_experiment_actions(session, app.id)
+
+def _as_utc(value: datetime) -> datetime:
+    """Database datetimes are UTC, without timezone once read back"""
+    return value.replace(tzinfo=value.tzinfo or timezone.utc)
+
 def create_experiments(
-    running: List[Dict],
+    running: List[ScrapedExperiment],
     all_experiments: List[ExperimentModel],
     gpc: PlayConsoleDriver,
     csls: Dict[str, List[str]],
@@ -220,18 +355,16 @@ def create_experiments(
         experiment, variants, rest = get_next_experiment_and_variants(
             session, all_experiments, csls, running
         )
-        print(f"experiment: {experiment}")
-        print(f"variants: {variants}")
-        print(f"rest: {rest}")
         if experiment is None:
             logger.logger.info(
                 f"No more experiment to run for {app_package} and possible csls running={len(running)}"
             )
             break
 
-        logger.logger.info(f"Try={t} We can run a new experiment running={len(running)}")
-        logger.logger.info("---------------------")
-        logger.logger.info(experiment)
+        logger.logger.info(
+            f"Try={t} We can run a new experiment {experiment.experiment_name_auto_populated} "
+            f"variants={len(variants)} running={len(running)}"
+        )
 
         # Create priority experiments to the limit
         for creation_try in range(3):
@@ -252,6 +385,7 @@ Locale={experiment.locale_id}\n
                 # Update experiment in database
                 experiment_url = f'https://play.google.com/console/u/0/developers/{publisher_id}/app/{app_id}/store-listing-experiments/{experiment.google_play_experiment_id}/report'
                 update_experiment_after_creation(session, experiment, experiment.google_play_experiment_id, experiment_url)
+                checkpoint(session, f"created {experiment.experiment_name_auto_populated}")
 
                 # Get running experiments after creating a new one
                 running = gpc.get_running_experiments(csls)
@@ -325,9 +459,9 @@ Locale={experiment.locale_id}\n
 def _update_experiment_after_creation(session, publisher_id, app_id, running_experiments, experiment, rest, created):
     """Update experiment details after successful creation"""
     for r in running_experiments:
-        if r["experiment_name"] == experiment.experiment_name_auto_populated and created:
-            experiment.google_play_experiment_id = r["experiment_id"]
-            experiment.url = f'https://play.google.com/console/u/0/developers/{publisher_id}/app/{app_id}/store-listing-experiments/{r["experiment_id"]}/report'
+        if r.experiment_name == experiment.experiment_name_auto_populated and created:
+            experiment.google_play_experiment_id = r.experiment_id
+            experiment.url = f'https://play.google.com/console/u/0/developers/{publisher_id}/app/{app_id}/store-listing-experiments/{r.experiment_id}/report'
             experiment.status = ExperimentStatus.IN_PROGRESS
             session.commit()
 
@@ -381,12 +515,24 @@ if __name__ == "__main__":
     )
 
     parser.add_argument(
-        "--manual", 
-        type=bool, 
-        default=False, 
-        help="If True, only process apps with sync_now=True"
+        "--manual",
+        action="store_true",
+        help="Only process apps with sync_now=True"
+    )
+
+    parser.add_argument(
+        "--workers", 
+        type=int, 
+        default=1, 
+        help="Number of worker processes, each with its own browser"
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the last run that did not finish, skipping the apps and stages it completed"
     )
 
     args = parser.parse_args()
     
-    main(args.app_id, args.client_id, args.manual)
\ No newline at end of file
+    main(args.app_id, args.client_id, args.manual, args.workers, args.resume)
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""Add indexes and unique constraints for the hot repository queries
+
+The tables already exist, this revision is the baseline of the migration
+history and only adds the missing indexes. Existing databases with
+duplicated locale names or CSL play console IDs per app must be cleaned
+up before upgrading, the revision refuses to run otherwise.
+
+The history does not create the base tables, `alembic upgrade head` fails
+on an empty database. Build a fresh database from the models with
+Base.metadata.create_all, then mark it as up to date with
+`alembic stamp head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _check_no_duplicates(table: str, columns: str) -> None:
+    duplicates = op.get_bind().execute(
+        sa.text(f"SELECT {columns}, COUNT(*) FROM {table} GROUP BY {columns} HAVING COUNT(*) > 1")
+    ).all()
+    if duplicates:
+        raise RuntimeError(f"Duplicated {table} ({columns}) rows, clean them up first: {duplicates[:10]}")
+
+
+def upgrade() -> None:
+    _check_no_duplicates("locales", "name")
+    _check_no_duplicates("csls", "app_id, play_console_id")
+
+    op.create_index("ix_experiments_app_play_experiment", "experiments", ["app_id", "google_play_experiment_id"])
+    op.create_index("ix_experiments_app_name", "experiments", ["app_id", "experiment_name_auto_populated"])
+    op.create_index("ix_experiments_status_csl_locale", "experiments", ["status", "csl_id", "locale_id"])
+    # Unique indexes rather than constraints, SQLite cannot add constraints to existing tables
+    op.create_index("uq_locales_name", "locales", ["name"], unique=True)
+    op.create_index("uq_csls_app_play_console_id", "csls", ["app_id", "play_console_id"], unique=True)
+    op.create_index("ix_csl_locale_csl_id", "csl_locale", ["csl_id", "locale_id"])
+    op.create_index("ix_publishing_overviews_app_id", "publishing_overviews", ["app_id"])
+    op.create_index("ix_apps_publisher_status", "apps", ["publisher_id", "status"])
+    op.create_index("ix_apps_package_id", "apps", ["package_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_apps_package_id", table_name="apps")
+    op.drop_index("ix_apps_publisher_status", table_name="apps")
+    op.drop_index("ix_publishing_overviews_app_id", table_name="publishing_overviews")
+    op.drop_index("ix_csl_locale_csl_id", table_name="csl_locale")
+    op.drop_index("uq_csls_app_play_console_id", table_name="csls")
+    op.drop_index("uq_locales_name", table_name="locales")
+    op.drop_index("ix_experiments_status_csl_locale", table_name="experiments")
+    op.drop_index("ix_experiments_app_name", table_name="experiments")
+    op.drop_index("ix_experiments_app_play_experiment", table_name="experiments")
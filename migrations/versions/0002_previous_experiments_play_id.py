@@ -0,0 +1,41 @@
+"""Make previous experiments unique per app and Play Console experiment ID
+
+Scraped completed experiments are saved once, the unique index backs the
+idempotent bulk insert.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(
+        sa.text(
+            "SELECT app_id, google_play_experiment_id, COUNT(*) FROM previous_experiments "
+            "WHERE google_play_experiment_id IS NOT NULL "
+            "GROUP BY app_id, google_play_experiment_id HAVING COUNT(*) > 1"
+        )
+    ).all()
+    if duplicates:
+        raise RuntimeError(f"Duplicated previous_experiments rows, clean them up first: {duplicates[:10]}")
+
+    op.create_index(
+        "uq_previous_experiments_app_play_experiment",
+        "previous_experiments",
+        ["app_id", "google_play_experiment_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_previous_experiments_app_play_experiment", table_name="previous_experiments")
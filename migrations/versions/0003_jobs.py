@@ -0,0 +1,49 @@
+"""Add the jobs table shared by the worker hosts
+
+Per-app automation and CSL fetch jobs, claimed with leases so several
+hosts can run worker.py without processing an app twice. The apps due for
+a sync are polled on status and next_sync.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("app_id", sa.Integer(), sa.ForeignKey("apps.id"), nullable=False),
+        sa.Column("kind", sa.Enum("EXPERIMENTS", "CSLS", name="jobkind"), nullable=False),
+        sa.Column("status", sa.Enum("PENDING", "RUNNING", "DONE", "FAILED", name="jobstatus"), nullable=False),
+        sa.Column("due_at", sa.DateTime(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("dedupe_key", sa.String(128), nullable=True, unique=True),
+        sa.Column("running_app_id", sa.Integer(), nullable=True, unique=True),
+        sa.Column("worker", sa.String(255), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_jobs_status_due_at", "jobs", ["status", "due_at"])
+    op.create_index("ix_jobs_status_lease_expires_at", "jobs", ["status", "lease_expires_at"])
+    op.create_index("ix_jobs_app_kind_finished_at", "jobs", ["app_id", "kind", "finished_at"])
+    op.create_index("ix_apps_status_next_sync", "apps", ["status", "next_sync"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_apps_status_next_sync", table_name="apps")
+    op.drop_table("jobs")
@@ -0,0 +1,26 @@
+"""Add apps.csls_synced_at
+
+When the CSLs of an app were last fetched, the CSL fetch no longer moves
+last_sync/next_sync which schedule the experiments automation.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("apps", sa.Column("csls_synced_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("apps", "csls_synced_at")
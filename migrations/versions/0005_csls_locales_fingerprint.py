@@ -0,0 +1,29 @@
+"""Add csls.fingerprint and csls.locales_fetched_at
+
+The fingerprint of the custom store listings overview row and the time
+the locales of a CSL were last fetched, the locale pages of unchanged CSLs
+are only visited again once their locales expire.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("csls", sa.Column("fingerprint", sa.String(length=40), nullable=True))
+    op.add_column("csls", sa.Column("locales_fetched_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("csls", "locales_fetched_at")
+    op.drop_column("csls", "fingerprint")
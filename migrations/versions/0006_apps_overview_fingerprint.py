@@ -0,0 +1,28 @@
+"""Add apps.overview_fingerprint and apps.overview_fingerprint_at
+
+The experiments overview fingerprint of the last full automation run of
+an app, unchanged apps with nothing to create or stop are skipped.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("apps", sa.Column("overview_fingerprint", sa.String(length=40), nullable=True))
+    op.add_column("apps", sa.Column("overview_fingerprint_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("apps", "overview_fingerprint_at")
+    op.drop_column("apps", "overview_fingerprint")
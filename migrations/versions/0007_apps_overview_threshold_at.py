@@ -0,0 +1,27 @@
+"""Add apps.overview_threshold_at
+
+The next duration threshold of a running experiment at the last full
+automation run of an app, an unchanged app is no longer skipped once it is
+reached, its experiments can be stopped or applied.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("apps", sa.Column("overview_threshold_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("apps", "overview_threshold_at")
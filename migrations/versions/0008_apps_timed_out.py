@@ -0,0 +1,28 @@
+"""Add apps.timed_out_at and apps.timed_out_stage
+
+When the last automation run of an app ran out of its time budget and in
+which stage, cleared by the next run that completes.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("apps", sa.Column("timed_out_at", sa.DateTime(), nullable=True))
+    op.add_column("apps", sa.Column("timed_out_stage", sa.String(50), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("apps", "timed_out_stage")
+    op.drop_column("apps", "timed_out_at")
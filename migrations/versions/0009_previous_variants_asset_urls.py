@@ -0,0 +1,36 @@
+"""Store the asset URLs of previous variants as text
+
+Scraped asset URLs can be longer than 255 characters, they were cut to the
+column length and saved broken.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 00:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+ASSET_COLUMNS = ["icon", "promo_video", "feature_graphic"] + [
+    f"screen{i}{suffix}" for suffix in ("", "_7inch", "_10inch") for i in range(1, 9)
+]
+
+
+def upgrade() -> None:
+    for column in ASSET_COLUMNS:
+        op.alter_column(
+            "previous_variants", column, type_=sa.Text(), existing_type=sa.String(255), existing_nullable=True
+        )
+
+
+def downgrade() -> None:
+    for column in ASSET_COLUMNS:
+        op.alter_column(
+            "previous_variants", column, type_=sa.String(255), existing_type=sa.Text(), existing_nullable=True
+        )
@@ -0,0 +1,141 @@
+from dotenv import load_dotenv
+import argparse
+import traceback
+from functools import partial
+from typing import List
+import src.utils.logger as logger
+from main import automate_experiments_for_app
+from src.modules.app.snapshot import AppSnapshot, PublisherSnapshot, get_graph_snapshot
+from src.modules.app.schemas import AppStatus
+from src.modules.app.repository import mark_app_timed_out, update_app_sync_status, update_apps_csls_sync_status
+from src.modules.csl.repository import add_csls
+from src.modules.csl.service import fetch_app_csls, get_csl_locales, is_csls_sync_due
+from src.database.connection import get_database, dispose_database
+from src.database.unit_of_work import UnitOfWork
+from src.services.play_console import get_driver, run_publisher, shutdown
+from src.services.worker_pool import run_in_workers
+from src.utils.watchdog import BudgetExceeded, time_budget
+from src.utils import tracing
+load_dotenv(override=True)
+
+
+def main(client_id: int = None, manual: bool = False, workers: int = 1):
+    """
+    Fetch the due CSLs and run the experiments automation of each app, on one browser
+
+    Args:
+        client_id: int Client ID
+        manual: bool If True, only fetch the CSLs of apps with sync_csls_now=True
+            and automate apps with sync_now=True
+        workers: int Number of worker processes, publishers are spread across them
+    """
+    trace_id = tracing.start_trace()
+    with get_database().session() as session:
+        publishers = get_graph_snapshot(session).active_publishers()
+
+    publishers = [
+        publisher for publisher in publishers
+        if (client_id is None or publisher.id == client_id) and _get_apps_to_process(publisher, manual)
+    ]
+
+    if workers > 1:
+        run_in_workers(
+            [publisher.id for publisher in publishers], run_publisher, shutdown, workers,
+            select_apps=partial(_get_apps_to_process, manual=manual),
+            process=partial(process_publisher, manual=manual), trace_id=trace_id
+        )
+        dispose_database()
+        tracing.finish_trace()
+        return
+
+    for publisher in publishers:
+        process_publisher(publisher, _get_apps_to_process(publisher, manual), manual)
+
+    shutdown()
+    tracing.finish_trace()
+
+def _csls_due(app: AppSnapshot, manual: bool) -> bool:
+    return app.sync_csls_now if manual else is_csls_sync_due(app)
+
+def _automation_due(app: AppSnapshot, manual: bool) -> bool:
+    return app.status == AppStatus.ACTIVE and (app.sync_now or not manual)
+
+def _get_apps_to_process(publisher: PublisherSnapshot, manual: bool) -> List[AppSnapshot]:
+    """Get the apps of a publisher with CSLs to fetch or experiments to automate"""
+    return [app for app in publisher.apps if _csls_due(app, manual) or _automation_due(app, manual)]
+
+def process_publisher(publisher: PublisherSnapshot, apps: List[AppSnapshot], manual: bool = False) -> List[AppSnapshot]:
+    """
+    Fetch the CSLs then automate the experiments of each app, returns the apps that failed
+
+    The freshly fetched CSLs are handed to the automation as is, without
+    reading them back from the database.
+    """
+    with tracing.span("publisher", tracing.PUBLISHER, publisher=publisher.id), get_database().session() as session:
+        gpc = get_driver(publisher, apps[0], session)
+
+        failed = []
+        for app in apps:
+            try:
+                logger.set_app_context(app.package_id)
+
+                with tracing.span("app", tracing.APP, app=app.package_id), time_budget("APP"):
+                    csls = app.csl_locales
+                    if _csls_due(app, manual):
+                        logger.logger.info(f"Getting CSLS for {app.package_id}")
+                        with tracing.span("csls"), time_budget("CSLS"):
+                            records = fetch_app_csls(gpc, publisher, app)
+                        add_csls(session, records)
+                        update_apps_csls_sync_status([app.id], session)
+                        csls = get_csl_locales(records)
+
+                    if _automation_due(app, manual):
+                        # One transaction per app, committed after each console action
+                        with UnitOfWork(session, app.package_id):
+                            next_sync = automate_experiments_for_app(session, publisher, app, gpc, csls)
+                            update_app_sync_status(app.id, session, next_sync)
+
+            except BudgetExceeded as e:
+                logger.logger.error(f"Timeout in processing app {app.package_id}: {e}")
+                gpc.reset_page()
+                mark_app_timed_out(app.id, session, e.name)
+                failed.append(app)
+                continue
+            except Exception as e:
+                logger.logger.error(str(e))
+                logger.logger.error(f"Error in processing app {app.package_id}")
+                logger.logger.error(traceback.format_exc())
+                failed.append(app)
+                continue
+            finally:
+                # The publisher and run records are not tagged with the last app
+                logger.set_app_context(None)
+        return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch CSLs and run the ASO experiments automation.")
+
+    parser.add_argument(
+        "--client_id",
+        type=int,
+        default=None,
+        help="an integer for the client ID"
+    )
+
+    parser.add_argument(
+        "--manual",
+        action="store_true",
+        help="Only process apps with sync_now=True or sync_csls_now=True"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes, each with its own browser"
+    )
+
+    args = parser.parse_args()
+
+    main(args.client_id, args.manual, args.workers)
@@ -0,0 +1,186 @@
+from dotenv import load_dotenv
+import argparse
+import heapq
+import signal
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import fetch_csls
+import main
+import src.utils.logger as logger
+from src.config.settings import SCHEDULER
+from src.database.connection import get_database
+from src.modules.app.repository import get_due_apps
+from src.modules.app.schemas import AppStatus
+from src.modules.app.snapshot import get_graph_snapshot
+from src.modules.csl.service import get_csls_due_at
+from src.modules.job.schemas import JobKind
+from src.services import play_console
+load_dotenv(override=True)
+
+
+class JobRunner:
+    """
+    Run app jobs on one browser, kept open between jobs
+
+    The browser is opened by the first job and closed by shutdown.
+    """
+
+    def run(self, kind: JobKind, app_id: int) -> None:
+        """
+        Run the experiments automation or the CSL fetch of an app
+
+        Args:
+            kind: Job kind
+            app_id: App ID
+
+        Raises:
+            RuntimeError: If the app is unknown or the automation failed
+        """
+        with get_database().session() as session:
+            snapshot = get_graph_snapshot(session)
+        app = snapshot.get_app(app_id)
+        publisher = snapshot.get_publisher(app.publisher_id) if app else None
+        if publisher is None:
+            raise RuntimeError(f"App {app_id} or its publisher not found")
+
+        start = time.monotonic()
+        if kind == JobKind.EXPERIMENTS:
+            failed = main.process_publisher(publisher, [app])
+            if failed:
+                raise RuntimeError(f"Experiments automation failed for {app.package_id}")
+        else:
+            failed = fetch_csls.fetch_csls(publisher, [app])
+            if failed:
+                raise RuntimeError(f"CSL fetch timed out for {app.package_id}")
+        logger.logger.info(f"{kind.value} job for {app.package_id} done in {time.monotonic() - start:.1f}s")
+
+    def shutdown(self) -> None:
+        """Close the browser and the database connections"""
+        play_console.shutdown()
+
+
+class Scheduler:
+    """
+    Daemon running the experiments automation and the CSL fetches of each app when due,
+    on a single host, see worker.py to share the jobs between hosts
+
+    Jobs are kept in a heap ordered by due time. Experiments jobs are due at the
+    app next_sync, set by update_app_sync_status, CSL jobs CSLS_INTERVAL_HOURS
+    after the app csls_synced_at, and both right away when sync_now/sync_csls_now are set.
+    The apps are polled every poll_interval seconds and every job runs on the
+    same JobRunner.
+    """
+
+    def __init__(self, poll_interval: int = SCHEDULER['POLL_INTERVAL']):
+        self.poll_interval = poll_interval
+        self.queue: List[Tuple[float, str, int]] = []
+        # Due time of the queued jobs, heap entries not matching it are stale
+        self.scheduled: Dict[Tuple[str, int], float] = {}
+        # Jobs just run are not run again before this time, even if still due
+        self.not_before: Dict[Tuple[str, int], float] = {}
+        self.runner = JobRunner()
+        self.stopping = False
+
+    def stop(self, signum=None, frame=None) -> None:
+        logger.logger.info("Scheduler stopping after the current job")
+        self.stopping = True
+
+    def run(self) -> None:
+        """Run the due jobs until stopped"""
+        logger.logger.info(f"Scheduler started, polling every {self.poll_interval}s")
+        next_poll = 0.0
+        try:
+            while not self.stopping:
+                now = time.time()
+                if now >= next_poll:
+                    self.poll(now)
+                    next_poll = now + self.poll_interval
+
+                job = self.pop_due(now)
+                if job is not None:
+                    self.dispatch(*job)
+                    continue
+
+                wake_at = min(next_poll, self.queue[0][0]) if self.queue else next_poll
+                # Short sleeps, a stop signal is handled within a second
+                time.sleep(min(1.0, max(0.0, wake_at - time.time())))
+        finally:
+            self.shutdown()
+
+    def poll(self, now: float) -> None:
+        """Queue the jobs due before the next poll"""
+        until = datetime.fromtimestamp(now + self.poll_interval, timezone.utc)
+        with get_database().session() as session:
+            snapshot = get_graph_snapshot(session)
+            due_apps = get_due_apps(session, until)
+
+        for app_id, next_sync, sync_now, sync_csls_now in due_apps:
+            if sync_now or next_sync is None:
+                self.push(JobKind.EXPERIMENTS, app_id, now)
+            elif _utc_timestamp(next_sync) <= until.timestamp():
+                self.push(JobKind.EXPERIMENTS, app_id, max(now, _utc_timestamp(next_sync)))
+            if sync_csls_now:
+                self.push(JobKind.CSLS, app_id, now)
+
+        for publisher in snapshot.active_publishers():
+            for app in publisher.apps:
+                if app.status in (AppStatus.ACTIVE, AppStatus.CONNECTING):
+                    self.push(JobKind.CSLS, app.id, max(now, get_csls_due_at(app).timestamp()))
+
+    def push(self, kind: JobKind, app_id: int, due: float) -> None:
+        """Queue a job, or move it earlier if already queued"""
+        key = (kind.value, app_id)
+        due = max(due, self.not_before.get(key, 0.0))
+        if key in self.scheduled and self.scheduled[key] <= due:
+            return
+        self.scheduled[key] = due
+        heapq.heappush(self.queue, (due, kind.value, app_id))
+
+    def pop_due(self, now: float) -> Optional[Tuple[JobKind, int]]:
+        """Take the next due job off the queue, skipping the stale entries"""
+        while self.queue and self.queue[0][0] <= now:
+            due, kind, app_id = heapq.heappop(self.queue)
+            if self.scheduled.get((kind, app_id)) == due:
+                del self.scheduled[(kind, app_id)]
+                return JobKind(kind), app_id
+        return None
+
+    def dispatch(self, kind: JobKind, app_id: int) -> None:
+        """Run a job, it is not run again before RETRY_MINUTES even if still due"""
+        self.not_before[(kind.value, app_id)] = time.time() + SCHEDULER['RETRY_MINUTES'] * 60
+        try:
+            self.runner.run(kind, app_id)
+        except Exception as e:
+            logger.logger.error(f"Scheduler {kind.value} job failed for app {app_id}: {e}")
+            logger.logger.error(traceback.format_exc())
+
+    def shutdown(self) -> None:
+        self.runner.shutdown()
+        logger.logger.info("Scheduler stopped")
+
+
+def _utc_timestamp(value: datetime) -> float:
+    """Timestamp of a database datetime, stored in UTC without timezone"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the automation of each app when due.")
+
+    parser.add_argument(
+        "--poll_interval",
+        type=int,
+        default=SCHEDULER['POLL_INTERVAL'],
+        help="Seconds between two polls of the apps sync schedule"
+    )
+
+    args = parser.parse_args()
+
+    scheduler = Scheduler(args.poll_interval)
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    scheduler.run()
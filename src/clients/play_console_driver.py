@@ -1,5 +1,7 @@
 import os
-from playwright.sync_api import Locator, sync_playwright
+import hashlib
+from contextlib import contextmanager
+from playwright.sync_api import Locator, Page, sync_playwright
 import random
 import time
 import pyotp
@@ -8,18 +10,23 @@ from src.utils.utils import resize_image, download_image, resize_image_if_needed
 import traceback
 import socket
 from urllib.error import HTTPError
-from src.modules.publisher.models import PublisherModel
-from src.modules.app.models import AppModel
+from src.modules.app.snapshot import AppSnapshot, PublisherSnapshot
 from src.modules.publishing_overview.repository import create_publishing_change
+from src.database.unit_of_work import checkpoint
 from sqlalchemy.orm import Session
 # Logger
 import src.utils.logger as logger
 import re
-from typing import List
+from typing import Iterator, List, Optional
+from src.config.settings import PLAYWRIGHT
 from src.modules.experiment.repository import get_experiment_attributes, get_experiment_variants
 from src.modules.experiment.models import ExperimentModel, VariantModel
-
-print('working_dir', os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from src.modules.experiment.schemas import ScrapedExperiment, ScrapedVariant
+from src.modules.csl.schemas import csl_fingerprint
+from src.services.run_journal import is_action_taken, record_action
+from src.utils.pacing import get_pacer
+from src.utils.process import get_tree_rss
+from src.utils import tracing
 
 def chunks(l, n):
     """Yield successive n-sized chunks from l."""
@@ -43,7 +50,7 @@ class PlayConsoleDriver:
     completed_table_xpath = '//console-section[@htmltitle="Completed"]'
     past_table_xpath = '//console-section[@htmltitle="Past experiments"]'
 
-    def __init__(self, publisher: PublisherModel, app: AppModel, email: str, password: str, otp_code: str, session: Session):
+    def __init__(self, publisher: PublisherSnapshot, app: AppSnapshot, email: str, password: str, otp_code: str, session: Session, storage_state: Optional[str] = None):
         self.publisher = publisher
         self.app = app
         self.play_console_publisher = publisher.play_console_id
@@ -56,7 +63,14 @@ class PlayConsoleDriver:
         self.email = email
         self.password = password
         self.session = session
+        # Playwright storage state file to start from and save the login to
+        self.storage_state = storage_state
         self.logger = logger.logger
+        # Navigation budget of the Google account, shared by the workers of the host
+        self.pacer = get_pacer(email)
+        # Navigations of the current browser context and pages opened by managed_page
+        self.navigations = 0
+        self.open_pages = 0
         self.playwright = sync_playwright().start()
         self.browser = self.start_browser()
         if not self.is_logged_in():
@@ -64,6 +78,7 @@ class PlayConsoleDriver:
             for t in range(3):
                 try:
                     self.login_google()
+                    self.save_storage_state()
                     break
                 except Exception as e:
                     self.logger.debug("Login failed, trying again")
@@ -89,10 +104,10 @@ class PlayConsoleDriver:
 
     def clean(self):
         if self.browser is not None:
-            self.browser.close_browser()
-            self.logger.error("Browser closed")
+            self.close_browser()
+            self.browser = None
 
-    def set_publisher_app(self, publisher: PublisherModel, app: AppModel):
+    def set_publisher_app(self, publisher: PublisherSnapshot, app: AppSnapshot):
         self.publisher = publisher
         self.app = app
         self.play_console_publisher = publisher.play_console_id
@@ -102,6 +117,7 @@ class PlayConsoleDriver:
         self.automated_send_for_review = app.automated_send_for_review
         self.automated_publishing = app.automated_publishing
         self.logger = logger.logger
+        self.log_gauges()
 
     @property
     def base_url(self) -> str:
@@ -169,8 +185,38 @@ class PlayConsoleDriver:
             f"/publishing"
         )
 
+    def _goto(self, url: str, page=None):
+        """Navigate to a url once the account navigation budget allows it"""
+        if page is None:
+            # The main page is about to be replaced anyway, the context can be recycled now
+            self._recycle_context_if_needed()
+        with tracing.span("pacing", tracing.WAIT):
+            self.pacer.acquire()
+        self.navigations += 1
+        with tracing.span("goto", tracing.NAVIGATION, url=url):
+            return (page or self.page).goto(url)
+
+    def _click_to_navigate(self, selector: str):
+        """Click an element loading a new page once the account navigation budget allows it"""
+        with tracing.span("pacing", tracing.WAIT):
+            self.pacer.acquire()
+        self.navigations += 1
+        with tracing.span("click", tracing.NAVIGATION, selector=selector):
+            self.page.click(selector)
+
+    def _upload(self, selector: str, files):
+        """Upload files once the account navigation budget allows it"""
+        with tracing.span("pacing", tracing.WAIT):
+            self.pacer.acquire()
+        with tracing.span("upload", tracing.NAVIGATION):
+            self.page.set_input_files(selector, files)
+
+    def _wait_for_network_idle(self):
+        with tracing.span("network_idle", tracing.WAIT):
+            self.page.wait_for_load_state("networkidle")
+
     def random_sleep(self, start: int = 5, end: int = 10):
-        time.sleep(random.randint(start, end))
+        tracing.sleep(random.randint(start, end))
 
     def create_short_description_experiment(self):
         pass
@@ -178,8 +224,13 @@ class PlayConsoleDriver:
     def create_icon_experiment(self):
         pass
 
+    @tracing.traced()
     def create_experiment(self, experiment: ExperimentModel, variants: List[VariantModel], publisher_id, app_id):
-        """Create experiment in Play Console"""
+        """Create experiment in Play Console, once per run"""
+        if is_action_taken(self.app.id, "create", experiment.id):
+            self.logger.info(f"Experiment {experiment.id} already created in this run")
+            return True, None
+
         # Get experiment attributes in dictionary format
         experiment_data = get_experiment_attributes(self.session, experiment)
         variant_data = get_experiment_variants(experiment)
@@ -197,7 +248,7 @@ class PlayConsoleDriver:
         self.logger.info(f"Folder created at {path_images}")
 
         try:
-            self.page.goto(self.create_experiments_url)
+            self._goto(self.create_experiments_url)
             self.logger.info("Experiments page opened")
             ## First Page
             # fill in experiment name
@@ -231,7 +282,7 @@ class PlayConsoleDriver:
             # Click on Localised experiment
             if experiment_data["locale_name"] != "Default Graphics":  # Updated from experiment_type_auto_populated
                 self.page.click("text=Localized experiment")
-                time.sleep(2)
+                tracing.sleep(2)
                 # Click on select locales 1st drop down
                 self.logger.info("clicking on select locales 2nd drop down")
                 self.page.locator(
@@ -252,9 +303,9 @@ class PlayConsoleDriver:
             # icon experiments
             elif experiment_data["locale_name"] == "Default Graphics":  # Updated from experiment_type_auto_populated
                 self.page.click("text=Default graphics experiment")
-                time.sleep(2)
+                tracing.sleep(2)
 
-            time.sleep(7)
+            tracing.sleep(7)
             # Click on Next button first page
             self.logger.info("go to second page")
             self.page.click(
@@ -281,14 +332,14 @@ class PlayConsoleDriver:
             elif variants_len == 3:
                 self.page.locator("text=3 (A/B/C/D test)").click()
                 self.logger.info("3 variants")
-            time.sleep(2)
+            tracing.sleep(2)
 
             # # Minimum detectable effect
             #     self.page.locator('text=2.5%').nth(1).click()
 
             if experiment_data["minimum_detectable_effect"] != "2.5%":
                 self.page.locator('xpath=//material-dropdown-select/dropdown-button/div/span[contains(text(),"2.5%")]').click()
-                time.sleep(1)
+                tracing.sleep(1)
                 mdf=experiment_data['minimum_detectable_effect']
                 self.page.locator(
                     f'xpath=//material-select-dropdown-item/dynamic-component/description-option/div/div[contains(text(), "{mdf}")]'
@@ -297,7 +348,7 @@ class PlayConsoleDriver:
             # # Confidence Interval
             if experiment_data["confidence_interval"] != "90%":
                 self.page.locator('xpath=//material-dropdown-select/dropdown-button/div/span[contains(text(),"90%")]').click()
-                time.sleep(1)
+                tracing.sleep(1)
                 # Click on the desired confidence interval using a more specific selector
                 self.page.locator(
                     f'xpath=//material-select-dropdown-item/dynamic-component/description-option/div/div[contains(text(), "{experiment_data["confidence_interval"]}")]'
@@ -325,7 +376,7 @@ class PlayConsoleDriver:
             if len(variants[0].promo_video or "") > 0:
                 self.page.locator('xpath=//material-checkbox/div/label[contains(text(), "Video")]').click()
 
-            time.sleep(1)
+            tracing.sleep(1)
             # Loop over variants and create them
             for i_v, variant in enumerate(variants):
                 edit_variant_name = f"text=Edit Variant {i_v+1}"
@@ -352,11 +403,11 @@ class PlayConsoleDriver:
                     image = f"{path_images}/{self._sanitize_filename(variant.name)}_{timestamp}.png"
                     download_image(variant.icon, image)
                     resize_image(image, (512, 512))
-                    self.page.set_input_files(
+                    self._upload(
                         'xpath=//app-image-uploader[@debug-id="icon-uploader"]/console-graphic-uploader/input[@type="file"]',
                         image,
                     )
-                    time.sleep(1)
+                    tracing.sleep(1)
                 if len(variant.feature_graphic or "") > 0:
                     self.page.fill(
                         'xpath=//material-input[@debug-id="name-input"]/label/input',
@@ -365,11 +416,11 @@ class PlayConsoleDriver:
                     image = f"{path_images}/{self._sanitize_filename(variant.name)}_{timestamp}.png"
                     download_image(variant.feature_graphic, image)
                     resize_image(image, (1024, 500))
-                    self.page.set_input_files(
+                    self._upload(
                         'xpath=//app-image-uploader[@debug-id="feature-graphic-uploader"]/console-graphic-uploader/input[@type="file"]',
                         image,
                     )
-                    time.sleep(5)
+                    tracing.sleep(5)
                 if len(variant.screen1 or "") > 0:
                     self.page.fill(
                         'xpath=//material-input[@debug-id="name-input"]/label/input',
@@ -400,19 +451,19 @@ class PlayConsoleDriver:
                         resize_image_if_needed(image, True)
                         screens_10.append(image)
                     self.logger.info(screens)
-                    self.page.set_input_files(
+                    self._upload(
                         'xpath=//app-screenshots-uploader[@debug-id="phone-screenshots-uploader"]/console-graphic-uploader/input[@type="file"]',
                         screens,
                     )
-                    self.page.set_input_files(
+                    self._upload(
                         'xpath=//app-screenshots-uploader[@debug-id="tablet-small-screenshots-uploader"]/console-graphic-uploader/input[@type="file"]',
                         screens_7,
                     )
-                    self.page.set_input_files(
+                    self._upload(
                         'xpath=//app-screenshots-uploader[@debug-id="tablet-regular-screenshots-uploader"]/console-graphic-uploader/input[@type="file"]',
                         screens_10,
                     )
-                    time.sleep(30)
+                    tracing.sleep(30)
                 if len(variant.promo_video or "") > 0:
                     self.page.fill(
                         'xpath=//material-input[@debug-id="name-input"]/label/input',
@@ -422,17 +473,19 @@ class PlayConsoleDriver:
                         'xpath=//material-input[@debug-id="promo-video-input"]/label/input',
                         f"{variant.promo_video}",
                     )
-                    time.sleep(5)
+                    tracing.sleep(5)
                 self.page.click("text=Apply")
 
-            time.sleep(5)
+            tracing.sleep(5)
             self.logger.info("Click on Save")
+            with tracing.span("pacing", tracing.WAIT):
+                self.pacer.acquire()
             self.page.locator(
                 'xpath=//*[@id="main-content"]/div/div[1]/page-router-outlet/page-wrapper/div/create-store-listing-experiment-page/publishing-bottom-bar/form-bottom-bar/bottom-bar-base/div/div/div/div[2]/console-button-set/div[3]/overflowable-item[2]/button/span'
             ).click()
 
             # Go to Publishing overview
-            self.page.click("text=Go to overview")
+            self._click_to_navigate("text=Go to overview")
             # self.accept_publishing_changes()
 
         # HTTP Excpetion
@@ -447,12 +500,14 @@ class PlayConsoleDriver:
             self.logger.error(f"Something went wrong {str(se)}")
             self.logger.error(traceback.format_exc())
             return False, str(se)
-        time.sleep(10)
+        tracing.sleep(10)
+        record_action(self.app.id, "create", experiment.id)
         return True,  None
 
+    @tracing.traced()
     def check_url(self, url):
         # Navigate to the URL
-        response = self.page.goto(url)
+        response = self._goto(url)
 
         # Check if the page loaded successfully
         if response.ok:
@@ -464,6 +519,7 @@ class PlayConsoleDriver:
             )
             return False
 
+    @tracing.traced()
     def accept_publishing_changes(self):
         """Accept any pending publishing changes"""
         self.logger.info("Checking review_and_publishing_changes")
@@ -471,9 +527,9 @@ class PlayConsoleDriver:
         review = True
         changes = []
         
-        self.page.goto(self.publishing_overview)
+        self._goto(self.publishing_overview)
         # Changes ready to publish
-        time.sleep(8)
+        tracing.sleep(8)
         table_exists = self.page.locator(
                 "xpath=//console-table[@debug-id='changes-table']/div/div/ess-table/ess-particle-table/div/div/div/div"
             ).count() > 0
@@ -524,10 +580,10 @@ class PlayConsoleDriver:
                     try:
                         # log
                         self.logger.info("Sending changes to publish")
-                        self.page.click(
+                        self._click_to_navigate(
                             'xpath=//publishing-changes-section[@debug-id="go-live-changes"]/console-section/div/console-header/div/div/div/div/div/console-button-set/div/div/button[@debug-id="go-live-button"]'
                         )
-                        time.sleep(2)
+                        tracing.sleep(2)
                         # Click on Publish Changes button
                         try:
                             # log
@@ -555,12 +611,12 @@ class PlayConsoleDriver:
                         try:
                             # log
                             self.logger.info("Sending changes for review")
-                            self.page.click(
+                            self._click_to_navigate(
                                 'xpath=//publishing-changes-section[@debug-id="not-sent-for-review-changes"]/console-section/div/console-header/div/div/div/div/div/console-button-set/div/div/button[@debug-id="send-for-review-button"]'
                             )
                         except Exception:
                             pass
-                        time.sleep(2)
+                        tracing.sleep(2)
                         try:
                             # Send changes for review dialog button
                             # log
@@ -583,6 +639,8 @@ class PlayConsoleDriver:
                             publish,
                             review
                         )
+                        # The changes are already sent in the console
+                        checkpoint(self.session, "publishing changes")
                     except Exception as e:
                         self.logger.error(f"Error saving publishing changes to database: {e}")
 
@@ -677,7 +735,8 @@ class PlayConsoleDriver:
 
         return variant
 
-    def get_running_experiments(self, csls) -> list:
+    @tracing.traced()
+    def get_running_experiments(self, csls) -> List[ScrapedExperiment]:
         # Accept publishing changes first TODO
         # self.accept_publishing_changes()
         # skip the header row
@@ -687,9 +746,9 @@ class PlayConsoleDriver:
             try:
                 # Select 100 instead of 10 for Completed experiments
                 # Get running experiments second
-                self.page.goto(self.experiments_url)
+                self._goto(self.experiments_url)
                 try:
-                    self.page.wait_for_load_state("networkidle")
+                    self._wait_for_network_idle()
                 except Exception:
                     pass
                 if (
@@ -701,7 +760,7 @@ class PlayConsoleDriver:
                     self.page.locator(
                         'xpath=//console-table[@debug-id="complete-experiment-table"]/pagination-bar/div/div/div/material-dropdown-select/dropdown-button/div[@aria-label="Show rows: 10 selected."]'
                     ).click()
-                    self.page.wait_for_load_state("networkidle")
+                    self._wait_for_network_idle()
 
                     self.page.click(
                         'xpath=//material-select-dropdown-item/span[contains(text(),"200")]'
@@ -716,14 +775,14 @@ class PlayConsoleDriver:
                     self.page.locator(
                         'xpath=//console-table[@debug-id="in-progress-experiment-table"]/pagination-bar/div/div/div/material-dropdown-select/dropdown-button/div[@aria-label="Show rows: 10 selected."]'
                     ).click()
-                    self.page.wait_for_load_state("networkidle")
+                    self._wait_for_network_idle()
 
                     self.page.click(
                         'xpath=//material-select-dropdown-item/span[contains(text(),"200")]'
                     )
 
                 try:
-                    self.page.wait_for_load_state("networkidle")
+                    self._wait_for_network_idle()
                 except Exception:
                     pass
                 running_experiments_with_headers = self.page.locator(
@@ -742,7 +801,7 @@ class PlayConsoleDriver:
                 i = 0
                 for i, row in enumerate(running_experiments_with_headers):
                     # go to page
-                    self.logger.info(f"Processing Experiment number={i}")
+                    self.logger.debug(f"Processing Experiment number={i}")
                     # assign the row again
                     try:
                         row = running_experiments_with_headers[i]
@@ -799,6 +858,7 @@ class PlayConsoleDriver:
                     except Exception:
                         locale = "All languages"
 
+                    experiment_type = None
                     if "Translated" in row_text:
                         experiment_type = "Translated"
                     elif "Default graphics" in row_text:
@@ -806,95 +866,86 @@ class PlayConsoleDriver:
                     # Click on go to experiment page
                     # row.locator("xpath=/ess-cell").nth(-1).click()
                     experiment_link = row.locator("xpath=//ess-cell/console-table-main-action-cell/a").get_attribute("href")
-                    new_page = self.context.new_page()
-                    new_page.goto(self.base_url + experiment_link)
-                    time.sleep(2)
-                    # Reload the page to get the correct url
-                    # self.page.reload()
-                    experiment_id = new_page.url.split("/")[-2]
-
-                    time.sleep(3)
-                    variants = []
-
-                    # if start_date is None experiment is a draft so default everything
-                    if start_date is None:
-                        result = None
-                        start_time = None
-                    # experiment is not a draft
-                    else:
-                        try:
-                            result = new_page.locator(
-                                "xpath=//icon-text/simple-html/span/strong"
-                            ).text_content()
-                        except Exception as e:
-                            self.logger.info(f"Failed to get the result {str(e)}")
-                            continue
-                        started_stopped = (
-                            new_page.locator(
-                                "xpath=//p[@debug-id='experiment-description-text']"
-                            )
-                            .text_content()
-                            .split(".")[0]
-                            .split("Started on ")[1]
-                        )
-                        started_stopped = started_stopped.encode('ascii', 'ignore').decode('ascii')
-                        self.logger.info(f"start_time={started_stopped}")
-                        try:
-                            start_time = datetime.strptime(
-                                started_stopped, "%b %d, %Y %I:%M %p"
-                            )
-                        except Exception as e:
-                            start_time = datetime.strptime(
-                                started_stopped, "%b %d, %Y %I:%M%p"
-                            )
-
-                        # Process Variants
-                        variants_stats = new_page.locator(
-                            f'xpath=//experiments-stats-table/console-block-1-column/div/div/console-table/div/div/ess-table//div/div/div/div[contains(@class, "particle-table-row") and not(contains(@class, "particle-table-drilldown-row"))]',
-                        ).all()
-                        variants_stats_len = len(variants_stats)
-                        # self.logger.info("variants_stats_len", variants_stats_len)
-                        # open all dropdown menus for variants
-                        for variant in variants_stats:
-                            variant.get_by_role("button", name="Expand row").click()
-
-                        variants_data = new_page.locator(
-                            f'xpath=//experiments-stats-table/console-block-1-column/div/div/console-table/div/div/ess-table//div/div/div/div[contains(@class, "particle-table-drilldown-row")]',
-                        ).all()
-                        variants_data_len = len(variants_data)
-                        # self.logger.info("variants_data_len", variants_data_len)
-                        # process variants
-                        for variant_stat, variant_data in zip(
-                            variants_stats, variants_data
-                        ):
-                            variant = self.process_variant(variant_stat, variant_data)
-                            # change to int
+                    with self.managed_page() as new_page:
+                        self._goto(self.base_url + experiment_link, page=new_page)
+                        tracing.sleep(2)
+                        # Reload the page to get the correct url
+                        # self.page.reload()
+                        experiment_id = new_page.url.split("/")[-2]
+
+                        tracing.sleep(3)
+                        variants = []
+
+                        # if start_date is None experiment is a draft so default everything
+                        if start_date is None:
+                            result = None
+                            start_time = None
+                        # experiment is not a draft
+                        else:
                             try:
-                                variant["installs"] = int(variant["installs"])
+                                result = new_page.locator(
+                                    "xpath=//icon-text/simple-html/span/strong"
+                                ).text_content()
                             except Exception as e:
-                                variant["installs"] = 0
+                                self.logger.info(f"Failed to get the result {str(e)}")
+                                continue
+                            started_stopped = (
+                                new_page.locator(
+                                    "xpath=//p[@debug-id='experiment-description-text']"
+                                )
+                                .text_content()
+                                .split(".")[0]
+                                .split("Started on ")[1]
+                            )
+                            started_stopped = started_stopped.encode('ascii', 'ignore').decode('ascii')
+                            self.logger.debug(f"start_time={started_stopped}")
                             try:
-                                variant["installs_scaled"] = int(
-                                    variant["installs_scaled"]
+                                start_time = datetime.strptime(
+                                    started_stopped, "%b %d, %Y %I:%M %p"
                                 )
                             except Exception as e:
-                                variant["installs_scaled"] = 0
-                            variants.append(variant)
-
-                    exp= {
-                            "app_id": self.app.id,
-                            "experiment_name": experiment_name,
-                            "experiment_id": experiment_id,
-                            "locale": locale,
-                            "store_listing": store_listing,
-                            "experiment_type": experiment_type,
-                            "start_date": start_date,
-                            "start_time": start_time,
-                            "status": result,
-                            "variants": variants,
-                        }
-                    running_experiments.append(exp)
-                    new_page.close()
+                                start_time = datetime.strptime(
+                                    started_stopped, "%b %d, %Y %I:%M%p"
+                                )
+
+                            # Process Variants
+                            variants_stats = new_page.locator(
+                                f'xpath=//experiments-stats-table/console-block-1-column/div/div/console-table/div/div/ess-table//div/div/div/div[contains(@class, "particle-table-row") and not(contains(@class, "particle-table-drilldown-row"))]',
+                            ).all()
+                            variants_stats_len = len(variants_stats)
+                            # self.logger.info("variants_stats_len", variants_stats_len)
+                            # open all dropdown menus for variants
+                            for variant in variants_stats:
+                                variant.get_by_role("button", name="Expand row").click()
+
+                            variants_data = new_page.locator(
+                                f'xpath=//experiments-stats-table/console-block-1-column/div/div/console-table/div/div/ess-table//div/div/div/div[contains(@class, "particle-table-drilldown-row")]',
+                            ).all()
+                            variants_data_len = len(variants_data)
+                            # self.logger.info("variants_data_len", variants_data_len)
+                            # process variants
+                            for variant_stat, variant_data in zip(
+                                variants_stats, variants_data
+                            ):
+                                variants.append(
+                                    ScrapedVariant.from_console(
+                                        self.process_variant(variant_stat, variant_data)
+                                    )
+                                )
+
+                        exp = ScrapedExperiment(
+                            app_id=self.app.id,
+                            experiment_name=experiment_name,
+                            experiment_id=experiment_id,
+                            locale=locale,
+                            store_listing=store_listing,
+                            experiment_type=experiment_type,
+                            start_date=start_date,
+                            start_time=start_time,
+                            status=result,
+                            variants=tuple(variants),
+                        )
+                        running_experiments.append(exp)
             except Exception as s:
                 self.logger.error(f"Something went wrong {str(s)}")
                 self.logger.error(traceback.format_exc())
@@ -909,15 +960,16 @@ class PlayConsoleDriver:
         )
         return running_experiments
 
-    def get_previous_experiments(self, csls) -> list:
+    @tracing.traced()
+    def get_previous_experiments(self, csls) -> List[ScrapedExperiment]:
         for t in range(4):
             self.logger.info(f"Getting previous experiments try={t}")
 
             try:
                 # Select 100 instead of 10 for Completed experiments
                 # Get running experiments second
-                self.page.goto(self.experiments_url)
-                time.sleep(7)
+                self._goto(self.experiments_url)
+                tracing.sleep(7)
 
                 previous_experiments_with_headers = self.page.locator(
                     "xpath=//terminated-experiments-table/console-table/div/div/ess-table/ess-particle-table/div/div/div/div"
@@ -936,7 +988,7 @@ class PlayConsoleDriver:
                 # while len(running_experiments) <= len(running_experiments_with_headers) - 1:
                 for i, row in enumerate(previous_experiments_with_headers):
                     # go to page
-                    self.logger.info(f"Processing previous Experiment number={i}")
+                    self.logger.debug(f"Processing previous Experiment number={i}")
                     try:
                         row = previous_experiments_with_headers[i]
                         row_text = row.text_content()
@@ -953,7 +1005,6 @@ class PlayConsoleDriver:
 
                     # ['PHI-000011-es-419: Game Mode Focus', ' Default store listing  Translated (es-419)Oct 27, 2023', ' 3 variants 75% of usersView PHI-000011-es-419: Game Mode Focusarrow_right_altarrow_right_alt ']
                     experiment_name = row_text.split("\n")[0]
-                    self.logger.info("hi "+row_text.split("\n")[1].split(")")[-1])
                     try:
                         start_date = datetime.strptime(
                             row_text.split("\n")[1].split(")")[-1], "%b %d, %Y"
@@ -992,6 +1043,7 @@ class PlayConsoleDriver:
                     except Exception:
                         locale = "All languages"
 
+                    experiment_type = None
                     if "Translated" in row_text:
                         experiment_type = "Translated"
                     elif "Default graphics" in row_text:
@@ -999,100 +1051,92 @@ class PlayConsoleDriver:
                     # Click on go to experiment page
                     # row.locator("xpath=/ess-cell").nth(-1).click()
                     experiment_link = row.locator("xpath=//ess-cell/console-table-main-action-cell/a").get_attribute("href")
-                    new_page = self.context.new_page()
-                    new_page.goto(self.base_url + experiment_link)
-
-                    time.sleep(2)
-                    # Reload the page to get the correct url
-                    # self.page.reload()
-                    experiment_id = new_page.url.split("/")[-2]
-
-                    time.sleep(3)
-                    variants = []
-
-                    # if start_date is None experiment is a draft so default everything
-                    if start_date is None:
-                        result = None
-                        start_time = None
-                        need_to_kill = False
-                    # experiment is not a draft
-                    else:
-                        try:
-                            result = new_page.locator(
-                                "xpath=//icon-text/simple-html/span/strong"
-                            ).text_content()
-                        except Exception as e:
-                            self.logger.info(f"Failed to get the result {str(e)}")
-                            continue
-                        started_stopped = (
-                            new_page.locator(
-                                "xpath=//p[@debug-id='experiment-description-text']"
-                            )
-                            .text_content()
-                            .split(".")[0]
-                            .split("Started on ")[1]
-                        )
-                        start_time = datetime.strptime(
-                            started_stopped, "%b %d, %Y %I:%M %p"
-                        )
-
-                        # Process Variants
-                        variants_stats = new_page.locator(
-                            f'xpath=//experiments-stats-table/console-block-1-column/div/div/console-table/div/div/ess-table//div/div/div/div[contains(@class, "particle-table-row") and not(contains(@class, "particle-table-drilldown-row"))]',
-                        ).all()
-
-                        # open all dropdown menus for variants
-                        for variant in variants_stats:
-                            variant.get_by_role("button", name="Expand row").click()
-
-                        variants_data = new_page.locator(
-                            f'xpath=//experiments-stats-table/console-block-1-column/div/div/console-table/div/div/ess-table//div/div/div/div[contains(@class, "particle-table-drilldown-row")]',
-                        ).all()
-
-                        # process variants
-                        for variant_stat, variant_data in zip(
-                            variants_stats, variants_data
-                        ):
-                            variant = self.process_variant(variant_stat, variant_data)
-                            # change to int
+                    with self.managed_page() as new_page:
+                        self._goto(self.base_url + experiment_link, page=new_page)
+
+                        tracing.sleep(2)
+                        # Reload the page to get the correct url
+                        # self.page.reload()
+                        experiment_id = new_page.url.split("/")[-2]
+
+                        tracing.sleep(3)
+                        variants = []
+
+                        # if start_date is None experiment is a draft so default everything
+                        if start_date is None:
+                            result = None
+                            start_time = None
+                            need_to_kill = False
+                        # experiment is not a draft
+                        else:
                             try:
-                                variant["installs"] = int(variant["installs"])
+                                result = new_page.locator(
+                                    "xpath=//icon-text/simple-html/span/strong"
+                                ).text_content()
                             except Exception as e:
-                                variant["installs"] = 0
-                            try:
-                                variant["installs_scaled"] = int(
-                                    variant["installs_scaled"]
+                                self.logger.info(f"Failed to get the result {str(e)}")
+                                continue
+                            started_stopped = (
+                                new_page.locator(
+                                    "xpath=//p[@debug-id='experiment-description-text']"
                                 )
-                            except Exception as e:
-                                variant["installs_scaled"] = 0
-                            variants.append(variant)
-                        need_to_kill = any(
-                            [
-                                (
-                                    True
-                                    if v["performance_end"] < 0
-                                    and v["performance_start"] < 0
-                                    else False
+                                .text_content()
+                                .split(".")[0]
+                                .split("Started on ")[1]
+                            )
+                            start_time = datetime.strptime(
+                                started_stopped, "%b %d, %Y %I:%M %p"
+                            )
+
+                            # Process Variants
+                            variants_stats = new_page.locator(
+                                f'xpath=//experiments-stats-table/console-block-1-column/div/div/console-table/div/div/ess-table//div/div/div/div[contains(@class, "particle-table-row") and not(contains(@class, "particle-table-drilldown-row"))]',
+                            ).all()
+
+                            # open all dropdown menus for variants
+                            for variant in variants_stats:
+                                variant.get_by_role("button", name="Expand row").click()
+
+                            variants_data = new_page.locator(
+                                f'xpath=//experiments-stats-table/console-block-1-column/div/div/console-table/div/div/ess-table//div/div/div/div[contains(@class, "particle-table-drilldown-row")]',
+                            ).all()
+
+                            # process variants
+                            for variant_stat, variant_data in zip(
+                                variants_stats, variants_data
+                            ):
+                                variants.append(
+                                    ScrapedVariant.from_console(
+                                        self.process_variant(variant_stat, variant_data)
+                                    )
                                 )
-                                for v in variants
-                            ]
-                        )
+                            need_to_kill = any(
+                                [
+                                    (
+                                        True
+                                        if v.performance_end < 0
+                                        and v.performance_start < 0
+                                        else False
+                                    )
+                                    for v in variants
+                                ]
+                            )
 
-                    previous_experiments.append(
-                        {
-                            "experiment_name": experiment_name,
-                            "experiment_id": experiment_id,
-                            "locale": locale,
-                            "store_listing": store_listing,
-                            "experiment_type": experiment_type,
-                            "start_date": start_date,
-                            "start_time": start_time,
-                            "status": result,
-                            "variants": variants,
-                            "kill": need_to_kill,
-                        }
-                    )
-                    new_page.close()
+                        previous_experiments.append(
+                            ScrapedExperiment(
+                                app_id=self.app.id,
+                                experiment_name=experiment_name,
+                                experiment_id=experiment_id,
+                                locale=locale,
+                                store_listing=store_listing,
+                                experiment_type=experiment_type,
+                                start_date=start_date,
+                                start_time=start_time,
+                                status=result,
+                                variants=tuple(variants),
+                                kill=need_to_kill,
+                            )
+                        )
             except Exception as s:
                 self.logger.error(f"Something went wrong {str(s)}")
                 self.logger.error(traceback.format_exc())
@@ -1107,13 +1151,38 @@ class PlayConsoleDriver:
         )
         return previous_experiments
 
+    @tracing.traced()
+    def get_experiments_overview_fingerprint(self) -> Optional[str]:
+        """
+        Fingerprint of the running and completed experiments tables, one page load
+
+        Returns:
+            sha1 of the tables row texts, None if the page could not be read
+        """
+        try:
+            self._goto(self.experiments_url)
+            try:
+                self._wait_for_network_idle()
+            except Exception:
+                pass
+            rows = self.page.locator(
+                'xpath=//console-table[@debug-id="in-progress-experiment-table" or @debug-id="complete-experiment-table"]'
+                '/div/div/ess-table/ess-particle-table/div/div/div/div'
+            ).all_text_contents()
+        except Exception as e:
+            self.logger.info(f"experiments_overview_error {str(e)}")
+            return None
+        text = "\n".join(" ".join(row.split()) for row in rows)
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    @tracing.traced()
     def get_store_csls(self):
         """
         Get all Custom Store Listings for an app on the Play Console
         """
         csls = []
-        self.page.goto(self.csls_url())
-        time.sleep(6)
+        self._goto(self.csls_url())
+        tracing.sleep(6)
         try:
             csls_tags = self.page.locator(
                 'xpath=//console-table[@debug-id="custom-listings-overview-table"]/div/div/ess-table/ess-particle-table/div/div/div/div'
@@ -1129,12 +1198,14 @@ class PlayConsoleDriver:
                     "xpath=./ess-cell/console-table-main-action-cell/a"
                 ).get_attribute("href")
                 csl_id = link.split("custom-store-listings/")[1]
-                if "URL" not in csl.text_content() and "Google Ad" not in csl.text_content():
+                row_text = csl.text_content()
+                if "URL" not in row_text and "Google Ad" not in row_text:
                     csls.append(
                         {
                             "app": self.app,
                             "name": name,
                             "csl_play_console_id": csl_id,
+                            "fingerprint": csl_fingerprint(name, csl_id, row_text),
                         }
                     )
         except Exception as e:
@@ -1144,10 +1215,13 @@ class PlayConsoleDriver:
                 "app": self.app,
                 "name": "Default store listing",
                 "csl_play_console_id": "",
+                # Not in the overview, only refreshed once its locales expire
+                "fingerprint": None,
             }
         )
         return csls
 
+    @tracing.traced()
     def get_csls_possible_locales(self, csls):
         """
         Get all possible locales for each Custom Store Listing
@@ -1157,8 +1231,8 @@ class PlayConsoleDriver:
             for t in range(3):
                 try:
                     if csl["name"] != "Default store listing":
-                        self.page.goto(self.csl_url(csl["csl_play_console_id"]))
-                        time.sleep(5)
+                        self._goto(self.csl_url(csl["csl_play_console_id"]))
+                        tracing.sleep(5)
                         csl["locales"] = []
                         self.page.click(
                             'xpath=//console-control[@placeholdertext="Select language"]/material-dropdown-select/dropdown-button'
@@ -1172,8 +1246,8 @@ class PlayConsoleDriver:
                             if locale not in csl["locales"]:
                                 csl["locales"].append(locale)
                     else:
-                        self.page.goto(self.main_csl_url)
-                        time.sleep(5)
+                        self._goto(self.main_csl_url)
+                        tracing.sleep(5)
                         csl["locales"] = []
                         self.page.click(
                             'xpath=//console-control[@placeholdertext="Select language"]/material-dropdown-select/dropdown-button'
@@ -1201,42 +1275,51 @@ class PlayConsoleDriver:
                     break
         return csls
 
+    @tracing.traced()
     def stop_experiment(self, experiment_id: str):
         """
         Stop Experiment based on experiment id
 
         :param experiment_id: experiment id
         """
+        if is_action_taken(self.app.id, "stop", experiment_id):
+            self.logger.info(f"Experiment {experiment_id} already stopped in this run")
+            return True
         try:
             url = self.experiment_url(experiment_id)
             self.logger.info(url)
-            self.page.goto(url)
-            time.sleep(5)
+            self._goto(url)
+            tracing.sleep(5)
 
             self.logger.info("Waiting to stop")
 
             # Click on Stop button
-            self.page.click("text=Stop experiment")
+            self._click_to_navigate("text=Stop experiment")
 
             self.page.locator("xpath=//button[@debug-id='yes-button']").click()
-            time.sleep(5)
+            record_action(self.app.id, "stop", experiment_id)
+            tracing.sleep(5)
             # self.accept_publishing_changes()
             return True
         except Exception as e:
             self.logger.info(f"stopping experiment failed {str(e)}")
             return False
 
+    @tracing.traced()
     def apply_experiment(self, experiment_id: str, winning_variant: str):
         """
         Applies the winning variant in the Experiment based on experiment id
 
         :param experiment_id: experiment id
         """
+        if is_action_taken(self.app.id, "apply", experiment_id):
+            self.logger.info(f"Experiment {experiment_id} already applied in this run")
+            return True
         try:
             url = self.experiment_url(experiment_id)
             self.logger.info(url)
-            self.page.goto(url)
-            time.sleep(5)
+            self._goto(url)
+            tracing.sleep(5)
             # Get variants table
             variants = self.page.locator(
                 f'xpath=//experiments-stats-table/console-block-1-column/div/div/console-table/div/div/ess-table//div/div/div/div[contains(@class, "particle-table-row") and not(contains(@class, "particle-table-drilldown-row"))]',
@@ -1255,7 +1338,8 @@ class PlayConsoleDriver:
             except Exception as e:
                 self.logger.info(f"Failed to apply {winning_variant} {str(e)}")
                 return False
-            time.sleep(5)
+            record_action(self.app.id, "apply", experiment_id)
+            tracing.sleep(5)
             # self.accept_publishing_changes()
             return True
         except Exception as e:
@@ -1270,12 +1354,120 @@ class PlayConsoleDriver:
             timeout=15000,
             args=["--full-screen"],
         )
-        self.context = self.browser.new_context(viewport={"width": 1500, "height": 800})
+        self._open_context()
+        self.logger.info("Browser started")
+        return self.browser
+
+    def _open_context(self, storage_state=None):
+        """
+        Open a browser context and its main page
+
+        Args:
+            storage_state: Cookies and local storage to start from, defaults to the
+                storage state file when another worker already saved the login
+        """
+        if storage_state is None and self.storage_state and os.path.exists(self.storage_state):
+            storage_state = self.storage_state
+        self.context = self.browser.new_context(viewport={"width": 1500, "height": 800}, storage_state=storage_state)
         self.context.set_default_timeout(40000)
         self.page = self.context.new_page()
         self.page.set_default_timeout(PLAYWRIGHT_TIMEOUT)
-        self.logger.info("Browser started")
+        self.navigations = 0
 
+    @contextmanager
+    def managed_page(self) -> Iterator[Page]:
+        """
+        Open another page of the browser context, closed when the block ends
+        whatever happens, eg: a continue, an exception or a time budget
+        """
+        page = self.context.new_page()
+        self.open_pages += 1
+        try:
+            yield page
+        finally:
+            self.open_pages -= 1
+            try:
+                page.close()
+            except Exception as e:
+                self.logger.info(f"close_page_error {str(e)}")
+
+    def _recycle_context_if_needed(self):
+        """Recycle the browser context once it made too many navigations or the browser uses too much memory"""
+        if self.open_pages:
+            return
+        if PLAYWRIGHT['RECYCLE_NAVIGATIONS'] and self.navigations >= PLAYWRIGHT['RECYCLE_NAVIGATIONS']:
+            self.recycle_context("navigation limit reached")
+            return
+        if PLAYWRIGHT['MAX_RSS_MB']:
+            rss_mb = get_tree_rss() / (1024 * 1024)
+            if rss_mb > PLAYWRIGHT['MAX_RSS_MB']:
+                self.recycle_context("memory limit reached")
+
+    @tracing.traced()
+    def recycle_context(self, reason: str = "requested"):
+        """
+        Replace the browser context by a new one carrying its cookies and local storage,
+        releasing the memory Chrome holds for the pages of the old one
+
+        Args:
+            reason: Why the context is recycled, for the logs
+        """
+        self.log_gauges(f"Recycling the browser context, {reason}:")
+        try:
+            storage_state = self.context.storage_state()
+        except Exception as e:
+            # The new context starts from the storage state file instead
+            self.logger.info(f"storage_state_error {str(e)}")
+            storage_state = None
+        try:
+            self.context.close()
+        except Exception as e:
+            self.logger.info(f"close_context_error {str(e)}")
+        self._open_context(storage_state)
+        self.log_gauges("Browser context recycled")
+
+    def log_gauges(self, message: str = "Browser"):
+        """Log the open pages, the navigations of the context and the memory of the browser"""
+        try:
+            pages = len(self.context.pages)
+        except Exception:
+            pages = -1
+        rss_mb = get_tree_rss() / (1024 * 1024)
+        self.logger.info(f"{message} pages={pages} navigations={self.navigations} rss_mb={rss_mb:.0f}")
+
+    def reset_page(self):
+        """
+        Replace the pages of the context by a blank one, eg: after a step was aborted mid-way
+
+        A new context is opened from the saved login if the page cannot be replaced.
+        """
+        self.logger.info("Resetting the page")
+        try:
+            for page in self.context.pages:
+                page.close()
+            self.page = self.context.new_page()
+            self.page.set_default_timeout(PLAYWRIGHT_TIMEOUT)
+        except Exception as e:
+            self.logger.info(f"reset_page_error {str(e)}, opening a new context")
+            try:
+                self.context.close()
+            except Exception:
+                pass
+            self._open_context()
+        self.log_gauges()
+
+    def save_storage_state(self):
+        """Save the cookies of the logged in context to the storage state file, if any"""
+        if not self.storage_state:
+            return
+        # Write then rename, a worker starting now never reads a partial file
+        tmp_path = f"{self.storage_state}.{os.getpid()}.tmp"
+        self.context.storage_state(path=tmp_path)
+        os.chmod(tmp_path, 0o600)
+        os.replace(tmp_path, self.storage_state)
+        self.logger.info("Login storage state saved")
+
+    @tracing.traced()
     def is_logged_in(self) -> bool:
         """
         Check if user is logged in Google,
@@ -1287,8 +1479,8 @@ class PlayConsoleDriver:
         self.logger.info("Checking if logged in to Google")
         for _ in range(3):
             try:
-                self.page.goto("https://play.google.com/console/developers")
-                time.sleep(3)
+                self._goto("https://play.google.com/console/developers")
+                tracing.sleep(3)
                 element = self.page.get_by_text(self.email, exact=True)
                 self.logger.info(f"Logged in={element.is_visible()}")
                 return element.is_visible()
@@ -1296,6 +1488,7 @@ class PlayConsoleDriver:
                 self.logger.info(str(e))
         return False
 
+    @tracing.traced()
     def login_google(self, try_count=3):
         """
         Login to Google account
@@ -1308,7 +1501,7 @@ class PlayConsoleDriver:
         self.logger.info("Logging in Google now")
         totp = pyotp.TOTP(self.otp_code.replace(" ", ""))
 
-        self.page.goto(
+        self._goto(
             "https://superuser.com/users/login?ssrc=head&returnurl=https%3a%2f%2fsuperuser.com%2f"
         )
         self.random_sleep(start=5, end=10)
@@ -1316,7 +1509,7 @@ class PlayConsoleDriver:
 
         # click on google button
         self.page.get_by_text("Log in with Google").click()
-        self.page.wait_for_load_state("networkidle")
+        self._wait_for_network_idle()
         self.logger.debug("Google button clicked")
         self.random_sleep()
 
@@ -1345,7 +1538,7 @@ class PlayConsoleDriver:
         try:
             self.logger.info("Sending 2FA code again")
             element = self.page.locator('//input[@id="totpPin"]')
-            time.sleep(20)
+            tracing.sleep(20)
             self.page.keyboard.press("Backspace")
             self.page.keyboard.press("Backspace")
             self.page.keyboard.press("Backspace")
@@ -170,7 +170,7 @@ class GoogleSheetHandler:
         else:
             cols = 0
         if self.worksheet.col_count != cols:
-            print(self.worksheet.col_count, cols, "Wrong columns number to append to worksheet")
+            utils.logger.error(f"Wrong columns number to append to worksheet {self.worksheet.col_count} != {cols}")
             return
         self.worksheet.resize(rows, cols)
         cell_list = self.worksheet.range(rows_old + 1, 1, rows, cols)
@@ -25,6 +25,16 @@ MYSQL = {
     'DATABASE': os.getenv('MYSQL_DATABASE'),
 }
 
+# Optional SQLAlchemy URL replacing the MySQL settings (eg: a local SQLite stand-in)
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+# Database Connection Pool, one pool per process
+DATABASE_POOL = {
+    'SIZE': int(os.getenv('DB_POOL_SIZE', 5)),
+    'MAX_OVERFLOW': int(os.getenv('DB_POOL_MAX_OVERFLOW', 10)),
+    'RECYCLE': 3600
+}
+
 # Google Sheets Configuration
 SHEETS = {
     'CREDENTIAL_FILE': 'utils/aso_experiments.json',
@@ -34,11 +44,16 @@ SHEETS = {
     'DEFAULT_SPREADSHEET_ID': '16img22ajmEOcVyWrS3sdXSneN0imFqT0VDYpYpCfLe8'
 }
 
-# Logging Configuration
+# Logging Configuration, see src/utils/logger.py
 LOGGING = {
-    'DEFAULT_LEVEL': 'DEBUG',
-    'LOG_DIR': '/tmp',
-    'DATE_FORMAT': '%Y-%m-%d_%H-%M'
+    'DEFAULT_LEVEL': os.getenv('LOG_LEVEL', 'INFO'),
+    # Levels by module prefix, eg: "src.clients.play_console_driver=DEBUG,src.utils.helpers=WARNING"
+    'MODULE_LEVELS': os.getenv('LOG_MODULE_LEVELS', ''),
+    'LOG_DIR': os.getenv('LOG_DIR', '/tmp'),
+    # JSON lines file, the worker processes write FILE_NAME with their pid inserted
+    'FILE_NAME': 'pressplay.jsonl',
+    'MAX_BYTES': 50 * 1024 * 1024,
+    'BACKUP_COUNT': 5
 }
 
 # Playwright Configuration
@@ -49,7 +64,19 @@ PLAYWRIGHT = {
     'VIEWPORT': {
         'width': 1500,
         'height': 800
-    }
+    },
+    # Google login cookies shared by the worker processes, keep it private
+    'STORAGE_STATE': os.getenv('PLAYWRIGHT_STORAGE_STATE', '/tmp/pressplay_storage_state.json'),
+    # Replace the browser context, keeping its login, after this many navigations, 0 to never recycle
+    'RECYCLE_NAVIGATIONS': int(os.getenv('PLAYWRIGHT_RECYCLE_NAVIGATIONS', 200)),
+    # Or once the browser and its driver use more memory, 0 for no limit
+    'MAX_RSS_MB': int(os.getenv('PLAYWRIGHT_MAX_RSS_MB', 3072))
+}
+
+# Publisher worker processes (--workers)
+WORKER_POOL = {
+    'START_METHOD': 'spawn',
+    'SHUTDOWN_TIMEOUT': 120
 }
 
 # Image Processing
@@ -75,6 +102,90 @@ PATHS = {
     'CERTS_DIR': 'certs'
 }
 
+# Scheduler daemon (scheduler.py)
+SCHEDULER = {
+    # Seconds between two polls of the apps next_sync and sync flags
+    'POLL_INTERVAL': int(os.getenv('SCHEDULER_POLL_INTERVAL', 60)),
+    # Hours between two CSL fetches of an app
+    'CSLS_INTERVAL_HOURS': 12,
+    # Minutes before a job that did not reschedule its app is retried
+    'RETRY_MINUTES': 30
+}
+
+# CSL fetches
+CSLS = {
+    # Hours the locales of an unchanged CSL are reused before its page is visited again
+    'LOCALES_TTL_HOURS': int(os.getenv('CSL_LOCALES_TTL_HOURS', 168))
+}
+
+# Experiments automation
+AUTOMATION = {
+    # Hours an app with an unchanged experiments overview is skipped at most
+    'MAX_SKIP_HOURS': int(os.getenv('AUTOMATION_MAX_SKIP_HOURS', 24))
+}
+
+# Play Console navigations per Google account, see src/utils/pacing.py
+PACING = {
+    'NAVIGATIONS_PER_MINUTE': int(os.getenv('PACING_NAVIGATIONS_PER_MINUTE', 30)),
+    # Navigations allowed back to back after an idle time
+    'BURST': 5,
+    # Directory of the bucket files shared by the processes of the host, empty for per process buckets
+    'STATE_DIR': os.getenv('PACING_STATE_DIR', '/tmp')
+}
+
+# Timing spans of the runs, see src/utils/tracing.py
+TRACING = {
+    # Directory of the JSON lines files of the spans, one per trace, empty to only keep the totals
+    'DIR': os.getenv('TRACE_DIR', '/tmp/pressplay_traces'),
+    # Trace files kept, the oldest are removed when a run starts
+    'KEEP': int(os.getenv('TRACE_KEEP', 50)),
+    # Prometheus textfile rewritten at the end of each run, eg: for the node exporter
+    'PROMETHEUS_TEXTFILE': os.getenv('TRACE_PROMETHEUS_TEXTFILE')
+}
+
+# Journal of the main.py runs, resumed with --resume after a crash
+RUN_JOURNAL = {
+    'PATH': os.getenv('RUN_JOURNAL_PATH', '/tmp/pressplay_run_journal.db')
+}
+
+# Wall-clock seconds before a step is aborted by the watchdog, 0 for no limit
+TIME_BUDGETS = {
+    # Whole automation or CSL fetch of an app
+    'APP': int(os.getenv('APP_TIME_BUDGET', 1800)),
+    'PUBLISHING_CHANGES': 180,
+    'RUNNING_EXPERIMENTS': 600,
+    'CREATE_EXPERIMENTS': 900,
+    'PREVIOUS_EXPERIMENTS': 600,
+    'CSLS': 900
+}
+
+# Sync cadence of the apps, see src/modules/app/cadence.py
+CADENCE = {
+    # Hours between two syncs of an app with an experiment to create or recent activity
+    'BUSY_HOURS': 1,
+    # Hours between two syncs of an app with running experiments
+    'RUNNING_HOURS': 6,
+    # Hours between two syncs of an app with nothing running nor queued
+    'IDLE_HOURS': 24,
+    # Hours a publishing change keeps an app busy
+    'ACTIVITY_HOURS': 6,
+    # Minutes after a running experiment duration threshold the app is synced
+    'THRESHOLD_MARGIN_MINUTES': 10
+}
+
+# Job queue shared by the worker hosts (worker.py)
+JOBS = {
+    # Seconds a claimed job stays leased without heartbeat
+    'LEASE_SECONDS': int(os.getenv('JOB_LEASE_SECONDS', 600)),
+    # Seconds between two polls of the queue when idle
+    'POLL_INTERVAL': int(os.getenv('JOB_POLL_INTERVAL', 30)),
+    'MAX_ATTEMPTS': 3,
+    # Minutes before a failed job is retried
+    'RETRY_MINUTES': 30,
+    # Due jobs locked per claim query
+    'CLAIM_BATCH': 10
+}
+
 # Retry Configuration
 RETRY = {
     'MAX_ATTEMPTS': 3,
@@ -1,22 +1,26 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
-from src.config.settings import MYSQL
+import os
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from src.config.settings import MYSQL, DATABASE_URL, DATABASE_POOL
 from sqlalchemy.orm import DeclarativeBase
-from contextlib import contextmanager, AbstractContextManager
-from typing import Callable
-from tenacity import retry, stop_after_attempt, wait_exponential
-from sqlalchemy import create_engine, orm, exc
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from sqlalchemy import orm
 import src.utils.logger as logger
-from sqlalchemy.engine.url import URL
+from sqlalchemy.engine.url import URL, make_url
 
 logger = logger.logger
 
 class Base(DeclarativeBase):
     pass
 
-def create_db_engine():
-    """Create SQLAlchemy engine from settings"""
-    connection_url = URL.create(
+def get_database_url() -> URL:
+    """Get the database URL from settings, DATABASE_URL overrides the MySQL settings"""
+    if DATABASE_URL:
+        return make_url(DATABASE_URL)
+
+    return URL.create(
         "mysql+mysqlconnector",
         username=MYSQL['USER'],
         password=MYSQL['PASSWORD'],
@@ -24,60 +28,138 @@ def create_db_engine():
         port=MYSQL['PORT'],
         database=MYSQL['DATABASE']
     )
-    
-    return Database(connection_url)
 
-def get_db_session() -> Session:
-    """Get SQLAlchemy session"""
-    engine = create_db_engine()
-    SessionLocal = sessionmaker(bind=engine.engine)
-    return SessionLocal()
+def create_db_engine():
+    """Create SQLAlchemy engine from settings"""
+    return Database(get_database_url())
+
+
+# Process-wide database registry, created lazily on first use
+_database: Optional["Database"] = None
+_database_pid: Optional[int] = None
+_database_lock = threading.Lock()
+
+
+def get_database() -> "Database":
+    """
+    Get the process-wide database, creating its engine on first use.
+
+    A forked or spawned worker process gets its own engine, connection
+    pools are never shared across processes.
+
+    Returns:
+        Database instance shared by every repository call in this process
+    """
+    global _database, _database_pid
+    pid = os.getpid()
+    if _database is None or _database_pid != pid:
+        with _database_lock:
+            if _database is None or _database_pid != pid:
+                _database = create_db_engine()
+                _database_pid = pid
+    return _database
+
+
+def dispose_database() -> None:
+    """Log the pool metrics and close every pooled connection of this process"""
+    global _database, _database_pid
+    with _database_lock:
+        if _database is not None and _database_pid == os.getpid():
+            _database.log_pool_metrics()
+            _database.dispose()
+        _database = None
+        _database_pid = None
+
 
 class Database:
     """
     Database connection manager for SQLAlchemy sessions.
-    
+
     This class manages database connections and provides a context manager
     for safe session handling, including automatic cleanup and rollback
     on exceptions.
-    
+
     Attributes:
         engine: SQLAlchemy engine instance
-        _session_factory: Scoped session factory for creating new sessions
+        _session_factory: Session factory for creating new sessions
     """
 
     def __init__(self, db_url: str, echo: bool = False) -> None:
         """
         Initialize database connection manager.
-        
+
         Args:
             db_url: Database connection URL
             echo: If True, enables SQLAlchemy's debug logging (default: False)
         """
         # Create SQLAlchemy engine with connection pool settings
+        pool_options = {}
+        if make_url(db_url).get_backend_name() != "sqlite":
+            pool_options = {
+                "pool_recycle": DATABASE_POOL['RECYCLE'],  # Recycle connections after this many seconds
+                "pool_size": DATABASE_POOL['SIZE'],  # Maximum number of persistent connections
+                "max_overflow": DATABASE_POOL['MAX_OVERFLOW'],  # Extra connections allowed over pool_size
+            }
         self.engine = create_engine(
             db_url,
             echo=echo,
             pool_pre_ping=True,  # Enable connection health checks
-            pool_recycle=3600,   # Recycle connections after 1 hour
-            pool_size=5,         # Maximum number of connections
-            max_overflow=10      # Allow up to 10 connections over pool_size
+            **pool_options
         )
-        
-        # Create thread-safe session factory
-        self._session_factory = orm.scoped_session(
-            orm.sessionmaker(
-                autocommit=False,
-                autoflush=False,
-                bind=self.engine,
-            ),
+        self._metrics = {"connects": 0, "checkouts": 0, "checkins": 0, "max_overflow_reached": 0}
+        event.listen(self.engine, "connect", self._on_connect)
+        event.listen(self.engine, "checkout", self._on_checkout)
+        event.listen(self.engine, "checkin", self._on_checkin)
+
+        # Session factory, objects stay usable after the session is closed
+        self._session_factory = orm.sessionmaker(
+            autocommit=False,
+            autoflush=False,
+            expire_on_commit=False,
+            bind=self.engine,
         )
 
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self._metrics["connects"] += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self._metrics["checkouts"] += 1
+        overflow = getattr(self.engine.pool, "overflow", None)
+        if callable(overflow):
+            self._metrics["max_overflow_reached"] = max(self._metrics["max_overflow_reached"], overflow())
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        self._metrics["checkins"] += 1
+
+    def pool_metrics(self) -> Dict[str, int]:
+        """
+        Get connection pool metrics
+
+        Returns:
+            Dictionary with the lifetime connect/checkout/checkin counters,
+            the highest overflow reached and the current pool state
+        """
+        metrics = dict(self._metrics)
+        pool = self.engine.pool
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            value = getattr(pool, name, None)
+            if callable(value):
+                metrics[name] = value()
+        return metrics
+
+    def log_pool_metrics(self) -> None:
+        metrics = self.pool_metrics()
+        logger.info(" ".join(f"db_pool_{k}={v}" for k, v in metrics.items()))
+
+    def dispose(self) -> None:
+        """Close all the pooled connections"""
+        self.engine.dispose()
+
     @contextmanager
-    def session(self):
+    def session(self) -> Iterator[Session]:
         """
         Provide a transactional scope around a series of operations.
-        
+
         Yields:
             Session: SQLAlchemy session object
         """
@@ -89,4 +171,4 @@ class Database:
             session.rollback()
             raise
         finally:
-            session.close()
\ No newline at end of file
+            session.close()
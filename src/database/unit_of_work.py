@@ -0,0 +1,135 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy.orm import Session
+import src.utils.logger as logger
+
+logger = logger.logger
+
+# Key of the active unit of work in Session.info
+UNIT_OF_WORK_KEY = "unit_of_work"
+
+
+class UnitOfWork:
+    """
+    Batch the database writes of an app cycle in one transaction.
+
+    While a unit of work is active on a session, repository writes are only
+    flushed (see commit_changes) and the transaction is committed at the
+    checkpoints: after every Play Console action, so an action is never left
+    unrecorded, and when the unit of work ends, even on error.
+
+    Usage:
+        with UnitOfWork(session, app.package_id):
+            ...
+            gpc.stop_experiment(experiment_id)
+            experiment.status = ExperimentStatus.FINISHED
+            checkpoint(session, "stopped")
+    """
+
+    def __init__(self, session: Session, name: str = "") -> None:
+        """
+        Initialize the unit of work.
+
+        Args:
+            session: Database session whose writes are batched
+            name: Name used in the logs, eg: the app package
+        """
+        self.session = session
+        self.name = name
+        self.checkpoints = 0
+
+    def __enter__(self) -> "UnitOfWork":
+        if self.session.info.get(UNIT_OF_WORK_KEY) is not None:
+            raise RuntimeError("A unit of work is already active on this session")
+        self.session.info[UNIT_OF_WORK_KEY] = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # Commit even on error, the pending changes reflect the console state
+        try:
+            self.checkpoint("end" if exc_type is None else f"end on {exc_type.__name__}")
+        finally:
+            self.session.info.pop(UNIT_OF_WORK_KEY, None)
+            logger.info(f"Unit of work {self.name} committed checkpoints={self.checkpoints}")
+
+    def checkpoint(self, reason: str) -> None:
+        """
+        Commit the pending changes
+
+        Args:
+            reason: What the checkpoint records, for the logs
+        """
+        try:
+            self.session.commit()
+            self.checkpoints += 1
+        except Exception as e:
+            logger.error(f"Unit of work {self.name} checkpoint {reason} failed: {e}")
+            self.session.rollback()
+
+
+def get_unit_of_work(session: Session) -> Optional[UnitOfWork]:
+    """Get the unit of work active on a session, if any"""
+    return session.info.get(UNIT_OF_WORK_KEY)
+
+
+def commit_changes(session: Session) -> None:
+    """
+    Commit the session changes, or only flush them inside a unit of work
+
+    Repositories call this instead of session.commit(), the flush still
+    surfaces database errors where the change is made.
+
+    Args:
+        session: Database session
+    """
+    if get_unit_of_work(session) is None:
+        session.commit()
+    else:
+        session.flush()
+
+
+@contextmanager
+def savepoint(session: Session) -> Iterator[None]:
+    """
+    Scope of a repository write, undone alone when it fails
+
+    Inside a unit of work the write runs in a savepoint: a failure only rolls
+    the savepoint back, the earlier writes of the cycle are kept for the next
+    checkpoint. Outside of one the session is rolled back, the write is
+    committed on its own there.
+
+    Usage:
+        try:
+            with savepoint(session):
+                experiment.status = ExperimentStatus.ERROR
+                commit_changes(session)
+        except Exception as e:
+            logger.error(f"Error marking experiment as error: {e}")
+
+    Args:
+        session: Database session
+    """
+    if get_unit_of_work(session) is not None:
+        with session.begin_nested():
+            yield
+        return
+    try:
+        yield
+    except Exception:
+        session.rollback()
+        raise
+
+
+def checkpoint(session: Session, reason: str) -> None:
+    """
+    Commit the session changes right away, used after a Play Console action
+
+    Args:
+        session: Database session
+        reason: What the checkpoint records, for the logs
+    """
+    unit_of_work = get_unit_of_work(session)
+    if unit_of_work is None:
+        session.commit()
+    else:
+        unit_of_work.checkpoint(reason)
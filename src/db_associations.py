@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, Table, UniqueConstraint
+from sqlalchemy import Column, ForeignKey, Index, Integer, Table, UniqueConstraint
 
 from src.database.connection import Base
 
@@ -9,7 +9,8 @@ csl_locale = Table(
     Base.metadata,
     Column('csl_id', Integer, ForeignKey('csls.id'), nullable=False),
     Column('locale_id', Integer, ForeignKey('locales.id'), nullable=False),
-    UniqueConstraint("locale_id", "csl_id", name="uq_csl_locale")
+    UniqueConstraint("locale_id", "csl_id", name="uq_csl_locale"),
+    Index("ix_csl_locale_csl_id", "csl_id", "locale_id"),
 )
 
 users_organizations_association = Table(
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from src.config.settings import CADENCE
+from src.modules.experiment.models import ExperimentModel
+from src.modules.experiment.schemas import ScrapedExperiment
+import src.utils.logger as logger
+
+logger = logger.logger
+
+
+def get_threshold_delays(
+    running: List[ScrapedExperiment],
+    experiments_by_play_id: Dict[int, ExperimentModel],
+    now: Optional[datetime] = None
+) -> List[timedelta]:
+    """
+    Get the time left before each running experiment reaches its min_duration_days
+    and max_duration_days, when it can be stopped or applied
+
+    Args:
+        running: Running experiments scraped from the Play Console
+        experiments_by_play_id: Their experiments with settings, see get_experiments_by_play_ids
+        now: Current local time, the scraped start times are local, defaults to now
+
+    Returns:
+        The delays of the thresholds not reached yet
+    """
+    now = now or datetime.now()
+    delays = []
+    for running_experiment in running:
+        experiment = experiments_by_play_id.get(running_experiment.play_experiment_id)
+        if experiment is None or experiment.settings is None or running_experiment.start_time is None:
+            continue
+        for days in (experiment.settings.min_duration_days, experiment.settings.max_duration_days):
+            delay = running_experiment.start_time + timedelta(days=days) - now
+            if delay > timedelta(0):
+                delays.append(delay)
+    return delays
+
+
+def compute_next_sync(
+    running: bool,
+    threshold_delays: Iterable[timedelta] = (),
+    can_create: bool = False,
+    active: bool = False,
+    now: Optional[datetime] = None
+) -> datetime:
+    """
+    Compute when an app should be synced next from its experiments state
+
+    Busy apps, with an experiment ready to create in a free slot or recent
+    console activity, are synced after BUSY_HOURS, apps with running
+    experiments after RUNNING_HOURS and idle apps after IDLE_HOURS. The sync
+    is brought forward to just after the next duration threshold of a running
+    experiment, and always kept between BUSY_HOURS and IDLE_HOURS.
+
+    Args:
+        running: Whether the app has running experiments
+        threshold_delays: Time left before the duration thresholds, see get_threshold_delays
+        can_create: Whether a READY experiment fits a free slot
+        active: Whether the app had console activity recently, eg: actions or publishing changes
+        now: Current time, defaults to now
+
+    Returns:
+        next_sync in UTC
+    """
+    now = now or datetime.now(timezone.utc)
+    if can_create or active:
+        delay = timedelta(hours=CADENCE['BUSY_HOURS'])
+    elif running:
+        delay = timedelta(hours=CADENCE['RUNNING_HOURS'])
+    else:
+        delay = timedelta(hours=CADENCE['IDLE_HOURS'])
+
+    threshold_delays = list(threshold_delays)
+    if threshold_delays:
+        delay = min(delay, min(threshold_delays) + timedelta(minutes=CADENCE['THRESHOLD_MARGIN_MINUTES']))
+
+    delay = min(max(delay, timedelta(hours=CADENCE['BUSY_HOURS'])), timedelta(hours=CADENCE['IDLE_HOURS']))
+    return now + delay
@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import Integer, String, BigInteger, ForeignKey, Enum, Boolean
+from sqlalchemy import Integer, String, BigInteger, ForeignKey, Enum, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.database.connection import Base
 from typing import Optional, List
@@ -10,6 +10,11 @@ from src.modules.app.schemas import AppStatus
 
 class AppModel(Base):
     __tablename__ = "apps"
+    __table_args__ = (
+        Index("ix_apps_publisher_status", "publisher_id", "status"),
+        Index("ix_apps_package_id", "package_id"),
+        Index("ix_apps_status_next_sync", "status", "next_sync"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     publisher_id: Mapped[int] = mapped_column(ForeignKey("publishers.id"))
@@ -29,6 +34,15 @@ class AppModel(Base):
     sync_csls_now: Mapped[bool] = mapped_column(Boolean, default=False)
     last_sync: Mapped[Optional[datetime]] = mapped_column(nullable=True)
     next_sync: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    csls_synced_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    # Experiments overview fingerprint of the last full automation run, see main.py
+    overview_fingerprint: Mapped[Optional[str]] = mapped_column(String(40), nullable=True)
+    overview_fingerprint_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    # Next duration threshold of a running experiment at that run, the app is not skipped past it
+    overview_threshold_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    # Time budget the last run of the app ran out of, cleared once a run completes
+    timed_out_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    timed_out_stage: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)
     slack_hook_url: Mapped[str] = mapped_column(String(255), nullable=True)
     publisher = relationship("PublisherModel", back_populates="apps")
     csls: Mapped[List["CSLModel"]] = relationship(back_populates="app", cascade="all, delete-orphan")
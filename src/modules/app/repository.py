@@ -1,9 +1,14 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+from sqlalchemy import or_, select, update
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session, joinedload
 from src.modules.app.models import AppModel, AppStatus
 from src.modules.csl.models import CSLModel
+from src.modules.publisher.models import PublisherModel
+from src.modules.publisher.schemas import PublisherStatus
+from src.modules.csl.schemas import split_locale_code
+from src.database.unit_of_work import commit_changes, savepoint
 import src.utils.logger as logger
-from src.database.connection import get_db_session
 from datetime import datetime, timezone, timedelta
 logger = logger.logger
 
@@ -23,7 +28,7 @@ def get_publisher_apps(publisher_id: int, session: Session) -> List[AppModel]:
                .filter(AppModel.publisher_id == publisher_id)
                .filter(AppModel.status == AppStatus.ACTIVE)
                .options(
-                   joinedload(AppModel.csls).joinedload(CSLModel.locales)
+                   joinedload(AppModel.csls).selectinload(CSLModel.locales)
                )
                .all())
         
@@ -44,26 +49,167 @@ def get_app_csls(app: AppModel) -> Dict[str, List[str]]:
     """
     try:
         return {
-            csl.name: [locale.name.split(" \u2013 ")[1] for locale in csl.locales] 
+            csl.name: [split_locale_code(locale.name) for locale in csl.locales] 
             for csl in app.csls
         }
     except Exception as e:
         logger.error(f"Error getting CSLs for app {app.package_id}: {e}")
         return {}
 
-def update_app_sync_status(app: AppModel, session: Session) -> None:
+def update_app_sync_status(app_id: int, session: Session, next_sync: Optional[datetime] = None) -> None:
     """
     Update app sync status after processing
     
     Args:
-        app: AppModel instance to update
+        app_id: ID of the processed app
         session: Database session
+        next_sync: When the app is synced next, see compute_next_sync, in 3 hours by default
     """
     try:
-        app.last_sync = datetime.now(timezone.utc)
-        app.next_sync = app.last_sync + timedelta(hours=3)
-        app.sync_now = False
-        session.commit()
+        with savepoint(session):
+            now = datetime.now(timezone.utc)
+            session.execute(
+                update(AppModel)
+                .where(AppModel.id == app_id)
+                .values(
+                    last_sync=now,
+                    next_sync=next_sync or now + timedelta(hours=3),
+                    sync_now=False,
+                    timed_out_at=None,
+                    timed_out_stage=None
+                )
+            )
+            commit_changes(session)
     except Exception as e:
-        logger.error(f"Error updating sync status for app {app.package_id}: {e}")
-        session.rollback() 
\ No newline at end of file
+        logger.error(f"Error updating sync status for app {app_id}: {e}")
+
+def mark_app_timed_out(app_id: int, session: Session, stage: str) -> None:
+    """
+    Record that the processing of an app ran out of its time budget
+
+    The sync status is left as is, the app stays due and is retried.
+
+    Args:
+        app_id: ID of the app
+        session: Database session
+        stage: Name of the time budget exceeded, eg: "RUNNING_EXPERIMENTS"
+    """
+    try:
+        with savepoint(session):
+            session.execute(
+                update(AppModel)
+                .where(AppModel.id == app_id)
+                .values(timed_out_at=datetime.now(timezone.utc), timed_out_stage=stage)
+            )
+            commit_changes(session)
+    except Exception as e:
+        logger.error(f"Error marking app {app_id} as timed out: {e}")
+
+def get_app_overview_fingerprint(
+    app_id: int, session: Session
+) -> Tuple[Optional[str], Optional[datetime], Optional[datetime]]:
+    """
+    Get the experiments overview fingerprint stored by the last full automation run of an app
+
+    Args:
+        app_id: App ID
+        session: Database session
+
+    Returns:
+        The fingerprint, when it was stored and the next duration threshold of
+        a running experiment at that run, (None, None, None) if there is none
+    """
+    try:
+        row = session.execute(
+            select(AppModel.overview_fingerprint, AppModel.overview_fingerprint_at, AppModel.overview_threshold_at)
+            .where(AppModel.id == app_id)
+        ).one_or_none()
+        return tuple(row) if row else (None, None, None)
+    except Exception as e:
+        logger.error(f"Error getting overview fingerprint for app {app_id}: {e}")
+        return None, None, None
+
+def update_app_overview_fingerprint(
+    app_id: int, fingerprint: Optional[str], session: Session, threshold_at: Optional[datetime] = None
+) -> None:
+    """
+    Store the experiments overview fingerprint of a full automation run
+
+    Args:
+        app_id: App ID
+        fingerprint: Overview fingerprint, None to run the app in full next time
+        session: Database session
+        threshold_at: When the next duration threshold of a running experiment
+            is reached, in UTC, the app is run in full from then on
+    """
+    try:
+        with savepoint(session):
+            session.execute(
+                update(AppModel)
+                .where(AppModel.id == app_id)
+                .values(
+                    overview_fingerprint=fingerprint,
+                    overview_fingerprint_at=datetime.now(timezone.utc) if fingerprint else None,
+                    overview_threshold_at=threshold_at if fingerprint else None
+                )
+            )
+            commit_changes(session)
+    except Exception as e:
+        logger.error(f"Error updating overview fingerprint for app {app_id}: {e}")
+
+def update_apps_csls_sync_status(app_ids: List[int], session: Session) -> None:
+    """
+    Update the sync status of apps after fetching their CSLs
+
+    next_sync is left to the experiments automation, it schedules the app runs,
+    csls_synced_at tells when the CSLs are due again, see is_csls_sync_due.
+    
+    Args:
+        app_ids: IDs of the apps whose CSLs were fetched
+        session: Database session
+    """
+    if not app_ids:
+        return
+
+    try:
+        with savepoint(session):
+            session.execute(
+                update(AppModel)
+                .where(AppModel.id.in_(app_ids))
+                .values(csls_synced_at=datetime.now(timezone.utc), sync_csls_now=False)
+            )
+            commit_changes(session)
+    except Exception as e:
+        logger.error(f"Error updating CSLs sync status for apps {app_ids}: {e}")
+
+def get_due_apps(session: Session, until: datetime) -> List[Row]:
+    """
+    Get the active apps due for a sync, or flagged for one
+
+    Args:
+        session: Database session
+        until: Apps whose next_sync is before this date are due
+
+    Returns:
+        Rows of (id, next_sync, sync_now, sync_csls_now), apps never synced have no next_sync
+    """
+    try:
+        return session.execute(
+            select(AppModel.id, AppModel.next_sync, AppModel.sync_now, AppModel.sync_csls_now)
+            .join(PublisherModel, PublisherModel.id == AppModel.publisher_id)
+            .where(
+                AppModel.status == AppStatus.ACTIVE,
+                PublisherModel.status == PublisherStatus.ACTIVE,
+                or_(
+                    AppModel.next_sync.is_(None),
+                    AppModel.next_sync <= until,
+                    AppModel.sync_now.is_(True),
+                    AppModel.sync_csls_now.is_(True),
+                )
+            )
+            .order_by(AppModel.next_sync)
+        ).all()
+    except Exception as e:
+        logger.error(f"Error getting due apps: {e}")
+        session.rollback()
+        return []
@@ -0,0 +1,210 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from threading import Lock
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from src.modules.app.models import AppModel
+from src.modules.app.schemas import AppStatus
+from src.modules.csl.models import CSLModel, LocaleModel
+from src.modules.csl.schemas import split_locale_code
+from src.modules.publisher.models import PublisherModel
+from src.modules.publisher.schemas import PublisherStatus
+from src.db_associations import csl_locale
+import src.utils.logger as logger
+
+logger = logger.logger
+
+@dataclass(frozen=True, slots=True)
+class CSLSnapshot:
+    id: int
+    play_console_id: str
+    name: str
+    locales: Tuple[str, ...]
+    fingerprint: Optional[str]
+    locales_fetched_at: Optional[datetime]
+
+
+@dataclass(frozen=True, slots=True)
+class AppSnapshot:
+    id: int
+    publisher_id: int
+    name: str
+    abbreviation: str
+    package_id: str
+    play_console_id: str
+    status: AppStatus
+    automated_send_for_review: bool
+    automated_publishing: bool
+    reporting: bool
+    automated_testing: bool
+    sync_now: bool
+    sync_csls_now: bool
+    csls_synced_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    slack_hook_url: Optional[str]
+    csls: Tuple[CSLSnapshot, ...]
+    # CSL name -> locale codes, as expected by the Play Console driver
+    csl_locales: Mapping[str, Tuple[str, ...]] = field(compare=False)
+
+
+@dataclass(frozen=True, slots=True)
+class PublisherSnapshot:
+    id: int
+    organization_id: int
+    name: str
+    play_console_id: int
+    status: PublisherStatus
+    apps: Tuple[AppSnapshot, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class GraphSnapshot:
+    """Immutable publisher -> app -> CSL -> locale graph"""
+    publishers: Tuple[PublisherSnapshot, ...]
+    fingerprint: Tuple = field(compare=False, repr=False)
+
+    def active_publishers(self) -> List[PublisherSnapshot]:
+        return [p for p in self.publishers if p.status == PublisherStatus.ACTIVE]
+
+    def get_publisher(self, publisher_id: int) -> Optional[PublisherSnapshot]:
+        return next((p for p in self.publishers if p.id == publisher_id), None)
+
+    def get_app(self, app_id: int) -> Optional[AppSnapshot]:
+        return next((a for p in self.publishers for a in p.apps if a.id == app_id), None)
+
+
+_snapshot: Optional[GraphSnapshot] = None
+_snapshot_lock = Lock()
+
+
+def get_graph_snapshot(session: Session) -> GraphSnapshot:
+    """
+    Get the publisher/app/CSL/locale graph, rebuilt only when it changed
+
+    The cached graph is checked against a fingerprint: the app and publisher
+    columns held by the snapshot and the CSL and locale tables. That costs three small queries instead of reloading the
+    graph. The columns are compared themselves because they are edited
+    without bumping updated_at, eg: automated_publishing turned off from the
+    admin.
+
+    Args:
+        session: Database session
+
+    Returns:
+        GraphSnapshot shared by every caller of this process
+    """
+    global _snapshot
+    fingerprint = _get_fingerprint(session)
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.fingerprint != fingerprint:
+            _snapshot = _build_snapshot(session, fingerprint)
+            logger.info(
+                f"Graph snapshot built with {len(_snapshot.publishers)} publishers and "
+                f"{sum(len(p.apps) for p in _snapshot.publishers)} apps"
+            )
+        return _snapshot
+
+
+# App columns held by the snapshot, compared by the fingerprint. The sync
+# dates change every run and are left out, read them from the apps table
+_FINGERPRINT_APP_COLUMNS = (
+    AppModel.id, AppModel.publisher_id, AppModel.name, AppModel.abbreviation, AppModel.package_id,
+    AppModel.play_console_id, AppModel.status, AppModel.automated_send_for_review, AppModel.automated_publishing,
+    AppModel.reporting, AppModel.automated_testing, AppModel.sync_now, AppModel.sync_csls_now,
+    AppModel.csls_synced_at, AppModel.updated_at, AppModel.slack_hook_url,
+)
+
+
+def _get_fingerprint(session: Session) -> Tuple:
+    apps = session.execute(select(*_FINGERPRINT_APP_COLUMNS).order_by(AppModel.id)).tuples().all()
+    publishers = session.execute(
+        select(
+            PublisherModel.id, PublisherModel.organization_id, PublisherModel.name,
+            PublisherModel.play_console_id, PublisherModel.status, PublisherModel.updated_at,
+        ).order_by(PublisherModel.id)
+    ).tuples().all()
+    tables = session.execute(
+        select(
+            select(func.count()).select_from(CSLModel).scalar_subquery(),
+            select(func.max(CSLModel.updated_at)).scalar_subquery(),
+            select(func.count()).select_from(LocaleModel).scalar_subquery(),
+            select(func.count()).select_from(csl_locale).scalar_subquery(),
+        )
+    ).one()
+    return tuple(apps), tuple(publishers), tuple(tables)
+
+
+def _build_snapshot(session: Session, fingerprint: Tuple) -> GraphSnapshot:
+    """Load the graph with one query per table"""
+    locale_names = dict(session.execute(select(LocaleModel.id, LocaleModel.name)).tuples().all())
+
+    locales_by_csl: Dict[int, List[str]] = {}
+    for csl_id, locale_id in session.execute(
+        select(csl_locale.c.csl_id, csl_locale.c.locale_id).order_by(csl_locale.c.csl_id, csl_locale.c.locale_id)
+    ).tuples():
+        locales_by_csl.setdefault(csl_id, []).append(locale_names[locale_id])
+
+    csls_by_app: Dict[int, List[CSLSnapshot]] = {}
+    for row in session.execute(
+        select(
+            CSLModel.id, CSLModel.app_id, CSLModel.play_console_id, CSLModel.name,
+            CSLModel.fingerprint, CSLModel.locales_fetched_at
+        ).order_by(CSLModel.id)
+    ):
+        csls_by_app.setdefault(row.app_id, []).append(CSLSnapshot(
+            id=row.id,
+            play_console_id=row.play_console_id,
+            name=row.name,
+            locales=tuple(locales_by_csl.get(row.id, ())),
+            fingerprint=row.fingerprint,
+            locales_fetched_at=row.locales_fetched_at,
+        ))
+
+    apps_by_publisher: Dict[int, List[AppSnapshot]] = {}
+    for app in session.execute(select(AppModel.__table__).order_by(AppModel.id)):
+        csls = tuple(csls_by_app.get(app.id, ()))
+        apps_by_publisher.setdefault(app.publisher_id, []).append(AppSnapshot(
+            id=app.id,
+            publisher_id=app.publisher_id,
+            name=app.name,
+            abbreviation=app.abbreviation,
+            package_id=app.package_id,
+            play_console_id=app.play_console_id,
+            status=app.status,
+            automated_send_for_review=app.automated_send_for_review,
+            automated_publishing=app.automated_publishing,
+            reporting=app.reporting,
+            automated_testing=app.automated_testing,
+            sync_now=app.sync_now,
+            sync_csls_now=app.sync_csls_now,
+            csls_synced_at=app.csls_synced_at,
+            updated_at=app.updated_at,
+            slack_hook_url=app.slack_hook_url,
+            csls=csls,
+            csl_locales=MappingProxyType({
+                csl.name: tuple(split_locale_code(name) for name in csl.locales) for csl in csls
+            }),
+        ))
+
+    publishers = tuple(
+        PublisherSnapshot(
+            id=row.id,
+            organization_id=row.organization_id,
+            name=row.name,
+            play_console_id=row.play_console_id,
+            status=row.status,
+            apps=tuple(apps_by_publisher.get(row.id, ())),
+        )
+        for row in session.execute(
+            select(
+                PublisherModel.id,
+                PublisherModel.organization_id,
+                PublisherModel.name,
+                PublisherModel.play_console_id,
+                PublisherModel.status,
+            ).order_by(PublisherModel.id)
+        )
+    )
+    return GraphSnapshot(publishers=publishers, fingerprint=fingerprint)
@@ -12,11 +12,17 @@ from src.modules.csl.schemas import CSLLocaleStatus
 
 class CSLModel(Base):
     __tablename__ = "csls"
+    __table_args__ = (
+        UniqueConstraint("app_id", "play_console_id", name="uq_csls_app_play_console_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     app_id: Mapped[int] = mapped_column(ForeignKey("apps.id"))
     name: Mapped[str] = mapped_column(String(255))
     play_console_id: Mapped[str] = mapped_column(String(255))
+    # Fingerprint of the CSL overview row the locales were fetched for
+    fingerprint: Mapped[Optional[str]] = mapped_column(String(40), nullable=True)
+    locales_fetched_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
     updated_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
 
@@ -25,6 +31,9 @@ class CSLModel(Base):
 
 class LocaleModel(Base):
     __tablename__ = "locales"
+    __table_args__ = (
+        UniqueConstraint("name", name="uq_locales_name"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(50))
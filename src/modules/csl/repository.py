@@ -1,10 +1,94 @@
-from typing import Optional, List, Dict
+from datetime import datetime, timezone
+from typing import Any, Optional, List, Dict, Set
+from sqlalchemy import insert, select, update
 from sqlalchemy.orm import Session
 from src.modules.csl.models import CSLModel, LocaleModel
+from src.modules.csl.schemas import split_locale_code
+from src.db_associations import csl_locale
+from src.database.unit_of_work import commit_changes, savepoint
 import src.utils.logger as logger
 
 logger = logger.logger
 
+# Key of the name resolver in Session.info
+NAME_RESOLVER_KEY = "name_resolver"
+
+
+class NameResolver:
+    """
+    In-memory CSL and locale names, loaded in bulk per app
+
+    Lookups of IDs not loaded yet fall back to a single primary key query
+    and are remembered, missing IDs included.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        self.csl_names: Dict[int, Optional[str]] = {}
+        self.locale_names: Dict[int, Optional[str]] = {}
+        self.locale_codes: Dict[int, Optional[str]] = {}
+        self.loaded_apps: Set[int] = set()
+
+    def load_app(self, app_id: int) -> None:
+        """
+        Load the names of all the CSLs of an app and of their locales
+
+        Args:
+            app_id: App ID
+        """
+        if app_id in self.loaded_apps:
+            return
+        for csl_id, name in self.session.execute(
+            select(CSLModel.id, CSLModel.name).where(CSLModel.app_id == app_id)
+        ).tuples():
+            self.csl_names[csl_id] = name
+        for locale_id, name in self.session.execute(
+            select(LocaleModel.id, LocaleModel.name)
+            .join(csl_locale, csl_locale.c.locale_id == LocaleModel.id)
+            .join(CSLModel, CSLModel.id == csl_locale.c.csl_id)
+            .where(CSLModel.app_id == app_id)
+            .distinct()
+        ).tuples():
+            self._set_locale(locale_id, name)
+        self.loaded_apps.add(app_id)
+
+    def csl_name(self, csl_id: int) -> Optional[str]:
+        csl_id = int(csl_id)
+        if csl_id not in self.csl_names:
+            self.csl_names[csl_id] = self.session.scalar(select(CSLModel.name).where(CSLModel.id == csl_id))
+        return self.csl_names[csl_id]
+
+    def locale_name(self, locale_id: int) -> Optional[str]:
+        locale_id = int(locale_id)
+        if locale_id not in self.locale_names:
+            self._set_locale(
+                locale_id,
+                self.session.scalar(select(LocaleModel.name).where(LocaleModel.id == locale_id))
+            )
+        return self.locale_names[locale_id]
+
+    def locale_code(self, locale_id: int) -> Optional[str]:
+        self.locale_name(locale_id)
+        return self.locale_codes[int(locale_id)]
+
+    def _set_locale(self, locale_id: int, name: Optional[str]) -> None:
+        self.locale_names[locale_id] = name
+        self.locale_codes[locale_id] = split_locale_code(name) if name is not None else None
+
+
+def get_name_resolver(session: Session) -> NameResolver:
+    """Get the name resolver of a session, created on first use"""
+    resolver = session.info.get(NAME_RESOLVER_KEY)
+    if resolver is None:
+        resolver = session.info[NAME_RESOLVER_KEY] = NameResolver(session)
+    return resolver
+
+
+def invalidate_name_resolver(session: Session) -> None:
+    """Drop the names resolved with a session, eg: after CSLs or locales changes"""
+    session.info.pop(NAME_RESOLVER_KEY, None)
+
+
 def get_csl_name(csl_id: int, session: Session) -> Optional[str]:
     """
     Get CSL name by ID
@@ -17,125 +101,234 @@ def get_csl_name(csl_id: int, session: Session) -> Optional[str]:
         CSL name if found, None otherwise
     """
     try:
-        csl = session.query(CSLModel).filter(CSLModel.id == csl_id).first()
-        if csl is None:
+        name = get_name_resolver(session).csl_name(csl_id)
+        if name is None:
             logger.error(f"CSL with ID {csl_id} not found")
-            return None
-        return csl.name
+        return name
     except Exception as e:
         logger.error(f"Error getting CSL name for ID {csl_id}: {e}")
         return None
 
 
-def get_locale_name(locale_id: int, session: Session) -> Optional[str]  :
+def get_locale_name(locale_id: int, session: Session) -> Optional[str]:
+    """
+    Get locale name by ID, eg: "German – de-DE"
+
+    Args:
+        locale_id: Locale ID
+        session: Database session
+
+    Returns:
+        Locale name if found, None otherwise
+    """
     try:
-        locale = session.query(LocaleModel).filter(LocaleModel.id == locale_id).first()
-        if locale is None:
+        name = get_name_resolver(session).locale_name(locale_id)
+        if name is None:
             logger.error(f"Locale with ID {locale_id} not found")
-            return None
-        return locale.name
+        return name
     except Exception as e:
         logger.error(f"Error getting Locale name for ID {locale_id}: {e}")
         return None
 
-def add_csls(session: Session, csls_data: List[Dict]) -> None:
+
+def get_locale_code(locale_id: int, session: Session) -> Optional[str]:
+    """
+    Get locale code by ID, eg: "de-DE"
+
+    Args:
+        locale_id: Locale ID
+        session: Database session
+
+    Returns:
+        Locale code if found, None otherwise
+    """
+    try:
+        code = get_name_resolver(session).locale_code(locale_id)
+        if code is None:
+            logger.error(f"Locale with ID {locale_id} not found")
+        return code
+    except Exception as e:
+        logger.error(f"Error getting Locale code for ID {locale_id}: {e}")
+        return None
+
+def add_csls(session: Session, csls_data: List[Dict]) -> Dict[str, Any]:
     """
     Add CSLs and locales to database, preserving existing CSLs and their IDs
-    
+
+    Locales, CSLs and CSL/locale links are read and written with set based
+    statements, so the number of round trips does not grow with the number
+    of CSLs or locales. Everything is committed in one transaction.
+
     Args:
         session: Database session
         csls_data: List of CSL data dictionaries
+
+    Returns:
+        Diff summary with the added, updated, unchanged and removed CSL play
+        console IDs and the number of added, unchanged and removed locale links.
+        Removed CSLs and links are reported but kept, experiments reference them.
     """
+    summary = {
+        "added": [],
+        "updated": [],
+        "unchanged": [],
+        "removed": [],
+        "locales_added": 0,
+        "locales_unchanged": 0,
+        "locales_removed": 0,
+    }
     try:
-        # Group CSLs by app and play_console_id
-        csls_by_app = {}
-        for csl_data in csls_data:
-            app = csl_data["app"]
-            app_id = app.id  # Get the app's ID instead of using the app object
-            
-            if app_id not in csls_by_app:
-                csls_by_app[app_id] = {}
-            
-            csl_id = csl_data["csl_play_console_id"]
-            if csl_id not in csls_by_app[app_id]:
-                csls_by_app[app_id][csl_id] = []
-            
-            csls_by_app[app_id][csl_id].append(csl_data)
-
-        # Process each app's CSLs
-        for app_id, app_csls in csls_by_app.items():
-            # Get all existing CSLs for this app in one query with composite key
-            existing_csls = {}
-            for csl in (session.query(CSLModel)
-                       .filter(CSLModel.app_id == app_id)
-                       .all()):
-                key = f"{app_id}_{csl.play_console_id}"
-                existing_csls[key] = csl
-
-            for csl_id, csl_entries in app_csls.items():
-                # Use composite key to find existing CSL
-                composite_key = f"{app_id}_{csl_id}"
-                
-                if composite_key in existing_csls:
-                    # CSL exists, only check for new locales
-                    existing_csl = existing_csls[composite_key]
-                    
-                    # Get existing locale associations
-                    existing_locale_names = {
-                        locale.name for locale in existing_csl.locales
+        with savepoint(session):
+            # Group CSLs by app and play_console_id, keeping the locales order
+            csls_by_app = {}
+            for csl_data in csls_data:
+                app_csls = csls_by_app.setdefault(csl_data["app"].id, {})
+                csl = app_csls.setdefault(
+                    csl_data["csl_play_console_id"],
+                    {
+                        "name": csl_data["name"],
+                        "fingerprint": csl_data.get("fingerprint"),
+                        "locales_fetched_at": csl_data.get("locales_fetched_at"),
+                        "locales": {},
+                    }
+                )
+                csl["locales"][csl_data["locale"]] = None
+
+            if not csls_by_app:
+                return summary
+
+            now = datetime.now(timezone.utc)
+            locale_ids = _get_or_create_locales(
+                session,
+                {name for app_csls in csls_by_app.values() for csl in app_csls.values() for name in csl["locales"]}
+            )
+
+            # Get all existing CSLs for these apps in one query
+            existing_csls = {
+                (row.app_id, row.play_console_id): row
+                for row in session.execute(
+                    select(
+                        CSLModel.id, CSLModel.app_id, CSLModel.play_console_id, CSLModel.name,
+                        CSLModel.fingerprint, CSLModel.locales_fetched_at
+                    )
+                    .where(CSLModel.app_id.in_(csls_by_app.keys()))
+                )
+            }
+
+            new_csls = []
+            changed_csls = []
+            for app_id, app_csls in csls_by_app.items():
+                for play_console_id, csl in app_csls.items():
+                    existing = existing_csls.get((app_id, play_console_id))
+                    values = {
+                        "name": csl["name"],
+                        "fingerprint": csl["fingerprint"],
+                        "locales_fetched_at": csl["locales_fetched_at"],
                     }
-                    
-                    # Add only new locales and associations
-                    for entry in csl_entries:
-                        locale_name = entry["locale"]
-                        if locale_name not in existing_locale_names:
-                            # Check if locale exists in database
-                            locale = (session.query(LocaleModel)
-                                    .filter(LocaleModel.name == locale_name)
-                                    .first())
-                            
-                            if not locale:
-                                # Create new locale if it doesn't exist
-                                locale = LocaleModel(name=locale_name)
-                                session.add(locale)
-                                session.flush()
-                            
-                            # Add association
-                            existing_csl.locales.append(locale)
-                            logger.info(f"Added new locale {locale_name} to existing CSL {csl_id} (ID: {existing_csl.id})")
-                else:
-                    # Create new CSL
-                    new_csl = CSLModel(
-                        app_id=app_id,
-                        play_console_id=csl_id,
-                        name=csl_entries[0]["name"]
+                    if existing is None:
+                        new_csls.append({"app_id": app_id, "play_console_id": play_console_id, **values})
+                    elif any(getattr(existing, key) != value for key, value in values.items()):
+                        changed_csls.append({"id": existing.id, "updated_at": now, **values})
+
+            if new_csls:
+                session.execute(insert(CSLModel), new_csls)
+            if changed_csls:
+                session.execute(update(CSLModel), changed_csls)
+
+            csl_ids = existing_csls
+            if new_csls:
+                csl_ids = {
+                    (row.app_id, row.play_console_id): row
+                    for row in session.execute(
+                        select(CSLModel.id, CSLModel.app_id, CSLModel.play_console_id, CSLModel.name)
+                        .where(CSLModel.app_id.in_(csls_by_app.keys()))
                     )
-                    session.add(new_csl)
-                    session.flush()  # Get the new CSL ID
-
-                    # Add locales and associations for new CSL
-                    for entry in csl_entries:
-                        locale_name = entry["locale"]
-                        
-                        # Check if locale exists
-                        locale = (session.query(LocaleModel)
-                                .filter(LocaleModel.name == locale_name)
-                                .first())
-                        
-                        if not locale:
-                            # Create new locale if it doesn't exist
-                            locale = LocaleModel(name=locale_name)
-                            session.add(locale)
-                            session.flush()
-                        
-                        # Add association
-                        new_csl.locales.append(locale)
-                    
-                    logger.info(f"Added new CSL {csl_id} with {len(csl_entries)} locales (ID: {new_csl.id})")
-
-        session.commit()
-        
+                }
+
+            # Get all existing CSL/locale links of these CSLs in one query
+            existing_links = {}
+            for csl_id, locale_id in session.execute(
+                select(csl_locale.c.csl_id, csl_locale.c.locale_id)
+                .where(csl_locale.c.csl_id.in_([row.id for row in csl_ids.values()]))
+            ).tuples():
+                existing_links.setdefault(csl_id, set()).add((csl_id, locale_id))
+
+            new_links = []
+            for app_id, app_csls in csls_by_app.items():
+                for play_console_id, csl in app_csls.items():
+                    csl_id = csl_ids[(app_id, play_console_id)].id
+                    scraped_links = {(csl_id, locale_ids[name]) for name in csl["locales"]}
+                    current_links = existing_links.get(csl_id, set())
+                    added_links = scraped_links - current_links
+
+                    new_links.extend({"csl_id": c, "locale_id": l} for c, l in added_links)
+                    summary["locales_added"] += len(added_links)
+                    summary["locales_unchanged"] += len(scraped_links & current_links)
+                    summary["locales_removed"] += len(current_links - scraped_links)
+
+                    if (app_id, play_console_id) not in existing_csls:
+                        summary["added"].append(play_console_id)
+                        logger.info(f"Added new CSL {play_console_id} with {len(csl['locales'])} locales (ID: {csl_id})")
+                    elif added_links or existing_csls[(app_id, play_console_id)].name != csl["name"]:
+                        summary["updated"].append(play_console_id)
+                        logger.info(f"Added {len(added_links)} new locales to existing CSL {play_console_id} (ID: {csl_id})")
+                    else:
+                        summary["unchanged"].append(play_console_id)
+
+            summary["removed"] = [
+                play_console_id for (app_id, play_console_id) in existing_csls
+                if play_console_id not in csls_by_app[app_id]
+            ]
+
+            if new_links:
+                # The unique csl/locale constraint makes the insert idempotent
+                session.execute(
+                    insert(csl_locale)
+                    .prefix_with("IGNORE", dialect="mysql")
+                    .prefix_with("OR IGNORE", dialect="sqlite"),
+                    new_links
+                )
+
+            commit_changes(session)
+            invalidate_name_resolver(session)
+            logger.info(
+                f"CSLs added={len(summary['added'])} updated={len(summary['updated'])} "
+                f"unchanged={len(summary['unchanged'])} removed={len(summary['removed'])} "
+                f"locales_added={summary['locales_added']} locales_removed={summary['locales_removed']}"
+            )
+            return summary
+
     except Exception as e:
         logger.error(f"Error adding CSLs: {e}")
-        session.rollback()
-        raise
\ No newline at end of file
+        raise
+
+
+def _get_or_create_locales(session: Session, names: Set[str]) -> Dict[str, int]:
+    """
+    Get the IDs of the given locale names, bulk inserting the missing ones
+
+    Args:
+        session: Database session
+        names: Locale names
+
+    Returns:
+        Dictionary mapping locale names to locale IDs
+    """
+    if not names:
+        return {}
+
+    query = select(LocaleModel.name, LocaleModel.id).where(LocaleModel.name.in_(names))
+    locale_ids = dict(session.execute(query).tuples().all())
+
+    missing = names - locale_ids.keys()
+    if missing:
+        # Ignore the locales inserted meanwhile by a concurrent worker process
+        session.execute(
+            insert(LocaleModel)
+            .prefix_with("IGNORE", dialect="mysql")
+            .prefix_with("OR IGNORE", dialect="sqlite"),
+            [{"name": name} for name in sorted(missing)]
+        )
+        locale_ids = dict(session.execute(query).tuples().all())
+
+    return locale_ids
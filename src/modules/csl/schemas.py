@@ -1,5 +1,19 @@
+import hashlib
 from enum import Enum
 
 class CSLLocaleStatus(Enum):
     ACTIVE = "active"
-    INACTIVE = "inactive"
\ No newline at end of file
+    INACTIVE = "inactive"
+
+# Separator between the language and the code in locale names, eg: "German – de-DE"
+LOCALE_SEPARATOR = " – "
+
+def split_locale_code(name: str) -> str:
+    """Get the locale code of a locale name, eg: "German – de-DE" -> "de-DE" """
+    return name.split(LOCALE_SEPARATOR)[1] if LOCALE_SEPARATOR in name else name
+
+
+def csl_fingerprint(name: str, play_console_id: str, row_text: str) -> str:
+    """Fingerprint of a CSL row of the custom store listings overview, changes with the CSL"""
+    text = " ".join(row_text.split())
+    return hashlib.sha1(f"{name}\n{play_console_id}\n{text}".encode("utf-8")).hexdigest()
@@ -1,66 +1,126 @@
-from sqlalchemy import select
-from src.modules.csl.models import CSLModel, LocaleModel
-from src.modules.app.models import AppModel
-from typing import List, Dict
-
-# def add_csls(session, data: List[Dict]) -> None:
-#     """
-#     Replace existing CSLs and their locales in the database for the given app
-    
-#     Args:
-#         session: SQLAlchemy session
-#         data (List[Dict]): List of dictionaries containing CSL data with format:
-#             {
-#                 "app": AppModel,
-#                 "csl_play_console_id": str,
-#                 "name": str,
-#                 "locale": str
-#             }
-#     """
-#     # Group data by CSL to avoid duplicates
-#     csls_by_id = {}
-#     for record in data:
-#         if record["csl_play_console_id"] not in csls_by_id:
-#             csls_by_id[record["csl_play_console_id"]] = {
-#                 "app": record["app"],
-#                 "name": record["name"],
-#                 "locales": set()
-#             }
-#         csls_by_id[record["csl_play_console_id"]]["locales"].add(record["locale"])
-
-#     # Get all existing CSLs for this app
-#     app = data[0]["app"] if data else None
-#     if not app:
-#         return
-
-#     # Delete existing CSLs for this app
-#     existing_csls = session.scalars(
-#         select(CSLModel).where(CSLModel.app_id == app.id)
-#     ).all()
-#     for csl in existing_csls:
-#         session.delete(csl)
-    
-#     # Add new CSLs
-#     for csl_id, csl_data in csls_by_id.items():
-#         # Create new CSL
-#         csl = CSLModel(
-#             app_id=app.id,
-#             name=csl_data["name"],
-#             play_console_id=csl_id
-#         )
-#         session.add(csl)
-
-#         # Handle locales
-#         for locale_name in csl_data["locales"]:
-#             # Get or create locale
-#             locale = session.scalar(
-#                 select(LocaleModel).where(LocaleModel.name == locale_name)
-#             )
-#             if not locale:
-#                 locale = LocaleModel(name=locale_name)
-#                 session.add(locale)
-            
-#             # Add locale to CSL
-#             csl.locales.append(locale)
-
-#     session.commit()
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from src.config.settings import CSLS, SCHEDULER
+from src.modules.app.schemas import AppStatus
+from src.modules.app.snapshot import AppSnapshot, CSLSnapshot, PublisherSnapshot
+from src.modules.csl.schemas import split_locale_code
+import src.utils.logger as logger
+
+logger = logger.logger
+
+# Prefixes of the default locale in the Play Console language list
+DEFAULT_LOCALE_PREFIXES = ("Default – ", "Default - ")
+
+
+def is_csls_sync_due(app: AppSnapshot, now: Optional[datetime] = None) -> bool:
+    """
+    Check if the CSLs of an app should be fetched
+
+    Args:
+        app: App snapshot
+        now: Current time, defaults to now
+
+    Returns:
+        True if sync_csls_now is set, the CSLs were never fetched or were
+        fetched more than CSLS_INTERVAL_HOURS ago
+    """
+    if app.status not in (AppStatus.ACTIVE, AppStatus.CONNECTING):
+        return False
+    if app.sync_csls_now or app.csls_synced_at is None:
+        return True
+    return get_csls_due_at(app) <= (now or datetime.now(timezone.utc))
+
+
+def get_csls_due_at(app: AppSnapshot) -> datetime:
+    """Get when the CSLs of an app are due again, now if they were never fetched"""
+    if app.csls_synced_at is None:
+        return datetime.now(timezone.utc)
+    # Database datetimes are UTC, without timezone once read back
+    synced_at = app.csls_synced_at.replace(tzinfo=app.csls_synced_at.tzinfo or timezone.utc)
+    return synced_at + timedelta(hours=SCHEDULER['CSLS_INTERVAL_HOURS'])
+
+
+def fetch_app_csls(gpc, publisher: PublisherSnapshot, app: AppSnapshot) -> List[Dict]:
+    """
+    Fetch the CSLs of an app and their locales from the Play Console
+
+    Only the custom store listings overview is always loaded. The locale
+    pages are visited for the CSLs that are new, whose overview row changed
+    or whose locales are older than LOCALES_TTL_HOURS, and for every CSL when
+    sync_csls_now is set. The other CSLs keep their stored locales.
+
+    Args:
+        gpc: Play Console driver
+        publisher: Publisher of the app
+        app: App snapshot
+
+    Returns:
+        One add_csls record per CSL and locale
+    """
+    gpc.set_publisher_app(publisher, app)
+    csls = gpc.get_store_csls()
+
+    now = datetime.now(timezone.utc)
+    stored = {csl.play_console_id: csl for csl in app.csls}
+    stale = []
+    for csl in csls:
+        cached = stored.get(csl["csl_play_console_id"])
+        if app.sync_csls_now or not _are_locales_fresh(cached, csl["fingerprint"], now):
+            stale.append(csl)
+        else:
+            csl["locales"] = list(cached.locales)
+            csl["locales_fetched_at"] = cached.locales_fetched_at
+
+    if stale:
+        gpc.get_csls_possible_locales(stale)
+        for csl in stale:
+            csl["locales_fetched_at"] = now
+
+    records = []
+    for csl in csls:
+        for locale in csl.get("locales", []):
+            for prefix in DEFAULT_LOCALE_PREFIXES:
+                locale = locale.replace(prefix, "")
+            records.append({
+                "app": app,
+                "csl_play_console_id": csl["csl_play_console_id"],
+                "name": csl["name"],
+                "locale": locale,
+                "fingerprint": csl["fingerprint"],
+                "locales_fetched_at": csl["locales_fetched_at"],
+            })
+    logger.info(
+        f"Fetched {len(csls)} CSLs with {len(records)} locales for {app.package_id}, "
+        f"{len(stale)} locale pages visited"
+    )
+    return records
+
+
+def _are_locales_fresh(cached: Optional[CSLSnapshot], fingerprint: Optional[str], now: datetime) -> bool:
+    """Check if the stored locales of a CSL can be reused for its current overview row"""
+    if cached is None or not cached.locales or cached.locales_fetched_at is None:
+        return False
+    if cached.fingerprint != fingerprint:
+        return False
+    # Database datetimes are UTC, without timezone once read back
+    fetched_at = cached.locales_fetched_at.replace(tzinfo=cached.locales_fetched_at.tzinfo or timezone.utc)
+    return now - fetched_at < timedelta(hours=CSLS['LOCALES_TTL_HOURS'])
+
+
+def get_csl_locales(records: List[Dict]) -> Dict[str, List[str]]:
+    """
+    Map the CSL names of add_csls records to their locale codes
+
+    Args:
+        records: Records returned by fetch_app_csls
+
+    Returns:
+        CSL name -> locale codes, as expected by the Play Console driver
+    """
+    csl_locales: Dict[str, List[str]] = {}
+    for record in records:
+        codes = csl_locales.setdefault(record["name"], [])
+        code = split_locale_code(record["locale"])
+        if code not in codes:
+            codes.append(code)
+    return csl_locales
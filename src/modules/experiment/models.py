@@ -2,7 +2,7 @@ from datetime import datetime, timezone
 from typing import Optional, List
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from src.database.connection import Base
-from sqlalchemy import String, Integer, Enum, ForeignKey, Float, Text, BigInteger
+from sqlalchemy import String, Integer, Enum, ForeignKey, Float, Text, BigInteger, Index
 from src.modules.experiment.schemas import ApplySetting, ApplyOnPercentile, MinimumDetectableEffectEnum, ConfidenceIntervalEnum, TargetMetric
 from src.modules.experiment.schemas import ExperimentStatus, ExperimentType, AssetType
 
@@ -30,6 +30,11 @@ class ExperimentSettingsModel(Base):
 
 class ExperimentModel(Base):
     __tablename__ = "experiments"
+    __table_args__ = (
+        Index("ix_experiments_app_play_experiment", "app_id", "google_play_experiment_id"),
+        Index("ix_experiments_app_name", "app_id", "experiment_name_auto_populated"),
+        Index("ix_experiments_status_csl_locale", "status", "csl_id", "locale_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     settings_id: Mapped[int] = mapped_column(ForeignKey("experiment_settings.id"))
@@ -1,9 +1,13 @@
 from typing import List, Dict, Optional, Tuple
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.util import identity_key
 from src.modules.experiment.models import ExperimentModel, ExperimentStatus, VariantModel
+from src.modules.experiment.schemas import ScrapedExperiment
+from src.database.unit_of_work import commit_changes, savepoint
 import src.utils.logger as logger
 from datetime import datetime, timezone
-from src.modules.csl.repository import get_csl_name, get_locale_name
+from src.modules.csl.repository import get_csl_name, get_locale_code, get_locale_name, get_name_resolver
 import traceback
 
 logger = logger.logger
@@ -11,8 +15,8 @@ logger = logger.logger
 def update_experiment_statuses(
     session: Session, 
     app_id: int,
-    running_experiments: List[Dict],
-    previous_experiments: List[Dict],
+    running_experiments: List[ScrapedExperiment],
+    previous_experiments: List[ScrapedExperiment],
     publisher_id: str,
     app_console_id: str
 ) -> None:
@@ -28,37 +32,133 @@ def update_experiment_statuses(
         app_console_id: App Play Console ID
     """
     try:
-        # Update running experiments
-        for running in running_experiments:
-            experiment = session.query(ExperimentModel).filter(
-                ExperimentModel.app_id == app_id,
-                ExperimentModel.experiment_name_auto_populated == running["experiment_name"]
-            ).first()
-            
-            if experiment:
-                experiment.status = ExperimentStatus.IN_PROGRESS
-                experiment.google_play_experiment_id = running["experiment_id"]
-                experiment.url = f'https://play.google.com/console/u/0/developers/{publisher_id}/app/{app_console_id}/store-listing-experiments/{running["experiment_id"]}/report'
-
-        # Update previous experiments
-        for previous in previous_experiments:
-            if "experiment_id" not in previous or not previous["experiment_id"]:
-                continue
-                
-            experiment = session.query(ExperimentModel).filter(
-                ExperimentModel.app_id == app_id,
-                ExperimentModel.experiment_name_auto_populated == previous["experiment_name"]
-            ).first()
-            
-            if experiment:
-                experiment.status = ExperimentStatus.FINISHED
-                experiment.google_play_experiment_id = previous["experiment_id"]
-                experiment.url = f'https://play.google.com/console/u/0/developers/{publisher_id}/app/{app_console_id}/store-listing-experiments/{previous["experiment_id"]}/report'
+        with savepoint(session):
+            # Desired state per experiment name, previous experiments win over running ones
+            desired = {}
+            for running in running_experiments:
+                desired[running.experiment_name] = (ExperimentStatus.IN_PROGRESS, running.experiment_id)
+            for previous in previous_experiments:
+                if not previous.experiment_id:
+                    continue
+                desired[previous.experiment_name] = (ExperimentStatus.FINISHED, previous.experiment_id)
+
+            if not desired:
+                return
+
+            # Write pending changes first, the bulk update bypasses the loaded objects
+            session.flush()
 
-        session.commit()
+            # Load all the candidate experiments of the app in one query
+            rows = session.execute(
+                select(
+                    ExperimentModel.id,
+                    ExperimentModel.experiment_name_auto_populated,
+                    ExperimentModel.status,
+                    ExperimentModel.google_play_experiment_id,
+                    ExperimentModel.url,
+                )
+                .where(
+                    ExperimentModel.app_id == app_id,
+                    ExperimentModel.experiment_name_auto_populated.in_(desired.keys())
+                )
+                .order_by(ExperimentModel.id)
+            ).all()
+
+            # Only the first experiment with a given name is updated
+            experiments_by_name = {}
+            for row in rows:
+                experiments_by_name.setdefault(row.experiment_name_auto_populated, row)
+
+            mappings = []
+            for name, (status, play_experiment_id) in desired.items():
+                row = experiments_by_name.get(name)
+                if row is None:
+                    continue
+                if str(play_experiment_id).isdigit():
+                    play_experiment_id = int(play_experiment_id)
+                url = f'https://play.google.com/console/u/0/developers/{publisher_id}/app/{app_console_id}/store-listing-experiments/{play_experiment_id}/report'
+                if (row.status, row.google_play_experiment_id, row.url) == (status, play_experiment_id, url):
+                    continue
+                mappings.append({
+                    "id": row.id,
+                    "status": status,
+                    "google_play_experiment_id": play_experiment_id,
+                    "url": url,
+                })
+
+            if mappings:
+                session.execute(update(ExperimentModel), mappings)
+                # Keep already loaded experiments in sync with the bulk update
+                for mapping in mappings:
+                    experiment = session.identity_map.get(identity_key(ExperimentModel, mapping["id"]))
+                    if experiment is not None:
+                        session.expire(experiment, ["status", "google_play_experiment_id", "url"])
+
+            commit_changes(session)
+            logger.info(f"Experiment statuses updated={len(mappings)} unchanged={len(experiments_by_name) - len(mappings)}")
     except Exception as e:
         logger.error(f"Error updating experiment statuses: {e}")
-        session.rollback() 
+
+def get_experiments_by_play_ids(
+    session: Session,
+    app_id: int,
+    play_experiment_ids: List[str]
+) -> Dict[int, ExperimentModel]:
+    """
+    Get the app experiments matching the given Play Console experiment IDs
+    in one query, with their settings eagerly loaded
+
+    Args:
+        session: Database session
+        app_id: App ID
+        play_experiment_ids: Play Console experiment IDs as scraped from the console
+
+    Returns:
+        Dictionary mapping Play Console experiment IDs to experiments
+    """
+    ids = {int(i) for i in play_experiment_ids if i and str(i).isdigit()}
+    if not ids:
+        return {}
+
+    try:
+        experiments = (
+            session.query(ExperimentModel)
+            .options(joinedload(ExperimentModel.settings))
+            .filter(
+                ExperimentModel.app_id == app_id,
+                ExperimentModel.google_play_experiment_id.in_(ids)
+            )
+            .all()
+        )
+        return {experiment.google_play_experiment_id: experiment for experiment in experiments}
+    except Exception as e:
+        logger.error(f"Error getting experiments by Play Console IDs: {e}")
+        return {}
+
+def get_app_experiments(session: Session, app_id: int) -> List[ExperimentModel]:
+    """
+    Get all the experiments of an app with their settings and variants loaded
+
+    Args:
+        session: Database session
+        app_id: App ID
+
+    Returns:
+        List of experiments
+    """
+    try:
+        return (
+            session.query(ExperimentModel)
+            .options(
+                selectinload(ExperimentModel.settings),
+                selectinload(ExperimentModel.variants)
+            )
+            .filter(ExperimentModel.app_id == app_id)
+            .all()
+        )
+    except Exception as e:
+        logger.error(f"Error getting experiments of app {app_id}: {e}")
+        return []
 
 def get_ready_experiments(session: Session, app_id: int) -> List[ExperimentModel]:
     """
@@ -80,15 +180,41 @@ def get_ready_experiments(session: Session, app_id: int) -> List[ExperimentModel
         logger.error(f"Error getting ready experiments: {e}")
         return []
 
+def has_experiments_in_status(session: Session, app_id: int, statuses: List[ExperimentStatus]) -> bool:
+    """
+    Check if an app has experiments in one of the given statuses
+
+    Args:
+        session: Database session
+        app_id: App ID
+        statuses: Experiment statuses
+
+    Returns:
+        True if an experiment of the app has one of the statuses, or on error
+    """
+    try:
+        return session.scalar(
+            select(ExperimentModel.id)
+            .where(ExperimentModel.app_id == app_id, ExperimentModel.status.in_(statuses))
+            .limit(1)
+        ) is not None
+    except Exception as e:
+        logger.error(f"Error checking experiments of app {app_id}: {e}")
+        return True
+
+def has_pending_experiment_actions(session: Session, app_id: int) -> bool:
+    """Check if an app has experiments to create or stop, READY or STOPPING"""
+    return has_experiments_in_status(session, app_id, [ExperimentStatus.READY, ExperimentStatus.STOPPING])
+
 def mark_experiment_as_error(session: Session, experiment: ExperimentModel, error_message: str) -> None:
     """Mark a single experiment as error"""
     try:
-        experiment.status = ExperimentStatus.ERROR
-        experiment.error = error_message
-        session.commit()
+        with savepoint(session):
+            experiment.status = ExperimentStatus.ERROR
+            experiment.error = error_message
+            commit_changes(session)
     except Exception as e:
         logger.error(f"Error marking experiment as error: {e}")
-        session.rollback()
 
 def update_experiments_with_error(
     session: Session, 
@@ -98,24 +224,24 @@ def update_experiments_with_error(
 ) -> None:
     """Update experiments with error status"""
     try:
-        experiments = (
-            session.query(ExperimentModel)
-            .filter(
-                ExperimentModel.status == ExperimentStatus.READY,
-                ExperimentModel.csl_id == csl_id,
-                ExperimentModel.locale_id == locale_id
+        with savepoint(session):
+            experiments = (
+                session.query(ExperimentModel)
+                .filter(
+                    ExperimentModel.status == ExperimentStatus.READY,
+                    ExperimentModel.csl_id == csl_id,
+                    ExperimentModel.locale_id == locale_id
+                )
+                .all()
             )
-            .all()
-        )
         
-        for experiment in experiments:
-            experiment.status = ExperimentStatus.ERROR
-            experiment.error = error_message
+            for experiment in experiments:
+                experiment.status = ExperimentStatus.ERROR
+                experiment.error = error_message
         
-        session.commit()
+            commit_changes(session)
     except Exception as e:
         logger.error(f"Error updating experiments with error: {e}")
-        session.rollback()
 
 def update_experiment_after_creation(
     session: Session,
@@ -125,19 +251,19 @@ def update_experiment_after_creation(
 ) -> None:
     """Update experiment details after successful creation"""
     try:
-        experiment.google_play_experiment_id = experiment_id
-        experiment.url = url
-        experiment.status = ExperimentStatus.IN_PROGRESS
-        session.commit()
+        with savepoint(session):
+            experiment.google_play_experiment_id = experiment_id
+            experiment.url = url
+            experiment.status = ExperimentStatus.IN_PROGRESS
+            commit_changes(session)
     except Exception as e:
         logger.error(f"Error updating experiment after creation: {e}")
-        session.rollback() 
 
 def get_next_experiment_and_variants(
     session: Session,
     all_experiments: List[ExperimentModel],
     csls: Dict[str, List[str]],
-    running: List[Dict]
+    running: List[ScrapedExperiment]
 ) -> Tuple[Optional[ExperimentModel], Optional[List[Dict]], Optional[List[ExperimentModel]]]:
     """
     Get next experiment to create and its variants
@@ -161,12 +287,15 @@ def get_next_experiment_and_variants(
         if not ready_experiments:
             return None, None, None
 
+        # Resolve the CSL and locale names of the app from memory
+        get_name_resolver(session).load_app(ready_experiments[0].app_id)
+
         # Process running experiments
         running_listings_locales = set()
         for r in running:
-            if "experiment_type" in r and r["experiment_type"] == "Default graphics":
+            if r.experiment_type == "Default graphics":
                 continue
-            running_listings_locales.add(f'{r["store_listing"]}--{r["locale"]}')
+            running_listings_locales.add(f'{r.store_listing}--{r.locale}')
 
         experiments = []
         non_ready_experiments = []
@@ -180,18 +309,16 @@ def get_next_experiment_and_variants(
                 )
                 number_of_default_graphics_experiments = len([
                     r for r in running 
-                    if r["store_listing"] == experiment.csl_id 
-                    and r["experiment_type"] == "Default graphics"
+                    if r.store_listing == experiment.csl_id 
+                    and r.experiment_type == "Default graphics"
                 ])
-                # get experiment csl name
-                logger.info(f"experiment.csl_id: {experiment.csl_id}, experiment.locale_id: {experiment.locale_id}")
-                locale_name = get_locale_name(experiment.locale_id, session).split(" – ")[1]
+                locale_name = get_locale_code(experiment.locale_id, session)
                 
                 csl_locale = f'{csl_name}--{locale_name}'
-                logger.info(f"csl_locale: {csl_locale}")
-                logger.info(f"running_locals_listings: {running_listings_locales}")
-                logger.info(f"number_per_store_listing: {number_per_store_listing}")
-                logger.info(f"number_of_default_graphics_experiments: {number_of_default_graphics_experiments}")
+                logger.debug(
+                    f"csl_locale={csl_locale} number_per_store_listing={number_per_store_listing} "
+                    f"number_of_default_graphics_experiments={number_of_default_graphics_experiments}"
+                )
 
                 if (csl_locale not in running_listings_locales
                     and number_per_store_listing < len(csls[csl_name])
@@ -1,4 +1,7 @@
+from dataclasses import dataclass
+from datetime import datetime
 from enum import Enum
+from typing import Dict, Optional, Tuple
 
 class ExperimentType(Enum):
     AI = "AI"
@@ -72,4 +75,104 @@ class ConfidenceIntervalEnum(Enum):
 class TargetMetric(Enum):
     FIRST_TIME_INSTALLERS = "First-time installers"
     RETAINED_FIRST_TIME_INSTALLERS = "Retained first-time installers (recommended)"
-    RETAINED_PRE_REGISTRATIONS="Retained pre-registrations"
\ No newline at end of file
+    RETAINED_PRE_REGISTRATIONS="Retained pre-registrations"
+
+# Play Console results meaning no variant won
+NO_WINNER_RESULTS = ("More data needed", "Not enough data", "Current listing won", "Draw")
+
+
+def _to_int(value) -> int:
+    try:
+        return int(str(value).replace(",", "").replace("-", ""))
+    except ValueError:
+        return 0
+
+
+def _to_float(value) -> float:
+    try:
+        return float(str(value).replace("%", "").replace(",", ".").replace("-", "") or 0)
+    except ValueError:
+        return 0.0
+
+
+def _screenshots(data: Dict, prefix: str) -> Tuple[str, ...]:
+    screenshots = []
+    while f"{prefix}{len(screenshots) + 1}" in data:
+        screenshots.append(data[f"{prefix}{len(screenshots) + 1}"])
+    return tuple(screenshots)
+
+
+@dataclass(frozen=True, slots=True)
+class ScrapedVariant:
+    """Variant of an experiment as shown in the Play Console experiment page"""
+    name: str
+    audience: float
+    installs: int
+    installs_scaled: int
+    performance_start: float = 0.0
+    performance_end: float = 0.0
+    icon: Optional[str] = None
+    feature_graphic: Optional[str] = None
+    promo_video: Optional[str] = None
+    short_description: Optional[str] = None
+    full_description: Optional[str] = None
+    screenshots: Tuple[str, ...] = ()
+    screenshots_7inch: Tuple[str, ...] = ()
+    screenshots_10inch: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_console(cls, data: Dict) -> "ScrapedVariant":
+        """
+        Parse the raw values scraped from a variant row
+
+        Args:
+            data: Raw variant values, counts and percentages as displayed
+
+        Returns:
+            ScrapedVariant with numeric values parsed, unparsable ones set to 0
+        """
+        return cls(
+            name=data["name"],
+            audience=_to_float(data.get("audience")),
+            installs=_to_int(data.get("installs")),
+            installs_scaled=_to_int(data.get("installs_scaled")),
+            performance_start=float(data.get("performance_start") or 0),
+            performance_end=float(data.get("performance_end") or 0),
+            icon=data.get("icon"),
+            feature_graphic=data.get("feature_graphic"),
+            promo_video=data.get("promo_video"),
+            short_description=data.get("short_description"),
+            full_description=data.get("full_description"),
+            screenshots=_screenshots(data, "screen"),
+            screenshots_7inch=_screenshots(data, "t7_screen"),
+            screenshots_10inch=_screenshots(data, "t10_screen"),
+        )
+
+    @property
+    def percentile(self) -> float:
+        """Position of the variant in its performance confidence interval"""
+        try:
+            return self.performance_end / (abs(self.performance_start) + abs(self.performance_end))
+        except ZeroDivisionError:
+            return 0
+
+
+@dataclass(frozen=True, slots=True)
+class ScrapedExperiment:
+    """Running or completed experiment as listed in the Play Console"""
+    experiment_name: str
+    experiment_id: str
+    locale: str
+    store_listing: str
+    experiment_type: Optional[str]
+    start_date: Optional[datetime]
+    start_time: Optional[datetime]
+    status: Optional[str]
+    variants: Tuple[ScrapedVariant, ...]
+    app_id: Optional[int] = None
+    kill: bool = False
+
+    @property
+    def play_experiment_id(self) -> Optional[int]:
+        """Play Console experiment ID as stored in the database, None for drafts"""
+        return int(self.experiment_id) if str(self.experiment_id).isdigit() else None
@@ -0,0 +1,33 @@
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import Integer, String, Text, Enum, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from src.database.connection import Base
+from src.modules.job.schemas import JobKind, JobStatus
+
+
+class JobModel(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_status_due_at", "status", "due_at"),
+        Index("ix_jobs_status_lease_expires_at", "status", "lease_expires_at"),
+        Index("ix_jobs_app_kind_finished_at", "app_id", "kind", "finished_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    app_id: Mapped[int] = mapped_column(ForeignKey("apps.id"))
+    kind: Mapped[JobKind] = mapped_column(Enum(JobKind))
+    status: Mapped[JobStatus] = mapped_column(Enum(JobStatus), default=JobStatus.PENDING)
+    due_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    # "<app_id>:<kind>:<due occurrence>", an app is never queued twice for the same sync
+    dedupe_key: Mapped[Optional[str]] = mapped_column(String(128), unique=True, nullable=True)
+    # App ID while running, at most one running job per app
+    running_app_id: Mapped[Optional[int]] = mapped_column(Integer, unique=True, nullable=True)
+    worker: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=lambda: datetime.now(timezone.utc))
+    started_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(nullable=True)
@@ -0,0 +1,290 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import exists, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+from src.config.settings import JOBS, SCHEDULER
+from src.modules.app.models import AppModel
+from src.modules.app.repository import get_due_apps
+from src.modules.app.schemas import AppStatus
+from src.modules.job.models import JobModel
+from src.modules.job.schemas import JobKind, JobStatus
+from src.modules.publisher.models import PublisherModel
+from src.modules.publisher.schemas import PublisherStatus
+from src.database.unit_of_work import commit_changes
+import src.utils.logger as logger
+
+logger = logger.logger
+
+
+def enqueue_jobs(session: Session, jobs: List[Tuple[int, JobKind, str]], due_at: Optional[datetime] = None) -> int:
+    """
+    Queue app jobs, each at most once per due occurrence
+
+    Args:
+        session: Database session
+        jobs: (app ID, job kind, due occurrence) triples, the occurrence tells
+            apart the syncs of an app, eg: the next_sync the job is run for
+        due_at: When the jobs are due, now by default
+
+    Returns:
+        Number of jobs queued
+    """
+    if not jobs:
+        return 0
+
+    try:
+        now = datetime.now(timezone.utc)
+        # The unique dedupe_key makes the insert idempotent across hosts, a
+        # host polling a stale app state does not queue a job already run
+        result = session.execute(
+            insert(JobModel.__table__)
+            .prefix_with("IGNORE", dialect="mysql")
+            .prefix_with("OR IGNORE", dialect="sqlite"),
+            [
+                {
+                    "app_id": app_id,
+                    "kind": kind,
+                    "status": JobStatus.PENDING,
+                    "due_at": due_at or now,
+                    "attempts": 0,
+                    "dedupe_key": f"{app_id}:{kind.value}:{occurrence}"[:128],
+                    "created_at": now,
+                }
+                for app_id, kind, occurrence in dict.fromkeys(jobs)
+            ]
+        )
+        commit_changes(session)
+        return max(result.rowcount, 0)
+    except Exception as e:
+        logger.error(f"Error queuing {len(jobs)} jobs: {e}")
+        session.rollback()
+        return 0
+
+
+def enqueue_due_jobs(session: Session) -> int:
+    """
+    Queue the jobs of the apps due for a sync
+
+    Experiments jobs follow the apps next_sync and sync_now, the job of a
+    next_sync is queued once. CSL jobs follow sync_csls_now and the last
+    CSL job, every CSLS_INTERVAL_HOURS, and are queued once per last job.
+
+    Args:
+        session: Database session
+
+    Returns:
+        Number of jobs queued
+    """
+    now = datetime.now(timezone.utc)
+    jobs = []
+    for app_id, next_sync, sync_now, sync_csls_now in get_due_apps(session, now):
+        # Database datetimes are UTC, without timezone once read back
+        if sync_now or next_sync is None or next_sync.replace(tzinfo=timezone.utc) <= now:
+            jobs.append((app_id, JobKind.EXPERIMENTS, str(next_sync)))
+
+    try:
+        csls_jobs = (JobModel.app_id == AppModel.id, JobModel.kind == JobKind.CSLS)
+        last_job_id = select(func.max(JobModel.id)).where(*csls_jobs).scalar_subquery()
+        active_job = exists().where(*csls_jobs, JobModel.status.in_([JobStatus.PENDING, JobStatus.RUNNING]))
+        recent_job = exists().where(
+            *csls_jobs,
+            JobModel.finished_at >= now - timedelta(hours=SCHEDULER['CSLS_INTERVAL_HOURS'])
+        )
+        jobs.extend(
+            (app_id, JobKind.CSLS, f"after {last_id or 0}")
+            for app_id, last_id in session.execute(
+                select(AppModel.id, last_job_id)
+                .join(PublisherModel, PublisherModel.id == AppModel.publisher_id)
+                .where(
+                    AppModel.status.in_([AppStatus.ACTIVE, AppStatus.CONNECTING]),
+                    PublisherModel.status == PublisherStatus.ACTIVE,
+                    ~active_job,
+                    or_(AppModel.sync_csls_now.is_(True), ~recent_job)
+                )
+            ).tuples()
+        )
+    except Exception as e:
+        logger.error(f"Error getting the apps due for a CSL fetch: {e}")
+        session.rollback()
+
+    return enqueue_jobs(session, jobs)
+
+
+def requeue_expired_jobs(session: Session) -> int:
+    """
+    Release the running jobs whose lease expired, eg: their host died
+
+    They are queued again, or failed once MAX_ATTEMPTS is reached.
+
+    Args:
+        session: Database session
+
+    Returns:
+        Number of jobs released
+    """
+    try:
+        now = datetime.now(timezone.utc)
+        expired = (JobModel.status == JobStatus.RUNNING, JobModel.lease_expires_at < now)
+        failed = session.execute(
+            update(JobModel)
+            .where(*expired, JobModel.attempts >= JOBS['MAX_ATTEMPTS'])
+            .values(
+                status=JobStatus.FAILED, running_app_id=None, dedupe_key=None,
+                finished_at=now, error="Lease expired"
+            )
+        ).rowcount
+        requeued = session.execute(
+            update(JobModel)
+            .where(*expired)
+            .values(status=JobStatus.PENDING, running_app_id=None, worker=None, due_at=now)
+        ).rowcount
+        commit_changes(session)
+        if failed or requeued:
+            logger.info(f"Expired job leases requeued={requeued} failed={failed}")
+        return failed + requeued
+    except Exception as e:
+        logger.error(f"Error releasing expired jobs: {e}")
+        session.rollback()
+        return 0
+
+
+def claim_job(session: Session, worker: str, lease_seconds: int = JOBS['LEASE_SECONDS']) -> Optional[JobModel]:
+    """
+    Claim the next due job, leased to the worker for lease_seconds
+
+    Candidates are locked with SELECT ... FOR UPDATE SKIP LOCKED so
+    concurrent workers pick different jobs, and each claim is a conditional
+    update, so a job is only ever claimed once even without row locks (eg:
+    SQLite). A job whose app already has a running job is skipped, the
+    unique running_app_id makes it impossible to run two jobs of an app.
+
+    Args:
+        session: Database session
+        worker: Worker name, eg: host:pid
+        lease_seconds: Lease duration, extended by heartbeat_job
+
+    Returns:
+        The claimed job, None if no job is due
+    """
+    try:
+        now = datetime.now(timezone.utc)
+        running = aliased(JobModel)
+        candidates = session.scalars(
+            select(JobModel.id)
+            .where(
+                JobModel.status == JobStatus.PENDING,
+                JobModel.due_at <= now,
+                JobModel.app_id.not_in(
+                    select(running.running_app_id).where(running.running_app_id.is_not(None))
+                )
+            )
+            .order_by(JobModel.due_at)
+            .limit(JOBS['CLAIM_BATCH'])
+            .with_for_update(skip_locked=True)
+        ).all()
+
+        for job_id in candidates:
+            try:
+                claimed = session.execute(
+                    update(JobModel)
+                    .where(JobModel.id == job_id, JobModel.status == JobStatus.PENDING, JobModel.due_at <= now)
+                    .values(
+                        status=JobStatus.RUNNING,
+                        running_app_id=JobModel.app_id,
+                        worker=worker,
+                        attempts=JobModel.attempts + 1,
+                        started_at=now,
+                        heartbeat_at=now,
+                        lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    )
+                ).rowcount
+                if claimed != 1:
+                    continue
+                session.commit()
+                return session.get(JobModel, job_id)
+            except IntegrityError:
+                # Another job of the app started meanwhile
+                session.rollback()
+
+        session.commit()
+        return None
+    except Exception as e:
+        logger.error(f"Error claiming a job for {worker}: {e}")
+        session.rollback()
+        return None
+
+
+def heartbeat_job(session: Session, job_id: int, worker: str, lease_seconds: int = JOBS['LEASE_SECONDS']) -> bool:
+    """
+    Extend the lease of a running job
+
+    Args:
+        session: Database session
+        job_id: Job ID
+        worker: Worker holding the lease
+        lease_seconds: New lease duration from now
+
+    Returns:
+        False if the worker lost the lease, eg: it expired and the job was requeued
+    """
+    try:
+        now = datetime.now(timezone.utc)
+        extended = session.execute(
+            update(JobModel)
+            .where(JobModel.id == job_id, JobModel.worker == worker, JobModel.status == JobStatus.RUNNING)
+            .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=lease_seconds))
+        ).rowcount
+        commit_changes(session)
+        return extended == 1
+    except Exception as e:
+        logger.error(f"Error extending the lease of job {job_id}: {e}")
+        session.rollback()
+        return False
+
+
+def finish_job(session: Session, job_id: int, worker: str, error: Optional[str] = None) -> bool:
+    """
+    Mark a running job done, or retry it later if it failed
+
+    A failed job is queued again after RETRY_MINUTES until it reaches
+    MAX_ATTEMPTS, then marked failed.
+
+    Args:
+        session: Database session
+        job_id: Job ID
+        worker: Worker holding the lease
+        error: Error message if the job failed
+
+    Returns:
+        False if the worker lost the lease
+    """
+    try:
+        now = datetime.now(timezone.utc)
+        owned = (JobModel.id == job_id, JobModel.worker == worker, JobModel.status == JobStatus.RUNNING)
+        if error is None:
+            values = {"status": JobStatus.DONE, "error": None}
+        else:
+            attempts = session.scalar(select(JobModel.attempts).where(*owned))
+            if attempts is not None and attempts < JOBS['MAX_ATTEMPTS']:
+                values = {
+                    "status": JobStatus.PENDING, "worker": None, "error": error,
+                    "due_at": now + timedelta(minutes=JOBS['RETRY_MINUTES'])
+                }
+            else:
+                # The app can be queued again for the same sync
+                values = {"status": JobStatus.FAILED, "dedupe_key": None, "error": error}
+
+        finished = session.execute(
+            update(JobModel)
+            .where(*owned)
+            .values(running_app_id=None, lease_expires_at=None, finished_at=now, **values)
+        ).rowcount
+        commit_changes(session)
+        if finished != 1:
+            logger.error(f"Job {job_id} lease lost by {worker}, its result is dropped")
+        return finished == 1
+    except Exception as e:
+        logger.error(f"Error finishing job {job_id}: {e}")
+        session.rollback()
+        return False
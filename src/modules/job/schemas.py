@@ -0,0 +1,11 @@
+from enum import Enum
+
+class JobKind(str, Enum):
+    EXPERIMENTS = "experiments"
+    CSLS = "csls"
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
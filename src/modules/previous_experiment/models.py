@@ -1,11 +1,14 @@
 from datetime import datetime, timezone
 from typing import Optional, List
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, ForeignKey, BigInteger, Text, Float, Numeric
+from sqlalchemy import String, Integer, ForeignKey, BigInteger, Text, Float, Numeric, UniqueConstraint
 from src.database.connection import Base
 
 class PreviousExperimentModel(Base):
     __tablename__ = "previous_experiments"
+    __table_args__ = (
+        UniqueConstraint("app_id", "google_play_experiment_id", name="uq_previous_experiments_app_play_experiment"),
+    )
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     app_id: Mapped[int] = mapped_column(ForeignKey("apps.id"))
@@ -44,42 +47,42 @@ class PreviousVariantModel(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     experiment_id: Mapped[int] = mapped_column(ForeignKey("previous_experiments.id"))
     name: Mapped[str] = mapped_column(String(255))
-    # Asset fields
+    # Asset fields, the asset URLs have no bounded length
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     short_description: Mapped[Optional[str]] = mapped_column(String(80), nullable=True)
-    icon: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    promo_video: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    feature_graphic: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    icon: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    promo_video: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    feature_graphic: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Screenshots
-    screen1: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen2: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen3: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen4: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen5: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen6: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen7: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen8: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    screen1: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen2: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen3: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen4: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen5: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen6: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen7: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen8: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # 7-inch tablet screenshots
-    screen1_7inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen2_7inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen3_7inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen4_7inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen5_7inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen6_7inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen7_7inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen8_7inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    screen1_7inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen2_7inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen3_7inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen4_7inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen5_7inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen6_7inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen7_7inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen8_7inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # 10-inch tablet screenshots
-    screen1_10inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen2_10inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen3_10inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen4_10inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen5_10inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen6_10inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen7_10inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
-    screen8_10inch: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    screen1_10inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen2_10inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen3_10inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen4_10inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen5_10inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen6_10inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen7_10inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    screen8_10inch: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Metrics fields
     installs: Mapped[int] = mapped_column(Integer)
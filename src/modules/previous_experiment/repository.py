@@ -0,0 +1,170 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from src.db_associations import csl_locale
+from src.modules.csl.models import CSLModel, LocaleModel
+from src.modules.csl.schemas import LOCALE_SEPARATOR, split_locale_code
+from src.modules.experiment.schemas import ExperimentStatus, ScrapedExperiment, ScrapedVariant
+from src.modules.previous_experiment.models import PreviousExperimentModel, PreviousVariantModel
+from src.database.unit_of_work import commit_changes, savepoint
+import src.utils.logger as logger
+
+logger = logger.logger
+
+# Scraped variant screenshots, per PreviousVariantModel column suffix
+SCREENSHOT_FIELDS = {"": "screenshots", "_7inch": "screenshots_7inch", "_10inch": "screenshots_10inch"}
+
+
+def save_previous_experiments(
+    session: Session,
+    app_id: int,
+    previous_experiments: List[ScrapedExperiment],
+    publisher_id: str,
+    app_console_id: str
+) -> int:
+    """
+    Save the scraped completed experiments and their variants
+
+    Experiments already saved for the app, matched on their Play Console
+    experiment ID, are skipped, so the same list can be saved on every run.
+    New experiments and their variants are written with two batched inserts.
+
+    Args:
+        session: Database session
+        app_id: App ID
+        previous_experiments: List of previous experiments from Play Console
+        publisher_id: Publisher Play Console ID
+        app_console_id: App Play Console ID
+
+    Returns:
+        Number of experiments saved
+    """
+    try:
+        with savepoint(session):
+            # Drafts have no start date nor results, they are not worth keeping
+            scraped = {}
+            for previous in previous_experiments:
+                if previous.play_experiment_id is not None and previous.start_date is not None:
+                    scraped.setdefault(previous.play_experiment_id, previous)
+
+            if not scraped:
+                return 0
+
+            existing = set(session.scalars(
+                select(PreviousExperimentModel.google_play_experiment_id).where(
+                    PreviousExperimentModel.app_id == app_id,
+                    PreviousExperimentModel.google_play_experiment_id.in_(scraped.keys())
+                )
+            ))
+            new = {i: previous for i, previous in scraped.items() if i not in existing}
+            if not new:
+                return 0
+
+            now = datetime.now(timezone.utc)
+            locale_ids = _get_locale_ids_by_code(session, app_id)
+            session.execute(insert(PreviousExperimentModel), [
+                _experiment_row(app_id, i, previous, locale_ids, publisher_id, app_console_id, now)
+                for i, previous in new.items()
+            ])
+
+            experiment_ids = dict(session.execute(
+                select(PreviousExperimentModel.google_play_experiment_id, PreviousExperimentModel.id).where(
+                    PreviousExperimentModel.app_id == app_id,
+                    PreviousExperimentModel.google_play_experiment_id.in_(new.keys())
+                )
+            ).tuples().all())
+            variants = [
+                _variant_row(experiment_ids[i], variant, now)
+                for i, previous in new.items()
+                for variant in previous.variants
+            ]
+            if variants:
+                session.execute(insert(PreviousVariantModel), variants)
+
+            commit_changes(session)
+            logger.info(f"Previous experiments saved={len(new)} variants={len(variants)} already_saved={len(existing)}")
+            return len(new)
+    except Exception as e:
+        logger.error(f"Error saving previous experiments: {e}")
+        return 0
+
+
+def _get_locale_ids_by_code(session: Session, app_id: int) -> Dict[str, int]:
+    """
+    Map the locale codes shown in the Play Console (eg: de-DE) to locale IDs,
+    for the locales of the app CSLs, the experiments ran on them
+    """
+    return {
+        split_locale_code(name): locale_id
+        for locale_id, name in session.execute(
+            select(LocaleModel.id, LocaleModel.name)
+            .join(csl_locale, csl_locale.c.locale_id == LocaleModel.id)
+            .join(CSLModel, CSLModel.id == csl_locale.c.csl_id)
+            .where(CSLModel.app_id == app_id)
+            .distinct()
+        ).tuples()
+        if LOCALE_SEPARATOR in name
+    }
+
+
+def _fit(model, column: str, value: Any) -> Any:
+    """
+    Skip a string longer than its column, an overflow would fail the whole batch
+
+    The field is saved empty rather than cut, a cut value is broken data.
+    """
+    table_column = model.__table__.c[column]
+    length = getattr(table_column.type, "length", None)
+    if not isinstance(value, str) or not length or len(value) <= length:
+        return value
+    logger.warning(f"Skipping {model.__tablename__}.{column}, {len(value)} characters for {length}: {value[:80]}")
+    return None if table_column.nullable else ""
+
+
+def _experiment_row(
+    app_id: int,
+    play_experiment_id: int,
+    previous: ScrapedExperiment,
+    locale_ids: Dict[str, int],
+    publisher_id: str,
+    app_console_id: str,
+    now: datetime
+) -> Dict:
+    row = {
+        "app_id": app_id,
+        "locale_id": locale_ids.get(previous.locale),
+        "google_play_experiment_id": play_experiment_id,
+        "url": f'https://play.google.com/console/u/0/developers/{publisher_id}/app/{app_console_id}/store-listing-experiments/{play_experiment_id}/report',
+        "name": previous.experiment_name or "",
+        "experiment_type": previous.experiment_type or "",
+        "csl": previous.store_listing or "",
+        "start_date": previous.start_time or previous.start_date,
+        "result": previous.status or "",
+        "status": ExperimentStatus.FINISHED.value,
+        "created_at": now,
+    }
+    return {column: _fit(PreviousExperimentModel, column, value) for column, value in row.items()}
+
+
+def _variant_row(experiment_id: int, variant: ScrapedVariant, now: datetime) -> Dict:
+    row = {
+        "experiment_id": experiment_id,
+        "name": variant.name or "",
+        "description": variant.full_description,
+        "short_description": variant.short_description,
+        "icon": variant.icon,
+        "promo_video": variant.promo_video,
+        "feature_graphic": variant.feature_graphic,
+        "installs": variant.installs,
+        "installs_scaled": variant.installs_scaled,
+        "audience": variant.audience,
+        "performance_start": variant.performance_start,
+        "performance_end": variant.performance_end,
+        "created_at": now,
+    }
+    for suffix, field in SCREENSHOT_FIELDS.items():
+        screenshots = getattr(variant, field)
+        for i in range(1, 9):
+            row[f"screen{i}{suffix}"] = screenshots[i - 1] if i <= len(screenshots) else None
+    return {column: _fit(PreviousVariantModel, column, value) for column, value in row.items()}
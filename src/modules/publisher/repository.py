@@ -2,7 +2,7 @@ from typing import List
 from sqlalchemy.orm import Session, joinedload
 from src.modules.publisher.models import PublisherModel, PublisherStatus
 from src.modules.app.models import AppModel
-from src.database.connection import get_db_session
+from src.database.connection import get_database
 import src.utils.logger as logger
 import traceback
 logger = logger.logger
@@ -17,43 +17,41 @@ def get_publishers_with_apps(active_only: bool = True) -> List[PublisherModel]:
     Returns:
         List of PublisherModel with apps preloaded
     """
-    session = get_db_session()
     try:
-        query = (
-            session.query(PublisherModel)
-            .options(
-                joinedload(PublisherModel.apps)
+        with get_database().session() as session:
+            query = (
+                session.query(PublisherModel)
+                .options(
+                    joinedload(PublisherModel.apps)
+                )
             )
-        )
         
-        if active_only:
-            query = query.filter(PublisherModel.status == PublisherStatus.ACTIVE)
+            if active_only:
+                query = query.filter(PublisherModel.status == PublisherStatus.ACTIVE)
             
-        publishers = query.all()
+            publishers = query.all()
         
-        # # Log some info about what we found
-        # for publisher in publishers:
-        #     logger.info(
-        #         f"Publisher {publisher.name} (ID: {publisher.id}) "
-        #         f"has {len(publisher.apps)} automated testing apps"
-        #     )
-        #     for app in publisher.apps:
-        #         logger.info(
-        #             f"- App: {app.name} "
-        #             f"(Package: {app.package_id}, "
-        #             f"Status: {app.status.value}, "
-        #             f"Automated: testing={app.automated_testing}, "
-        #             f"review={app.automated_send_for_review}, "
-        #             f"publishing={app.automated_publishing})"
-        #         )
+            # # Log some info about what we found
+            # for publisher in publishers:
+            #     logger.info(
+            #         f"Publisher {publisher.name} (ID: {publisher.id}) "
+            #         f"has {len(publisher.apps)} automated testing apps"
+            #     )
+            #     for app in publisher.apps:
+            #         logger.info(
+            #             f"- App: {app.name} "
+            #             f"(Package: {app.package_id}, "
+            #             f"Status: {app.status.value}, "
+            #             f"Automated: testing={app.automated_testing}, "
+            #             f"review={app.automated_send_for_review}, "
+            #             f"publishing={app.automated_publishing})"
+            #         )
                 
-        return publishers
+            return publishers
     except Exception as e:
         logger.error(f"Error fetching publishers with apps: {e}")
         traceback.print_exc()
         return []
-    finally:
-        session.close()
 
 def get_publisher_with_apps(publisher_id: int) -> PublisherModel:
     """
@@ -65,38 +63,35 @@ def get_publisher_with_apps(publisher_id: int) -> PublisherModel:
     Returns:
         PublisherModel with apps preloaded, or None if not found
     """
-    session = get_db_session()
     try:
-        publisher = (
-            session.query(PublisherModel)
-            .options(
-                joinedload(PublisherModel.apps)
-                .filter(AppModel.automated_testing == True)
+        with get_database().session() as session:
+            publisher = (
+                session.query(PublisherModel)
+                .options(
+                    joinedload(PublisherModel.apps.and_(AppModel.automated_testing == True))
+                )
+                .filter(PublisherModel.id == publisher_id)
+                .first()
             )
-            .filter(PublisherModel.id == publisher_id)
-            .first()
-        )
         
-        if publisher:
-            logger.info(
-                f"Found publisher {publisher.name} with "
-                f"{len(publisher.apps)} automated testing apps"
-            )
-            for app in publisher.apps:
+            if publisher:
                 logger.info(
-                    f"- App: {app.name} "
-                    f"(Package: {app.package_id}, "
-                    f"Status: {app.status.value})"
+                    f"Found publisher {publisher.name} with "
+                    f"{len(publisher.apps)} automated testing apps"
                 )
-        else:
-            logger.warning(f"No publisher found with ID {publisher_id}")
+                for app in publisher.apps:
+                    logger.info(
+                        f"- App: {app.name} "
+                        f"(Package: {app.package_id}, "
+                        f"Status: {app.status.value})"
+                    )
+            else:
+                logger.warning(f"No publisher found with ID {publisher_id}")
             
-        return publisher
+            return publisher
     except Exception as e:
         logger.error(f"Error fetching publisher {publisher_id} with apps: {e}")
         return None
-    finally:
-        session.close()
 
 def get_manual_run_publishers_with_apps() -> List[PublisherModel]:
     """
@@ -117,26 +112,24 @@ def get_app_by_package_id(package_id: str) -> AppModel:
     Returns:
         AppModel or None if not found
     """
-    session = get_db_session()
     try:
-        app = (
-            session.query(AppModel)
-            .filter(AppModel.package_id == package_id)
-            .first()
-        )
-        
-        if app:
-            logger.info(
-                f"Found app {app.name} "
-                f"(Package: {app.package_id}, "
-                f"Publisher: {app.publisher.name})"
+        with get_database().session() as session:
+            app = (
+                session.query(AppModel)
+                .filter(AppModel.package_id == package_id)
+                .first()
             )
-        else:
-            logger.warning(f"No app found with package ID {package_id}")
+        
+            if app:
+                logger.info(
+                    f"Found app {app.name} "
+                    f"(Package: {app.package_id}, "
+                    f"Publisher: {app.publisher.name})"
+                )
+            else:
+                logger.warning(f"No app found with package ID {package_id}")
             
-        return app
+            return app
     except Exception as e:
         logger.error(f"Error fetching app with package ID {package_id}: {e}")
-        return None
-    finally:
-        session.close() 
\ No newline at end of file
+        return None
\ No newline at end of file
@@ -1,10 +1,13 @@
 from datetime import datetime, timezone
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Integer, Text, Boolean, ForeignKey
+from sqlalchemy import Integer, Text, Boolean, ForeignKey, Index
 from src.database.connection import Base
 
 class PublishingOverviewModel(Base):
     __tablename__ = "publishing_overviews"
+    __table_args__ = (
+        Index("ix_publishing_overviews_app_id", "app_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     app_id: Mapped[int] = mapped_column(ForeignKey("apps.id")) 
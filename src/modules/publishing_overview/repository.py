@@ -1,6 +1,7 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
 from src.modules.publishing_overview.models import PublishingOverviewModel
+from src.database.unit_of_work import commit_changes, savepoint
 import src.utils.logger as logger
 from datetime import datetime, timezone
 
@@ -27,6 +28,27 @@ def get_pending_publishing_changes(session: Session, app_id: int) -> List[Publis
         logger.error(f"Error getting pending publishing changes: {e}")
         return []
 
+def has_recent_publishing_changes(session: Session, app_id: int, since: datetime) -> bool:
+    """
+    Check if publishing changes were recorded for an app since a date
+
+    Args:
+        session: Database session
+        app_id: App ID
+        since: Oldest change date
+
+    Returns:
+        True if a change was recorded since then
+    """
+    try:
+        return session.query(PublishingOverviewModel.id).filter(
+            PublishingOverviewModel.app_id == app_id,
+            PublishingOverviewModel.created_at >= since
+        ).first() is not None
+    except Exception as e:
+        logger.error(f"Error checking recent publishing changes: {e}")
+        return False
+
 def create_publishing_change(
     session: Session,
     app_id: int,
@@ -48,19 +70,19 @@ def create_publishing_change(
         Created PublishingOverviewModel instance or None if error
     """
     try:
-        publishing_change = PublishingOverviewModel(
-            app_id=app_id,
-            changes=changes,
-            publish_decision=publish_decision,
-            review_decision=review_decision,
-            created_at=datetime.now(timezone.utc)
-        )
-        session.add(publishing_change)
-        session.commit()
-        return publishing_change
+        with savepoint(session):
+            publishing_change = PublishingOverviewModel(
+                app_id=app_id,
+                chnages=changes,
+                publish_decision=publish_decision,
+                review_decision=review_decision,
+                created_at=datetime.now(timezone.utc)
+            )
+            session.add(publishing_change)
+            commit_changes(session)
+            return publishing_change
     except Exception as e:
         logger.error(f"Error creating publishing change: {e}")
-        session.rollback()
         return None
 
 def update_publishing_decisions(
@@ -82,14 +104,14 @@ def update_publishing_decisions(
         True if update successful, False otherwise
     """
     try:
-        publishing_change = session.query(PublishingOverviewModel).get(publishing_change_id)
-        if publishing_change:
-            publishing_change.publish_decision = publish_decision
-            publishing_change.review_decision = review_decision
-            session.commit()
-            return True
-        return False
+        with savepoint(session):
+            publishing_change = session.query(PublishingOverviewModel).get(publishing_change_id)
+            if publishing_change:
+                publishing_change.publish_decision = publish_decision
+                publishing_change.review_decision = review_decision
+                commit_changes(session)
+                return True
+            return False
     except Exception as e:
         logger.error(f"Error updating publishing decisions: {e}")
-        session.rollback()
         return False 
\ No newline at end of file
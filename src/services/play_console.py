@@ -0,0 +1,99 @@
+import os
+from typing import Callable, List, Optional
+from sqlalchemy.orm import Session
+from src.clients.play_console_driver import PlayConsoleDriver
+from src.database.connection import get_database, dispose_database
+from src.modules.app.snapshot import AppSnapshot, PublisherSnapshot, get_graph_snapshot
+from src.services.run_journal import open_run
+from src.services.worker_pool import TaskFailed, get_storage_state, shared_login
+from src.utils import tracing
+
+# Driver of this process, opened by the first app and kept between publishers
+_driver: Optional[PlayConsoleDriver] = None
+
+
+def get_driver(publisher: PublisherSnapshot, app: AppSnapshot, session: Optional[Session] = None) -> PlayConsoleDriver:
+    """
+    Get the Play Console driver of this process, logging in on first use
+
+    main.py, pipeline.py, fetch_csls.py and the scheduler jobs share it, a
+    process opens one browser whatever script it runs.
+
+    Args:
+        publisher: Publisher to log in with
+        app: First app to process
+        session: Database session of the driver, kept as is if None
+
+    Returns:
+        The driver, warm if it was already open
+    """
+    global _driver
+    if _driver is None:
+        # Workers log in one at a time and share the login
+        with shared_login():
+            _driver = PlayConsoleDriver(
+                publisher,
+                app,
+                email=os.getenv("email"),
+                password=os.getenv("password"),
+                otp_code=os.getenv("otp_code"),
+                session=session,
+                storage_state=get_storage_state()
+            )
+    if session is not None:
+        # The driver outlives the session of a publisher
+        _driver.session = session
+    return _driver
+
+
+def shutdown() -> None:
+    """Close the browser and the database connections of this process"""
+    global _driver
+    if _driver is not None:
+        _driver.clean()
+        _driver = None
+
+    dispose_database()
+
+
+def run_publisher(
+    publisher_id: int,
+    select_apps: Callable[[PublisherSnapshot], List[AppSnapshot]],
+    process: Callable[[PublisherSnapshot, List[AppSnapshot]], List[AppSnapshot]],
+    trace_id: Optional[str] = None,
+    run_id: Optional[str] = None,
+    script: str = "main",
+) -> int:
+    """
+    Process a publisher in a worker process, see run_in_workers
+
+    Args:
+        publisher_id: Publisher ID
+        select_apps: Module level function returning the apps of the publisher to process
+        process: Module level function processing the apps, returns the apps that failed
+        trace_id: Trace ID of the main process
+        run_id: Journal run ID of the main process, if the script keeps a journal
+        script: Script of the journal run
+
+    Returns:
+        Number of apps processed
+
+    Raises:
+        TaskFailed: Some apps failed, with their IDs as value
+    """
+    if run_id is not None:
+        open_run(run_id, script)
+    if trace_id is not None:
+        tracing.start_trace(trace_id)
+
+    with get_database().session() as session:
+        publisher = get_graph_snapshot(session).get_publisher(publisher_id)
+
+    apps_to_process = select_apps(publisher) if publisher else []
+    failed = process(publisher, apps_to_process) if apps_to_process else []
+    if failed:
+        raise TaskFailed(
+            f"{len(failed)} of {len(apps_to_process)} apps failed: {', '.join(app.package_id for app in failed)}",
+            [app.id for app in failed]
+        )
+    return len(apps_to_process)
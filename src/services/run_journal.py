@@ -0,0 +1,187 @@
+import os
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Set, Tuple
+from src.config.settings import RUN_JOURNAL
+import src.utils.logger as logger
+
+logger = logger.logger
+
+# Entry kinds
+RUN = "run"
+STAGE = "stage"
+ACTION = "action"
+
+# Stage recorded once an app is fully processed
+APP_DONE = "app"
+
+# Journal of the current process, see start_run and open_run
+_journal: Optional["RunJournal"] = None
+
+
+class RunJournal:
+    """
+    Append-only journal of a run: the app stages completed and the console actions taken
+
+    Entries are appended to a SQLite file shared by the worker processes of
+    the run, each one committed as it is written so nothing done before a
+    crash is lost. A run resumed with the same run ID skips the apps and
+    stages already completed and does not repeat the console actions.
+    """
+
+    def __init__(self, run_id: str, command: str, path: str = RUN_JOURNAL['PATH']):
+        """
+        Open the journal of a run
+
+        Args:
+            run_id: Run ID
+            command: Command of the run, eg: "main"
+            path: SQLite journal file
+        """
+        self.run_id = run_id
+        self.command = command
+        self.connection = _connect(path)
+        self.entries: Set[Tuple[str, Optional[int], str, str]] = {
+            (kind, app_id, name, key)
+            for kind, app_id, name, key in self.connection.execute(
+                "SELECT kind, app_id, name, key FROM entries WHERE run_id = ?", (run_id,)
+            )
+        }
+
+    def is_done(self, app_id: int, stage: str = APP_DONE) -> bool:
+        """Check if an app stage was completed in this run"""
+        return (STAGE, app_id, stage, "") in self.entries
+
+    def mark_done(self, app_id: int, stage: str = APP_DONE) -> None:
+        """Record a completed app stage"""
+        self._append(STAGE, app_id, stage)
+
+    def has_action(self, app_id: int, action: str, key) -> bool:
+        """Check if a console action was taken in this run, eg: ("stop", experiment ID)"""
+        return (ACTION, app_id, action, str(key)) in self.entries
+
+    def record_action(self, app_id: int, action: str, key) -> None:
+        """Record a console action once taken"""
+        self._append(ACTION, app_id, action, str(key))
+
+    def finish(self) -> None:
+        """Record the end of the run, it can no longer be resumed"""
+        self._append(RUN, None, "finished")
+        logger.info(f"Run {self.run_id} finished")
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _append(self, kind: str, app_id: Optional[int], name: str, key: str = "") -> None:
+        entry = (kind, app_id, name, key)
+        if entry in self.entries:
+            return
+        self.connection.execute(
+            "INSERT INTO entries (run_id, command, kind, app_id, name, key, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id, self.command, kind, app_id, name, key, datetime.now(timezone.utc).isoformat())
+        )
+        self.entries.add(entry)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Autocommit, every entry is durable once appended
+    connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS entries ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, command TEXT NOT NULL, "
+        "kind TEXT NOT NULL, app_id INTEGER, name TEXT NOT NULL, key TEXT NOT NULL DEFAULT '', "
+        "created_at TEXT NOT NULL)"
+    )
+    connection.execute("CREATE INDEX IF NOT EXISTS ix_entries_run_id ON entries (run_id)")
+    return connection
+
+
+def get_journal() -> Optional[RunJournal]:
+    """Get the journal of the current run, None outside a journaled run"""
+    return _journal
+
+
+def is_stage_done(app_id: int, stage: str = APP_DONE) -> bool:
+    """Check if the current run completed an app stage, False outside a journaled run"""
+    return _journal is not None and _journal.is_done(app_id, stage)
+
+
+def mark_stage_done(app_id: int, stage: str = APP_DONE) -> None:
+    """Record a completed app stage in the current run, if journaled"""
+    if _journal is not None:
+        _journal.mark_done(app_id, stage)
+
+
+def is_action_taken(app_id: int, action: str, key) -> bool:
+    """Check if the current run already took a console action, False outside a journaled run"""
+    return _journal is not None and _journal.has_action(app_id, action, key)
+
+
+def record_action(app_id: int, action: str, key) -> None:
+    """Record a console action taken in the current run, if journaled"""
+    if _journal is not None:
+        _journal.record_action(app_id, action, key)
+
+
+def start_run(command: str, resume: bool = False, path: str = RUN_JOURNAL['PATH']) -> RunJournal:
+    """
+    Start a journaled run, or resume the last unfinished run of the command
+
+    Args:
+        command: Command of the run, eg: "main"
+        resume: If True, continue the last run of the command that did not finish
+        path: SQLite journal file
+
+    Returns:
+        The journal of the run, also returned by get_journal
+    """
+    run_id = None
+    if resume:
+        connection = _connect(path)
+        row = connection.execute(
+            "SELECT run_id FROM entries WHERE command = ? AND kind = ? AND name = 'started' "
+            "AND run_id NOT IN (SELECT run_id FROM entries WHERE kind = ? AND name = 'finished') "
+            "ORDER BY id DESC LIMIT 1",
+            (command, RUN, RUN)
+        ).fetchone()
+        connection.close()
+        if row:
+            run_id = row[0]
+            logger.info(f"Resuming run {run_id}")
+        else:
+            logger.info(f"No unfinished {command} run to resume, starting a new one")
+
+    journal = open_run(run_id or uuid.uuid4().hex, command, path)
+    journal._append(RUN, None, "started")
+    return journal
+
+
+def close_run() -> None:
+    """Close the journal of the current process"""
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
+
+
+def open_run(run_id: str, command: str, path: str = RUN_JOURNAL['PATH']) -> RunJournal:
+    """
+    Open the journal of a run started by another process, eg: in a pool worker
+
+    Args:
+        run_id: Run ID returned by start_run
+        command: Command of the run
+        path: SQLite journal file
+
+    Returns:
+        The journal of the run, also returned by get_journal
+    """
+    global _journal
+    if _journal is not None and _journal.run_id != run_id:
+        _journal.close()
+    if _journal is None or _journal.run_id != run_id:
+        _journal = RunJournal(run_id, command, path)
+    return _journal
@@ -0,0 +1,200 @@
+import multiprocessing
+import os
+import queue
+import time
+import traceback
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from src.config.settings import PLAYWRIGHT, WORKER_POOL
+from src.utils import tracing
+import src.utils.logger as logger
+
+logger = logger.logger
+
+# Set in the worker processes only, see _worker_main
+_login_lock = None
+_worker_index: Optional[int] = None
+
+
+@dataclass(frozen=True, slots=True)
+class TaskResult:
+    """Outcome of a task run by a worker process"""
+    item: Any
+    ok: bool
+    value: Any = None
+    error: Optional[str] = None
+    worker: Optional[int] = None
+    seconds: float = 0.0
+    # Totals of the spans ended by the task, merged by run_in_workers
+    stats: Optional[Dict[Tuple[str, str], tracing.SpanStats]] = None
+
+
+class TaskFailed(Exception):
+    """
+    Raised by a task that ran to the end with failures, eg: some apps failed
+
+    The result of the item is not ok and keeps the value, without logging a
+    traceback, the task already logged its failures.
+    """
+    def __init__(self, message: str, value: Any = None):
+        super().__init__(message)
+        self.value = value
+
+
+def in_worker() -> bool:
+    """Whether the current process is a pool worker"""
+    return _worker_index is not None
+
+
+def get_storage_state() -> Optional[str]:
+    """
+    Get the Playwright storage state file shared by the workers
+
+    Returns:
+        Storage state path in a worker process, None otherwise
+    """
+    return PLAYWRIGHT['STORAGE_STATE'] if in_worker() else None
+
+
+@contextmanager
+def shared_login() -> Iterator[None]:
+    """
+    Serialize the Play Console logins of the workers
+
+    The first worker logs in and saves the storage state, the next ones
+    start from it instead of sending another 2FA code. Outside a worker
+    this does nothing.
+    """
+    with _login_lock if _login_lock is not None else nullcontext():
+        yield
+
+
+def run_in_workers(
+    items: List[Any],
+    task: Callable[..., Any],
+    shutdown: Callable[[], None],
+    workers: int,
+    **task_kwargs
+) -> List[TaskResult]:
+    """
+    Run a task for each item across worker processes
+
+    Each worker takes items from a shared queue until it is empty, so a slow
+    publisher does not hold back the others, then calls shutdown, eg: to
+    close its browser. Workers are spawned, task and shutdown must be module
+    level functions and the items picklable. The span totals of the tasks
+    are merged in the tracing stats of the calling process.
+
+    Args:
+        items: Items to process, eg: publisher IDs
+        task: Function called as task(item, **task_kwargs) in a worker, raising
+            TaskFailed marks the result of the item not ok
+        shutdown: Function called once by each worker before exiting
+        workers: Number of worker processes
+        task_kwargs: Extra task keyword arguments
+
+    Returns:
+        One result per item, in the items order
+    """
+    if not items:
+        return []
+
+    context = multiprocessing.get_context(WORKER_POOL['START_METHOD'])
+    tasks = context.Queue()
+    results = context.Queue()
+    login_lock = context.Lock()
+    for position, item in enumerate(items):
+        tasks.put((position, item))
+    workers = max(1, min(workers, len(items)))
+    for _ in range(workers):
+        tasks.put(None)
+
+    processes = [
+        context.Process(
+            target=_worker_main,
+            args=(index, task, shutdown, task_kwargs, tasks, results, login_lock),
+            name=f"worker-{index}",
+        )
+        for index in range(workers)
+    ]
+    start = time.monotonic()
+    for process in processes:
+        process.start()
+    logger.info(f"Started {workers} workers for {len(items)} items")
+
+    collected: Dict[int, TaskResult] = {}
+    try:
+        # Drain the results before joining, a worker blocks until its results are read
+        while len(collected) < len(items):
+            try:
+                position, result = results.get(timeout=1)
+                collected[position] = result
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    break
+    except KeyboardInterrupt:
+        logger.error("Interrupted, waiting for the workers to shut down")
+    finally:
+        _join(processes)
+
+    aggregated = [
+        collected.get(position) or TaskResult(item=item, ok=False, error="Worker exited before finishing")
+        for position, item in enumerate(items)
+    ]
+    tracing.merge_stats(result.stats for result in aggregated)
+    failed = [result for result in aggregated if not result.ok]
+    logger.info(
+        f"Workers done items={len(items)} ok={len(items) - len(failed)} failed={len(failed)} "
+        f"seconds={time.monotonic() - start:.1f}"
+    )
+    for result in failed:
+        logger.error(f"Item {result.item} failed on worker {result.worker}: {result.error}")
+    return aggregated
+
+
+def _join(processes: List[multiprocessing.Process]) -> None:
+    """Wait for the workers to shut down, terminating the stuck ones"""
+    deadline = time.monotonic() + WORKER_POOL['SHUTDOWN_TIMEOUT']
+    for process in processes:
+        process.join(max(0, deadline - time.monotonic()))
+        if process.is_alive():
+            logger.error(f"{process.name} did not shut down, terminating it")
+            process.terminate()
+            process.join()
+
+
+def _worker_main(index, task, shutdown, task_kwargs, tasks, results, login_lock) -> None:
+    """Worker process loop, tasks and results are (position, item) and (position, result) pairs"""
+    global _login_lock, _worker_index
+    _login_lock = login_lock
+    _worker_index = index
+    logger.info(f"Worker {index} started (pid {os.getpid()})")
+    done = 0
+    try:
+        while True:
+            entry = tasks.get()
+            if entry is None:
+                break
+            position, item = entry
+            start = time.monotonic()
+            try:
+                value = task(item, **task_kwargs)
+                result = TaskResult(item=item, ok=True, value=value, worker=index)
+            except TaskFailed as e:
+                result = TaskResult(item=item, ok=False, value=e.value, error=str(e), worker=index)
+            except Exception as e:
+                logger.error(traceback.format_exc())
+                result = TaskResult(item=item, ok=False, error=str(e), worker=index)
+            result = replace(result, seconds=time.monotonic() - start, stats=tracing.take_stats())
+            results.put((position, result))
+            done += 1
+    except KeyboardInterrupt:
+        logger.error(f"Worker {index} interrupted")
+    finally:
+        try:
+            shutdown()
+        except Exception as e:
+            logger.error(f"Worker {index} shutdown failed: {e}")
+        logger.info(f"Worker {index} stopped after {done} items")
+
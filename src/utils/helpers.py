@@ -4,12 +4,15 @@ from src.utils.file import get_sent_wins, save_sent_wins
 from src.services.slack import send_message_to_slack_channel
 from src.modules.experiment.models import ExperimentModel
 from src.modules.experiment.models import ExperimentStatus, ApplySetting
-from typing import List, Dict
+from src.modules.experiment.schemas import NO_WINNER_RESULTS, ScrapedExperiment
+from typing import List
 from sqlalchemy.orm import Session
-from src.modules.app.models import AppModel
+from src.modules.app.snapshot import AppSnapshot
 from src.clients.play_console_driver import PlayConsoleDriver
 from src.modules.experiment.models import ExperimentSettingsModel
+from src.modules.experiment.repository import get_experiments_by_play_ids
 from src.config.settings import SLACK_HOOKS
+from src.database.unit_of_work import checkpoint, commit_changes, savepoint
 import src.utils.logger as logger
 
 logger = logger.logger
@@ -19,7 +22,7 @@ def experiment_negative_performance_kill(experiment, experiment_settings):
     Kill the experiment if all variants have negative performance
     
     Args:
-        experiment (dict): Experiment data from Play Console
+        experiment (ScrapedExperiment): Experiment data from Play Console
         experiment_settings (ExperimentSettingsModel): Experiment settings from database
     """
     try:
@@ -28,21 +31,21 @@ def experiment_negative_performance_kill(experiment, experiment_settings):
         kill_performance_value = 0
         
     # if all tested variants are negative kill the experiment
-    variants = experiment["variants"]
-    variants_without_control = [variant for variant in variants if variant["name"] != "Current listing"]
+    variants = experiment.variants
+    variants_without_control = [variant for variant in variants if variant.name != "Current listing"]
     need_to_kill = all(
         [
             (
                 True
-                if v["performance_end"] < kill_performance_value
-                and v["performance_start"] < kill_performance_value
+                if v.performance_end < kill_performance_value
+                and v.performance_start < kill_performance_value
                 else False
             )
             for v in variants_without_control
         ]
     )
     
-    start_time = experiment["start_time"]
+    start_time = experiment.start_time
     running_for_days = (datetime.now() - start_time).days
     
     # kill if performance for all variants is below zero and max duration days passed
@@ -57,7 +60,7 @@ def experiment_1000_installs_kill(experiment, experiment_settings):
     and the conversion is less than early_kill_cvr_decrease
     
     Args:
-        experiment (dict): Experiment data from Play Console
+        experiment (ScrapedExperiment): Experiment data from Play Console
         experiment_settings (ExperimentSettingsModel): Experiment settings from database
     """
     min_installs = int(experiment_settings.early_kill_min_installs)
@@ -66,20 +69,19 @@ def experiment_1000_installs_kill(experiment, experiment_settings):
     except ValueError:
         return False, ""
 
-    variants = experiment["variants"]
+    variants = experiment.variants
 
-    utils.logger.info(variants)
     len_variants = len(variants)
     if len_variants == 2:
         current_variant = variants[0]
         variant = variants[1]
-        if variant["installs"] < min_installs:
-            return False, f"{variant['installs']} < {min_installs}"
+        if variant.installs < min_installs:
+            return False, f"{variant.installs} < {min_installs}"
         conversion_improvement = (
-            variant["installs_scaled"] - current_variant["installs_scaled"]
-        ) / current_variant["installs_scaled"]
-        message = f"""- Variant {variant['name']}:
-            installs={variant['installs']} 
+            variant.installs_scaled - current_variant.installs_scaled
+        ) / current_variant.installs_scaled
+        message = f"""- Variant {variant.name}:
+            installs={variant.installs} 
             conversion_improvement={round(conversion_improvement*100,2)}
         """
         if conversion_improvement <= cvr:
@@ -92,20 +94,20 @@ def experiment_1000_installs_kill(experiment, experiment_settings):
         variant2 = variants[2]
 
         # Check if at least 1 variant installs > min_installs
-        if variant["installs"] < min_installs and variant2["installs"] < min_installs:
+        if variant.installs < min_installs and variant2.installs < min_installs:
             return False, f"Both variants installs < {min_installs}"
         conversion_improvement_variant1 = (
-            variant["installs_scaled"] - current_variant["installs_scaled"]
-        ) / current_variant["installs_scaled"]
+            variant.installs_scaled - current_variant.installs_scaled
+        ) / current_variant.installs_scaled
         conversion_improvement_variant2 = (
-            variant2["installs_scaled"] - current_variant["installs_scaled"]
-        ) / current_variant["installs_scaled"]
+            variant2.installs_scaled - current_variant.installs_scaled
+        ) / current_variant.installs_scaled
 
-        message = f"""- Variant {variant['name']}:
-            installs={variant['installs']} 
+        message = f"""- Variant {variant.name}:
+            installs={variant.installs} 
             conversion_improvement={round(conversion_improvement_variant1*100,2)}
-        - Variant {variant2['name']}:
-            installs={variant2['installs']}
+        - Variant {variant2.name}:
+            installs={variant2.installs}
             conversion_improvement={round(conversion_improvement_variant2*100,2)}
         """
         if (
@@ -123,28 +125,28 @@ def experiment_1000_installs_kill(experiment, experiment_settings):
 
         # Check if at least 1 variant installs < min_installs
         if (
-            variant["installs"] < min_installs
-            and variant2["installs"] < min_installs
-            and variant3["installs"] < min_installs
+            variant.installs < min_installs
+            and variant2.installs < min_installs
+            and variant3.installs < min_installs
         ):
             return False, f"One variants installs < {min_installs}"
         conversion_improvement_variant1 = (
-            variant["installs_scaled"] - current_variant["installs_scaled"]
-        ) / current_variant["installs_scaled"]
+            variant.installs_scaled - current_variant.installs_scaled
+        ) / current_variant.installs_scaled
         conversion_improvement_variant2 = (
-            variant2["installs_scaled"] - current_variant["installs_scaled"]
-        ) / current_variant["installs_scaled"]
+            variant2.installs_scaled - current_variant.installs_scaled
+        ) / current_variant.installs_scaled
         conversion_improvement_variant3 = (
-            variant3["installs_scaled"] - current_variant["installs_scaled"]
-        ) / current_variant["installs_scaled"]
-        message = f"""- Variant {variant['name']}:
-            installs={variant['installs']} 
+            variant3.installs_scaled - current_variant.installs_scaled
+        ) / current_variant.installs_scaled
+        message = f"""- Variant {variant.name}:
+            installs={variant.installs} 
             conversion_improvement={round(conversion_improvement_variant1*100,2)}
-        - Variant {variant2['name']}:
-            installs={variant2['installs']}
+        - Variant {variant2.name}:
+            installs={variant2.installs}
             conversion_improvement={round(conversion_improvement_variant2*100,2)} 
-        - Variant {variant3['name']}:
-            installs={variant3['installs']}
+        - Variant {variant3.name}:
+            installs={variant3.installs}
             conversion_improvement={round(conversion_improvement_variant3*100,2)} 
         """
 
@@ -159,30 +161,26 @@ def experiment_1000_installs_kill(experiment, experiment_settings):
         
 
 
-def send_win_notification_for_experiment(running_experiment : Dict, experiment_settings : ExperimentSettingsModel):
+def send_win_notification_for_experiment(running_experiment : ScrapedExperiment, experiment_settings : ExperimentSettingsModel):
     """
     Send a winning notification if applicable
     
     Args:
-        experiment_data (dict): Experiment data from Play Console
+        running_experiment (ScrapedExperiment): Experiment data from Play Console
         experiment_settings (ExperimentSettingsModel): Experiment settings from database
     """
     utils.logger.info("check if we can send a winning notification")
     messages = []
     win_notification = False
-    app_id = running_experiment["app_id"]
+    app_id = running_experiment.app_id
     sent_notifications = get_sent_wins(app_id)
 
-    experiment_name = running_experiment["experiment_name"]
+    experiment_name = running_experiment.experiment_name
     apply_setting = experiment_settings.apply_setting
-    start_time = running_experiment["start_time"]
+    start_time = running_experiment.start_time
     running_for_days = (datetime.now() - start_time).days
     
-    if running_experiment["status"] not in [
-                "More data needed",
-                "Not enough data",
-                "Current listing won",
-                "Draw"]:
+    if running_experiment.status not in NO_WINNER_RESULTS:
         try:
             advanced_1000_installs_kill, advanced_kill_message = experiment_1000_installs_kill(
                 running_experiment, experiment_settings
@@ -192,7 +190,7 @@ def send_win_notification_for_experiment(running_experiment : Dict, experiment_s
             advanced_1000_installs_kill = False
             advanced_kill_message = ""
 
-        winning_variant_name = running_experiment["status"].split(" won")[0]
+        winning_variant_name = running_experiment.status.split(" won")[0]
         # check if the same experiment notification has already been sent
         if sent_notifications.get(experiment_name) is not None:
             utils.logger.info(
@@ -207,7 +205,7 @@ def send_win_notification_for_experiment(running_experiment : Dict, experiment_s
         messages.append(
             f""":large_green_circle:  {experiment_name}
 Experiment has reached all the minimum thresholds.
-status={running_experiment['status']}
+status={running_experiment.status}
 apply_setting={apply_setting}
 running_for={running_for_days}
 min_days={experiment_settings.min_duration_days}
@@ -217,13 +215,13 @@ max_days={experiment_settings.max_duration_days}
 
     return win_notification, messages
 
-def process_running_experiments(running : List[Dict], app : AppModel, gpc : PlayConsoleDriver, session : Session):
+def process_running_experiments(running : List[ScrapedExperiment], app : AppSnapshot, gpc : PlayConsoleDriver, session : Session):
     """
     Process the running experiments
     
     Args:
-        running (List[Dict]): List of running experiments from Play Console
-        app (AppModel): App model instance
+        running (List[ScrapedExperiment]): List of running experiments from Play Console
+        app (AppSnapshot): App snapshot
         gpc (PlayConsoleDriver): Play Console driver instance
         session (Session): Database session
     """
@@ -233,13 +231,20 @@ def process_running_experiments(running : List[Dict], app : AppModel, gpc : Play
     number_of_applied = 0
     number_of_stopped = 0
 
+    # Load all the running experiments with their settings in one query
+    experiments_by_play_id = get_experiments_by_play_ids(
+        session,
+        app.id,
+        [r.experiment_id for r in running]
+    )
+
     for running_experiment in running:
         try:
-            experiment_name = running_experiment["experiment_name"]
-            experiment = session.query(ExperimentModel).filter(
-                ExperimentModel.app_id == app.id,
-                ExperimentModel.google_play_experiment_id == running_experiment["experiment_id"]
-            ).first()
+            experiment_name = running_experiment.experiment_name
+            experiment_id = running_experiment.experiment_id
+            experiment = None
+            if experiment_id and str(experiment_id).isdigit():
+                experiment = experiments_by_play_id.get(int(experiment_id))
             
             if not experiment:
                 utils.logger.info(f"Experiment {experiment_name} not found in database")
@@ -265,7 +270,7 @@ def process_running_experiments(running : List[Dict], app : AppModel, gpc : Play
                 # apply if experiment is winning
                 apply, applied_message = apply_winning_experiment(
                     running_experiment, 
-                    experiment.settings, 
+                    experiment, 
                     gpc, 
                     session
                 )
@@ -281,6 +286,13 @@ def process_running_experiments(running : List[Dict], app : AppModel, gpc : Play
                 f"Error in processing experiment {experiment_name} {str(e)}"
             )
             continue
+
+    # Persist the status changes of all the processed experiments at once
+    try:
+        with savepoint(session):
+            commit_changes(session)
+    except Exception as e:
+        utils.logger.error(f"Error saving running experiments statuses: {e}")
     
     if len(win_messages) > 0:
         win_messages.append("\n:alphabet-white-exclamation: Note: if auto send for review or auto publish are not set to on for your app, please action this manually")
@@ -394,7 +406,7 @@ def stop_losing_experiment(r, experiment, gpc, session):
     Stop experiment if it meets the stopping criteria
     
     Args:
-        r (dict): Experiment data from Play Console
+        r (ScrapedExperiment): Experiment data from Play Console
         experiment (ExperimentModel): Experiment from database
         gpc (PlayConsoleDriver): Play Console driver instance
         session (Session): Database session
@@ -403,10 +415,10 @@ def stop_losing_experiment(r, experiment, gpc, session):
     experiment_settings = experiment.settings
     stop_decision = False
     messages = []
-    experiment_name = r["experiment_name"]
-    experiment_id = r["experiment_id"]
-    variants = r["variants"]
-    start_time = r["start_time"]
+    experiment_name = r.experiment_name
+    experiment_id = r.experiment_id
+    variants = r.variants
+    start_time = r.start_time
     running_for_days = (datetime.now() - start_time).days
     apply_setting = experiment_settings.apply_setting
 
@@ -435,7 +447,7 @@ def stop_losing_experiment(r, experiment, gpc, session):
                 messages.append(
                     f"""\n:red_circle:  Experiment: {experiment_name} 
     Stopped due to never apply setting: 
-    - status={r['status']} 
+    - status={r.status} 
     - running_for={running_for_days}
     - apply_setting={apply_setting}
     - min_days={experiment_settings.min_duration_days} 
@@ -449,20 +461,20 @@ def stop_losing_experiment(r, experiment, gpc, session):
             
             # Check total installs threshold
             if experiment_settings.apply_min_installs_experiment is not None:
-                total_installs = sum(variant["installs"] for variant in variants)
+                total_installs = sum(variant.installs for variant in variants)
                 if total_installs > experiment_settings.apply_min_installs_experiment:
                     apply_min_installs_experiment = True
                     
             # Check per-variant installs threshold
             if experiment_settings.apply_min_installs_variants is not None:
                 apply_min_installs_variants = all(
-                    variant["installs"] > experiment_settings.apply_min_installs_variants
+                    variant.installs > experiment_settings.apply_min_installs_variants
                     for variant in variants
                 )
 
             # Stop if conditions are met
             if (apply_min_installs_experiment and apply_min_installs_variants 
-                and r["status"] not in ["More data needed", "Not enough data", "Current listing won", "Draw"]):
+                and r.status not in NO_WINNER_RESULTS):
                 stop_res = gpc.stop_experiment(experiment_id)
                 if stop_res:
                     utils.logger.info(
@@ -470,18 +482,10 @@ def stop_losing_experiment(r, experiment, gpc, session):
                     )
                     stop_decision = True
                     
-                    # Update experiment status
-                    experiment = session.query(ExperimentModel).filter(
-                        ExperimentModel.experiment_name_auto_populated == experiment_name
-                    ).first()
-                    if experiment:
-                        experiment.status = ExperimentStatus.FINISHED
-                        session.commit()
-                    
                     messages.append(
                         f"""\n:red_circle:  Experiment: {experiment_name} 
     Stopped a Winning Experiment due to reaching min_days: 
-    - status={r['status']} 
+    - status={r.status} 
     - running_for={running_for_days}
     - apply_setting={apply_setting}
     - min_days={experiment_settings.min_duration_days} 
@@ -491,26 +495,26 @@ def stop_losing_experiment(r, experiment, gpc, session):
     # Handle win apply setting
     if apply_setting == ApplySetting.WIN:
         if (running_for_days >= experiment_settings.min_duration_days 
-            and r["status"] in ["Current listing won", "Draw"]):
+            and r.status in ["Current listing won", "Draw"]):
             apply_min_installs_experiment = False
             apply_min_installs_variants = False
             
             # Check total installs threshold
             if experiment_settings.apply_min_installs_experiment is not None:
-                total_installs = sum(variant["installs"] for variant in variants)
+                total_installs = sum(variant.installs for variant in variants)
                 if total_installs > experiment_settings.apply_min_installs_experiment:
                     apply_min_installs_experiment = True
                     
             # Check per-variant installs threshold
             if experiment_settings.apply_min_installs_variants is not None:
                 apply_min_installs_variants = all(
-                    variant["installs"] > experiment_settings.apply_min_installs_variants
+                    variant.installs > experiment_settings.apply_min_installs_variants
                     for variant in variants
                 )
 
             # Stop if conditions are met
             if (apply_min_installs_experiment and apply_min_installs_variants 
-                and r["status"] not in ["More data needed", "Not enough data", "Current listing won", "Draw"]):
+                and r.status not in NO_WINNER_RESULTS):
                 stop_res = gpc.stop_experiment(experiment_id)
                 if stop_res:
                     utils.logger.info(
@@ -521,7 +525,7 @@ def stop_losing_experiment(r, experiment, gpc, session):
                     messages.append(
                         f"""\n:red_circle:  Experiment: {experiment_name} 
     Stopped a Draw Experiment due to reaching min_days: 
-    - status={r['status']} 
+    - status={r.status} 
     - running_for={running_for_days}
     - apply_setting={apply_setting}
     - min_days={experiment_settings.min_duration_days} 
@@ -530,13 +534,13 @@ def stop_losing_experiment(r, experiment, gpc, session):
 
     # Stop experiment if conditions are met
     if (
-        (r["status"] in ["More data needed", "Not enough data", "Current listing won", "Draw"]
+        (r.status in NO_WINNER_RESULTS
          and running_for_days >= experiment_settings.max_duration_days)
         or performance_kill
         or advanced_1000_installs_kill
     ):
         utils.logger.info(
-            f"\nStop experiment {experiment_name} result={r['status']} running_for={running_for_days} days max={experiment_settings.max_duration_days}\n{r}"
+            f"Stop experiment {experiment_name} result={r.status} running_for={running_for_days} days max={experiment_settings.max_duration_days}"
         )
         
         stop_result = gpc.stop_experiment(experiment_id)
@@ -548,10 +552,10 @@ def stop_losing_experiment(r, experiment, gpc, session):
             stop_decision = True
             
             # Add appropriate message based on stop reason
-            if r["status"] in ["Current listing won", "Draw"]:
+            if r.status in ["Current listing won", "Draw"]:
                 messages.append(
                     f"""\n:red_circle:  Experiment: {experiment_name} 
-Killed due to: {r['status']} 
+Killed due to: {r.status} 
 - running_for={running_for_days} 
 - min_days={experiment_settings.min_duration_days} 
 - max_days={experiment_settings.max_duration_days}"""
@@ -577,9 +581,9 @@ Killed due to: Early kill rules
 """
                 )
     # stop experiment if loss of stopp
-    elif r["status"] == "Current listing won" or experiment.status == ExperimentStatus.STOPPING:
+    elif r.status == "Current listing won" or experiment.status == ExperimentStatus.STOPPING:
         utils.logger.info(
-            f"\nStop experiment {experiment_name} result={r['status']} running_for={running_for_days} days max={experiment_settings.max_duration_days} status={experiment.status} \n{r}"
+            f"Stop experiment {experiment_name} result={r.status} running_for={running_for_days} days max={experiment_settings.max_duration_days} status={experiment.status}"
         )
         # stop experiment in the console
         stop_result = gpc.stop_experiment(experiment_id)
@@ -587,49 +591,46 @@ Killed due to: Early kill rules
             stop_decision = True
             messages.append(
                 f"""\n:red_circle:  Experiment: {experiment_name} 
-Killed due to: {r['status']} 
+Killed due to: {r.status} 
 - running_for={running_for_days} 
 - min_days={experiment_settings.min_duration_days} 
 - max_days={experiment_settings.max_duration_days}"""
             )
     else:
         utils.logger.info(
-            f"Experiment {experiment_name} status={r['status']} running_for={running_for_days} days"
+            f"Experiment {experiment_name} status={r.status} running_for={running_for_days} days"
         )
     
     if stop_decision:
-        # Update experiment status
-        experiment = session.query(ExperimentModel).filter(
-            ExperimentModel.google_play_experiment_id == experiment_id
-        ).first()
-        if experiment:
-            experiment.status = ExperimentStatus.FINISHED
-            session.commit()
+        # Record the stop right away, it is already done in the console
+        experiment.status = ExperimentStatus.FINISHED
+        checkpoint(session, f"stopped {experiment_name}")
 
     return stop_decision, messages
 
 
 
 
-def apply_winning_experiment(r, experiment_settings, gpc, session):
+def apply_winning_experiment(r, experiment, gpc, session):
     """
     Apply winning experiment if conditions are met
     
     Args:
-        r (dict): Experiment data from Play Console
-        experiment_settings (ExperimentSettingsModel): Experiment settings from database
+        r (ScrapedExperiment): Experiment data from Play Console
+        experiment (ExperimentModel): Experiment from database
         gpc (PlayConsoleDriver): Play Console driver instance
         session (Session): Database session
     """
     utils.logger.info("check if we can apply the experiment")
+    experiment_settings = experiment.settings
     messages = []
     apply_decision = False
     
-    variants = r["variants"]
-    experiment_name = r["experiment_name"]
-    experiment_id = r["experiment_id"]
+    variants = r.variants
+    experiment_name = r.experiment_name
+    experiment_id = r.experiment_id
     apply_setting = experiment_settings.apply_setting
-    start_time = r["start_time"]
+    start_time = r.start_time
     running_for_days = (datetime.now() - start_time).days
     max_percentile = 0
     max_variant_name = ""
@@ -637,18 +638,18 @@ def apply_winning_experiment(r, experiment_settings, gpc, session):
     # Check apply type
     if apply_setting == ApplySetting.WIN:
         # Skip if not a win
-        if r["status"] in ["More data needed", "Not enough data", "Current listing won", "Draw"]:
+        if r.status in NO_WINNER_RESULTS:
             return apply_decision, messages
             
         # Check variant install thresholds
         if experiment_settings.apply_min_installs_variants is not None:
-            if any(variant["installs"] < experiment_settings.apply_min_installs_variants 
+            if any(variant.installs < experiment_settings.apply_min_installs_variants 
                   for variant in variants):
                 return apply_decision, messages
                 
         # Check total installs threshold
         if experiment_settings.apply_min_installs_experiment is not None:
-            total_installs = sum(variant["installs"] for variant in variants)
+            total_installs = sum(variant.installs for variant in variants)
             if total_installs < experiment_settings.apply_min_installs_experiment:
                 return apply_decision, messages
                 
@@ -664,36 +665,27 @@ def apply_winning_experiment(r, experiment_settings, gpc, session):
             
         # Check variant install thresholds
         if experiment_settings.apply_min_installs_variants is not None:
-            if any(variant["installs"] < experiment_settings.apply_min_installs_variants 
+            if any(variant.installs < experiment_settings.apply_min_installs_variants 
                   for variant in variants):
                 return apply_decision, messages
                 
         # Check total installs threshold
         if experiment_settings.apply_min_installs_experiment is not None:
-            total_installs = sum(variant["installs"] for variant in variants)
+            total_installs = sum(variant.installs for variant in variants)
             if total_installs < experiment_settings.apply_min_installs_experiment:
                 return apply_decision, messages
                 
-        # Calculate percentiles
+        # Find the best variant percentile
         for variant in variants:
-            try:
-                variant["percentile"] = variant["performance_end"] / (
-                    abs(variant["performance_start"]) + abs(variant["performance_end"])
-                )
-            except ZeroDivisionError:
-                variant["percentile"] = 0
-
-            if variant["percentile"] > max_percentile:
-                max_percentile = variant["percentile"]
-                max_variant_name = variant["name"]
+            if variant.percentile > max_percentile:
+                max_percentile = variant.percentile
+                max_variant_name = variant.name
                 
         # Check percentile threshold
-        if (variant["percentile"] == max_percentile and 
-            variant["percentile"] >= experiment_settings.apply_on_percentile.value / 100):
+        if (variant.percentile == max_percentile and 
+            variant.percentile >= experiment_settings.apply_on_percentile.value / 100):
             utils.logger.info(
-                "Applying experiment on percentile",
-                variant["percentile"],
-                experiment_settings.apply_on_percentile
+                f"Applying experiment on percentile {variant.percentile} {experiment_settings.apply_on_percentile}"
             )
             winning_variant_name = max_variant_name
         else:
@@ -710,14 +702,14 @@ def apply_winning_experiment(r, experiment_settings, gpc, session):
         return apply_decision, messages
 
     utils.logger.info(
-        f"Applying experiment {experiment_name} {apply_setting} running_for={running_for_days} days max={experiment_settings.max_duration_days}\n{r}"
+        f"Applying experiment {experiment_name} {apply_setting} running_for={running_for_days} days max={experiment_settings.max_duration_days}"
     )
     
     # Get winning variant name
-    if "won" in r["status"]:
-        winning_variant_name = r["status"].split(" won")[0]
+    if "won" in r.status:
+        winning_variant_name = r.status.split(" won")[0]
     else:
-        print(f"Winning variant name not found {winning_variant_name}, {r['status']}")
+        utils.logger.warning(f"Winning variant name not found {winning_variant_name}, {r.status}")
 
     # Apply experiment
     res = gpc.apply_experiment(experiment_id, winning_variant_name)
@@ -727,13 +719,9 @@ def apply_winning_experiment(r, experiment_settings, gpc, session):
         apply_decision = True
         utils.logger.info(f"Experiment {experiment_name} applied")
         
-        # Update experiment status
-        experiment = session.query(ExperimentModel).filter(
-            ExperimentModel.experiment_name_auto_populated == experiment_name
-        ).first()
-        if experiment:
-            experiment.status = ExperimentStatus.FINISHED
-            session.commit()
+        # Record the apply right away, it is already done in the console
+        experiment.status = ExperimentStatus.FINISHED
+        checkpoint(session, f"applied {experiment_name}")
         
         # Add success message
         messages.append(
@@ -742,7 +730,7 @@ winning_variant_name={winning_variant_name} percentile={max_percentile} apply_on
         )
     else:
         utils.logger.info(
-            f"Experiment {experiment_name} status={r['status']} running_for={running_for_days} days could not be applied"
+            f"Experiment {experiment_name} status={r.status} running_for={running_for_days} days could not be applied"
         )
         
     return apply_decision, messages
\ No newline at end of file
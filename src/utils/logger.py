@@ -1,5 +1,30 @@
+"""
+Logging of the automation
+
+Every module logs through the one shared logger. Records are handed to a
+queue and written by a listener thread, so logging never blocks on the
+console or the disk:
+
+- the console gets a line per record, coloured only when it is a terminal
+- LOG_DIR/FILE_NAME gets a JSON object per line, rotated at MAX_BYTES
+
+The app being processed is added to every record from a contextvar, see
+set_app_context. Levels are set per module with MODULE_LEVELS, eg:
+LOG_MODULE_LEVELS="src.clients.play_console_driver=DEBUG,src.utils.helpers=WARNING".
+"""
+import atexit
+import json
 import logging
-from datetime import datetime
+import logging.handlers
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from src.config.settings import LOGGING
 
 # ANSI escape sequences for colors
 COLORS = {
@@ -11,6 +36,15 @@ COLORS = {
     "ENDC": "\033[0m",  # Reset to default
 }
 
+CONSOLE_FORMAT = "%(levelname)s|%(module_name)s:%(lineno)s|%(app)s|%(asctime)s| %(message)s"
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# App of the records logged by the current thread or task
+_app_context: ContextVar[str] = ContextVar("app_context", default="")
+_listener: Optional[logging.handlers.QueueListener] = None
+_module_names: Dict[str, str] = {}
+
 
 class ColorFormatter(logging.Formatter):
     def format(self, record):
@@ -19,45 +53,125 @@ class ColorFormatter(logging.Formatter):
         return f"{COLORS.get(levelname, '')}{message}{COLORS['ENDC']}"
 
 
-def get_logger(app_package):
-    # Create a custom logger
-    logger = logging.getLogger(f"{app_package}_logger")
-    logger.setLevel(logging.DEBUG)
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "module": record.module_name,
+            "line": record.lineno,
+            "app": record.app,
+            "pid": record.process,
+            "message": record.getMessage(),
+        }
+        return json.dumps(entry, default=str)
+
+
+def _module_name(pathname: str) -> str:
+    """Dotted module name of a source file, eg: src.utils.helpers"""
+    name = _module_names.get(pathname)
+    if name is None:
+        path = os.path.relpath(os.path.splitext(pathname)[0], ROOT_DIR)
+        name = _module_names[pathname] = path.replace(os.sep, ".") if not path.startswith("..") else os.path.basename(path)
+    return name
+
+
+def _parse_levels(levels: str) -> Dict[str, int]:
+    """Parse "module=LEVEL,..." into levels by module prefix"""
+    parsed = {}
+    for item in filter(None, (item.strip() for item in levels.split(","))):
+        module, _, level = item.partition("=")
+        parsed[module.strip()] = logging.getLevelName(level.strip().upper())
+    return parsed
+
+
+class ContextFilter(logging.Filter):
+    """
+    Add the app context and the module name to the records, and drop the
+    records below the level of their module
+    """
+
+    def __init__(self, default_level: int, module_levels: Dict[str, int]):
+        super().__init__()
+        self.default_level = default_level
+        # Longest prefix first, the most specific level wins
+        self.module_levels = sorted(module_levels.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        record.app = _app_context.get()
+        record.module_name = _module_name(record.pathname)
+        level = self.default_level
+        for module, module_level in self.module_levels:
+            if record.module_name == module or record.module_name.startswith(f"{module}."):
+                level = module_level
+                break
+        return record.levelno >= level
+
+
+def _log_file() -> str:
+    path = os.path.join(LOGGING['LOG_DIR'], LOGGING['FILE_NAME'])
+    # Workers write their own file, a rotation is never raced by another process.
+    # The process name is already set when a spawned worker imports this module.
+    if multiprocessing.current_process().name != "MainProcess":
+        base, extension = os.path.splitext(path)
+        path = f"{base}.{os.getpid()}{extension}"
+    return path
+
+
+def _setup(logger: logging.Logger) -> None:
+    """Route the logger through a queue to the console and the JSON lines file"""
+    global _listener
+    default_level = logging.getLevelName(LOGGING['DEFAULT_LEVEL'].upper())
+    module_levels = _parse_levels(LOGGING['MODULE_LEVELS'])
+
+    console = logging.StreamHandler()
+    formatter_class = ColorFormatter if sys.stderr.isatty() else logging.Formatter
+    console.setFormatter(formatter_class(CONSOLE_FORMAT))
+
+    os.makedirs(LOGGING['LOG_DIR'], exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        _log_file(), maxBytes=LOGGING['MAX_BYTES'], backupCount=LOGGING['BACKUP_COUNT'], encoding="utf-8"
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(ContextFilter(default_level, module_levels))
+    logger.addHandler(queue_handler)
+    # Records below every configured level are not even created
+    logger.setLevel(min([default_level, *module_levels.values()]))
     logger.propagate = False
-    # get date and time for the log file with hour and minute only
-    date = datetime.now().strftime("%Y-%m-%d_%H-%M")
-
-    # Check if the logger already has handlers
-    if not logger.handlers:  # If no handlers, add them
-        # Create console handler with a higher log level
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.DEBUG)
-
-        # Create formatter and add it to the handlers
-        formatter = ColorFormatter(
-            "%(levelname)s|%(pathname)s|%(lineno)s|%(name)s|%(asctime)s| %(message)s"
-        )
-        ch.setFormatter(formatter)
-
-        # Add the handlers to the logger
-        logger.addHandler(ch)
-
-        # Create a file handler object
-        handler = logging.FileHandler(f"/tmp/pressplay_{app_package}_{date}.log")
-        # Create a formatter
-        formatter = logging.Formatter(
-            "%(levelname)s|%(pathname)s|%(lineno)s|%(name)s|%(asctime)s| %(message)s"
-        )
-
-        # Set the formatter to the handler
-        handler.setFormatter(formatter)
-
-        # Add the handler to the logger
-        logger.addHandler(handler)
-        logger.setLevel(logging.DEBUG)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, console, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    # Worker processes do not run atexit, their finalizers run last instead
+    multiprocessing.util.Finalize(None, stop_logging, exitpriority=-100)
+
+
+def stop_logging() -> None:
+    """Write the queued records and close the handlers, called at exit"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def set_app_context(app_package: Optional[str]) -> None:
+    """Tag the next records of the current thread or task with an app, None to clear it"""
+    _app_context.set(app_package or "")
+
+
+def get_logger() -> logging.Logger:
+    """Get the shared logger, the app of the records is set with set_app_context"""
+    logger = logging.getLogger("pressplay_logger")
+    if not logger.handlers:
+        _setup(logger)
     return logger
 
 
 # shared config for logger across all modules
-logger_app_package = "pressplay"
-logger = get_logger(logger_app_package)
+logger = get_logger()
@@ -0,0 +1,120 @@
+"""
+Token bucket pacing of the Play Console navigations
+
+Each Google account gets a bucket of NAVIGATIONS_PER_MINUTE tokens per
+minute, up to BURST tokens saved while idle. Every navigation takes a token
+and waits only when the bucket is empty, instead of sleeping a fixed time.
+
+With a state directory the bucket is kept in a file locked with fcntl, so
+every process of the host, eg: the --workers processes or several worker.py,
+shares the budget of the account.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from src.config.settings import PACING
+import src.utils.logger as logger
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows, the buckets are per process there
+    fcntl = None
+
+logger = logger.logger
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket, optionally shared between processes through a state file
+
+    A token is reserved as soon as acquire is called and the wait happens
+    outside of the locks, so concurrent callers queue up in order.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, state_file: Optional[str] = None):
+        """
+        Args:
+            rate_per_minute: Tokens added per minute
+            burst: Most tokens the bucket holds
+            state_file: File shared by the processes using the bucket, None for this process only
+        """
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.state_file = state_file if fcntl is not None else None
+        self.tokens = float(burst)
+        self.updated = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 1) -> float:
+        """
+        Take tokens, waiting until they are available
+
+        Returns:
+            Seconds waited
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            if self.state_file:
+                wait = self._reserve_shared(tokens)
+            else:
+                wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def _reserve(self, tokens: int) -> float:
+        # Refill, then take the tokens, a negative balance is the queue of waiting callers
+        now = time.time()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate) - tokens
+        self.updated = now
+        return max(0.0, -self.tokens / self.rate)
+
+    def _reserve_shared(self, tokens: int) -> float:
+        with open(self.state_file, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                    self.tokens, self.updated = float(state["tokens"]), float(state["updated"])
+                except (ValueError, KeyError, TypeError):
+                    self.tokens, self.updated = float(self.burst), time.time()
+                wait = self._reserve(tokens)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps({"tokens": self.tokens, "updated": self.updated}))
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+        return wait
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def get_pacer(account: Optional[str]) -> TokenBucket:
+    """
+    Get the navigation bucket of a Google account, shared by the processes of the host
+    if PACING['STATE_DIR'] is set
+
+    Args:
+        account: Google account email
+
+    Returns:
+        The account bucket
+    """
+    key = hashlib.sha1((account or "").encode("utf-8")).hexdigest()[:16]
+    with _buckets_lock:
+        if key not in _buckets:
+            state_file = None
+            if PACING['STATE_DIR']:
+                os.makedirs(PACING['STATE_DIR'], exist_ok=True)
+                state_file = os.path.join(PACING['STATE_DIR'], f"pressplay_pacing_{key}.json")
+            _buckets[key] = TokenBucket(PACING['NAVIGATIONS_PER_MINUTE'], PACING['BURST'], state_file)
+            logger.info(f"Pacing {PACING['NAVIGATIONS_PER_MINUTE']} navigations per minute, shared={state_file is not None}")
+        return _buckets[key]
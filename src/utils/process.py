@@ -0,0 +1,66 @@
+"""
+Memory of the process and the processes it started, eg: the Playwright driver and Chrome
+
+The resident memory is read from /proc, so it is only measured on Linux.
+"""
+import os
+from typing import Dict, List, Optional
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _read_stat(pid: int) -> Optional[List[str]]:
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name may hold spaces, the fields after it start at its closing parenthesis
+    return stat[stat.rfind(")") + 2:].split()
+
+
+def get_descendants(pid: int) -> List[int]:
+    """Get the processes started by a process, directly or not"""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        fields = _read_stat(int(entry))
+        if fields:
+            children.setdefault(int(fields[1]), []).append(int(entry))
+
+    descendants = []
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        descendants.append(child)
+        pending.extend(children.get(child, []))
+    return descendants
+
+
+def get_rss(pid: Optional[int] = None) -> int:
+    """Get the resident memory of a process in bytes, 0 if it cannot be read"""
+    fields = _read_stat(pid or os.getpid())
+    if not fields:
+        return 0
+    # rss is the 24th field of /proc/pid/stat, the 22nd after the command name
+    return int(fields[21]) * _PAGE_SIZE
+
+
+def get_tree_rss(pid: Optional[int] = None) -> int:
+    """
+    Get the resident memory of a process and all its descendants in bytes
+
+    The memory shared by the Chrome processes is counted in each of them, so
+    the sum is an upper bound.
+
+    Args:
+        pid: Process ID, defaults to the current process
+
+    Returns:
+        The summed RSS, 0 where /proc is not available
+    """
+    pid = pid or os.getpid()
+    if not os.path.isdir("/proc"):
+        return 0
+    return get_rss(pid) + sum(get_rss(child) for child in get_descendants(pid))
@@ -0,0 +1,260 @@
+"""
+Nested timing spans of the runs: publisher, app, stage, driver method, navigation and wait
+
+A span times its block and is written as a JSON line once it ends, with the
+span that was open when it started as its parent:
+
+    with span("app", "app", app=app.package_id):
+        with span("running_scrape"):
+            gpc.get_running_experiments(csls)
+
+The spans of every process of a run share the trace ID and are written to
+the file of the trace. The pool workers send the totals of their spans back
+with each result, see take_stats and merge_stats, so the summary printed at
+the end of the run, and the optional Prometheus textfile, cover the worker
+processes too.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+from src.config.settings import TRACING
+import src.utils.logger as logger
+
+logger = logger.logger
+
+# Span kinds, from the outermost
+PUBLISHER = "publisher"
+APP = "app"
+STAGE = "stage"
+DRIVER = "driver"
+NAVIGATION = "navigation"
+WAIT = "wait"
+
+
+@dataclass
+class SpanStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    errors: int = 0
+
+    def add(self, duration: float, error: bool) -> None:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.errors += int(error)
+
+
+# ID of the innermost open span of the current thread or task
+_current_span: ContextVar[Optional[str]] = ContextVar("current_span", default=None)
+_trace_id: Optional[str] = None
+# Totals of the spans ended in this process, by (kind, name)
+_stats: Dict[Tuple[str, str], SpanStats] = {}
+_lock = threading.Lock()
+
+
+def start_trace(trace_id: Optional[str] = None) -> str:
+    """
+    Start the trace of a run, or join the trace of the main process in a worker
+
+    Args:
+        trace_id: Trace ID to join, eg: the journal run ID, defaults to a new one
+
+    Returns:
+        The trace ID
+    """
+    global _trace_id
+    trace_id = trace_id or uuid.uuid4().hex
+    if trace_id != _trace_id:
+        with _lock:
+            _stats.clear()
+        if TRACING['DIR']:
+            _remove_old_traces(trace_id)
+    _trace_id = trace_id
+    return _trace_id
+
+
+def get_trace_path(trace_id: str) -> str:
+    """Get the JSON lines file of the spans of a trace"""
+    return os.path.join(TRACING['DIR'], f"{trace_id}.jsonl")
+
+
+def _remove_old_traces(trace_id: str) -> None:
+    """Remove the oldest trace files, keeping KEEP with the one of the trace started"""
+    try:
+        os.makedirs(TRACING['DIR'], exist_ok=True)
+        current = get_trace_path(trace_id)
+        paths = [
+            entry.path for entry in os.scandir(TRACING['DIR'])
+            if entry.name.endswith(".jsonl") and entry.path != current
+        ]
+    except OSError as e:
+        logger.debug(f"trace_cleanup_error {str(e)}")
+        return
+    paths.sort(key=lambda path: os.stat(path).st_mtime if os.path.exists(path) else 0)
+    for path in paths[:max(len(paths) - TRACING['KEEP'] + 1, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            # Removed meanwhile by another process of the run
+            pass
+
+
+def get_trace_id() -> Optional[str]:
+    """Get the trace ID of the current run, None before start_trace"""
+    return _trace_id
+
+
+@contextmanager
+def span(name: str, kind: str = STAGE, **attributes) -> Iterator[None]:
+    """
+    Time a block as a span nested in the current one
+
+    Args:
+        name: Span name, eg: "running_scrape" or a driver method
+        kind: Span kind, eg: APP, STAGE or WAIT
+        **attributes: Extra JSON values written with the span, eg: app="com.foo"
+    """
+    span_id = uuid.uuid4().hex[:16]
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    started_at = datetime.now(timezone.utc)
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        _current_span.reset(token)
+        with _lock:
+            _stats.setdefault((kind, name), SpanStats()).add(duration, error is not None)
+        _write({
+            "trace": _trace_id,
+            "span": span_id,
+            "parent": parent_id,
+            "kind": kind,
+            "name": name,
+            "start": started_at.isoformat(),
+            "duration": round(duration, 6),
+            "error": error,
+            "pid": os.getpid(),
+            **attributes,
+        })
+
+
+def traced(name: Optional[str] = None, kind: str = DRIVER) -> Callable:
+    """Decorator timing every call of a function as a span, named after the function by default"""
+    def decorator(function: Callable) -> Callable:
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def sleep(seconds: float, name: str = "sleep") -> None:
+    """time.sleep timed as a WAIT span"""
+    with span(name, WAIT, seconds=seconds):
+        time.sleep(seconds)
+
+
+def _write(record: Dict) -> None:
+    if not TRACING['DIR'] or _trace_id is None:
+        return
+    try:
+        # One append per line, the lines of the worker processes do not interleave
+        with open(get_trace_path(_trace_id), "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+    except OSError as e:
+        logger.debug(f"trace_write_error {str(e)}")
+
+
+def get_stats() -> Dict[Tuple[str, str], SpanStats]:
+    """Get the totals of the spans ended in this process, and merged from the workers, by (kind, name)"""
+    with _lock:
+        return {key: SpanStats(s.count, s.total, s.max, s.errors) for key, s in _stats.items()}
+
+
+def take_stats() -> Dict[Tuple[str, str], SpanStats]:
+    """Get the span totals of this process and reset them, eg: in a worker after each task"""
+    global _stats
+    with _lock:
+        stats, _stats = _stats, {}
+    return stats
+
+
+def merge_stats(stats: Iterable[Optional[Dict[Tuple[str, str], SpanStats]]]) -> None:
+    """Add span totals taken in other processes to the totals of this process"""
+    with _lock:
+        for process_stats in stats:
+            for key, s in (process_stats or {}).items():
+                total = _stats.setdefault(key, SpanStats())
+                total.count += s.count
+                total.total += s.total
+                total.max = max(total.max, s.max)
+                total.errors += s.errors
+
+
+def format_summary(stats: Dict[Tuple[str, str], SpanStats], limit: int = 40) -> str:
+    """Format span totals as a table, the longest first"""
+    rows = sorted(stats.items(), key=lambda item: item[1].total, reverse=True)[:limit]
+    lines = [f"{'kind':<11}{'name':<40}{'count':>7}{'total s':>11}{'mean s':>9}{'max s':>9}{'errors':>8}"]
+    for (kind, name), s in rows:
+        lines.append(
+            f"{kind:<11}{name[:39]:<40}{s.count:>7}{s.total:>11.1f}{s.total / s.count:>9.2f}{s.max:>9.2f}{s.errors:>8}"
+        )
+    return "\n".join(lines)
+
+
+def write_prometheus(stats: Dict[Tuple[str, str], SpanStats], path: str) -> None:
+    """
+    Write span totals in the Prometheus text format, eg: for the node exporter textfile collector
+
+    The file is replaced at once so the collector never reads it half written.
+    """
+    metrics = (
+        ("pressplay_span_seconds", "Time spent in the spans of the last run", lambda s: s.total),
+        ("pressplay_span_count", "Spans of the last run", lambda s: s.count),
+        ("pressplay_span_max_seconds", "Longest span of the last run", lambda s: s.max),
+        ("pressplay_span_errors", "Spans of the last run ended by an exception", lambda s: s.errors),
+    )
+    # Gauges, the values are replaced by each run
+    lines = []
+    for metric, help_text, value in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for (kind, name), s in sorted(stats.items()):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{metric}{{kind="{kind}",name="{label}"}} {value(s):g}')
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def finish_trace() -> None:
+    """Log the summary of the run spans and export them to the Prometheus textfile, if set"""
+    stats = get_stats()
+    if not stats:
+        return
+    logger.info(f"Run {_trace_id} timings\n{format_summary(stats)}")
+    if TRACING['PROMETHEUS_TEXTFILE']:
+        try:
+            write_prometheus(stats, TRACING['PROMETHEUS_TEXTFILE'])
+        except OSError as e:
+            logger.error(f"Failed to write the Prometheus textfile {str(e)}")
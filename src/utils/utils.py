@@ -15,7 +15,7 @@ def get_target_csls(sheets, app_package):
                 csls[row["name"].strip()] = [row["locale"].split(" – ")[-1].strip()]
             else:
                 csls[row["name"].strip()].append(row["locale"].split(" – ")[-1].strip())
-    logger.info(csls)
+    logger.info(f"CSLs found {len(csls)} for {app_package}")
     return csls
 
 
@@ -0,0 +1,115 @@
+"""
+Wall-clock time budgets for the app and its browser stages
+
+A budget is enforced with SIGALRM: when it runs out, BudgetExceeded is
+raised in the code that is running, whatever it is blocked on, eg: a
+Playwright locator retried by a loop. BudgetExceeded is a BaseException so
+the broad `except Exception` of the driver steps do not swallow it.
+
+Budgets nest, the alarm is armed for the closest deadline:
+
+    with time_budget("APP"):
+        with time_budget("RUNNING_EXPERIMENTS"):
+            gpc.get_running_experiments(csls)
+
+SIGALRM only exists on Unix and is only delivered to the main thread,
+elsewhere the budgets are not enforced.
+"""
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+from src.config.settings import TIME_BUDGETS
+import src.utils.logger as logger
+
+logger = logger.logger
+
+
+class BudgetExceeded(BaseException):
+    """Raised in the running code when its time budget runs out"""
+
+    def __init__(self, name: str, seconds: float):
+        super().__init__(f"{name} time budget of {seconds:g}s exceeded")
+        self.name = name
+        self.seconds = seconds
+
+
+@dataclass
+class _Budget:
+    name: str
+    seconds: float
+    deadline: float
+    expired: bool = False
+
+
+# Active budgets of the main thread, innermost last
+_budgets: List[_Budget] = []
+_previous_handler = None
+
+
+def _can_alarm() -> bool:
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+def _arm() -> None:
+    """Arm the alarm for the closest deadline not expired yet, disarm it if none"""
+    pending = [budget.deadline for budget in _budgets if not budget.expired]
+    if pending:
+        signal.setitimer(signal.ITIMER_REAL, max(min(pending) - time.monotonic(), 0.001))
+    else:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _on_alarm(signum, frame) -> None:
+    now = time.monotonic()
+    expired = [budget for budget in _budgets if not budget.expired and budget.deadline <= now]
+    if not expired:
+        # Early wake up, eg: the alarm was armed for a budget that ended meanwhile
+        _arm()
+        return
+    # Raised once, the outer budgets keep running while it unwinds
+    budget = min(expired, key=lambda budget: budget.deadline)
+    budget.expired = True
+    _arm()
+    raise BudgetExceeded(budget.name, budget.seconds)
+
+
+def get_budget(name: str) -> Optional[float]:
+    """Get the configured seconds of a budget, None if it is not limited"""
+    return TIME_BUDGETS.get(name) or None
+
+
+@contextmanager
+def time_budget(name: str, seconds: Optional[float] = None) -> Iterator[None]:
+    """
+    Raise BudgetExceeded in the block if it runs longer than its budget
+
+    Args:
+        name: Budget name, eg: "APP" or a stage, used for the logs
+        seconds: Budget, defaults to TIME_BUDGETS[name], no limit if None or 0
+    """
+    global _previous_handler
+    seconds = seconds if seconds is not None else get_budget(name)
+    if not seconds or not _can_alarm():
+        yield
+        return
+
+    budget = _Budget(name, seconds, time.monotonic() + seconds)
+    if not _budgets:
+        _previous_handler = signal.signal(signal.SIGALRM, _on_alarm)
+    _budgets.append(budget)
+    _arm()
+    try:
+        yield
+    finally:
+        _budgets.remove(budget)
+        if _budgets:
+            _arm()
+        else:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, _previous_handler or signal.SIG_DFL)
+            _previous_handler = None
+        if budget.expired:
+            logger.error(f"Time budget {name} of {seconds:g}s exceeded")
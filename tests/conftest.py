@@ -0,0 +1,131 @@
+"""
+Fixtures of a scratch SQLite database file with the tables created
+
+A file, not an in-memory database, so worker processes can open it too.
+"""
+from typing import List, Optional
+
+import pytest
+from sqlalchemy import event, func, select
+
+from src.database.connection import Base, Database
+from src.modules.app.models import AppModel
+from src.modules.app.schemas import AppStatus
+from src.modules.experiment.models import ExperimentModel, ExperimentSettingsModel
+from src.modules.experiment.schemas import (
+    ApplyOnPercentile, ApplySetting, AssetType, ConfidenceIntervalEnum, ExperimentStatus, ExperimentType,
+    MinimumDetectableEffectEnum, TargetMetric,
+)
+from src.modules.organization.models import OrganizationModel
+from src.modules.publisher.models import PublisherModel
+from src.modules.publisher.schemas import PublisherStatus
+# Every mapped model must be registered before create_all
+from src.modules.publishing_overview.models import PublishingOverviewModel  # noqa: F401
+from src.modules.previous_experiment.models import PreviousExperimentModel  # noqa: F401
+from src.modules.job.models import JobModel  # noqa: F401
+
+
+@pytest.fixture
+def database_url(tmp_path) -> str:
+    return f"sqlite:///{tmp_path / 'pressplay.db'}"
+
+
+@pytest.fixture
+def database(database_url) -> Database:
+    database = Database(database_url)
+    Base.metadata.create_all(database.engine)
+    yield database
+    database.dispose()
+
+
+@pytest.fixture
+def session(database):
+    with database.session() as session:
+        yield session
+
+
+@pytest.fixture
+def writes(database) -> List:
+    """Capture the (statement, parameters) of the INSERT, UPDATE and DELETE sent to the database"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+            statements.append((statement, parameters))
+
+    event.listen(database.engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(database.engine, "before_cursor_execute", capture)
+
+
+def _add_apps(session, count: int) -> List[AppModel]:
+    """Insert an active publisher with count active apps"""
+    organization = OrganizationModel(name="tests")
+    session.add(organization)
+    session.flush()
+    publisher = PublisherModel(
+        organization_id=organization.id, name="tests", link_code="tests",
+        status=PublisherStatus.ACTIVE, play_console_id=1, dataset="tests",
+    )
+    session.add(publisher)
+    session.flush()
+    apps = [
+        AppModel(
+            publisher_id=publisher.id, name=f"app {i}", abbreviation=f"T{i}",
+            package_id=f"com.pressplay.tests.app{i}", play_console_id=str(i + 1), status=AppStatus.ACTIVE,
+        )
+        for i in range(count)
+    ]
+    session.add_all(apps)
+    session.commit()
+    return apps
+
+
+@pytest.fixture
+def add_apps():
+    return _add_apps
+
+
+@pytest.fixture
+def apps(session) -> List[AppModel]:
+    return _add_apps(session, 3)
+
+
+def _add_experiment(
+    session,
+    app: AppModel,
+    status: ExperimentStatus,
+    play_experiment_id: Optional[int] = None,
+    csl_id: str = "1",
+    locale_id: str = "1",
+) -> ExperimentModel:
+    """Insert an experiment of an app, with settings of 7 to 28 days"""
+    settings = session.scalars(select(ExperimentSettingsModel)).first()
+    if settings is None:
+        settings = ExperimentSettingsModel(
+            apply_setting=ApplySetting.WIN, apply_on_percentile=ApplyOnPercentile.PERCENTILE_75,
+            apply_min_installs_variants=100, apply_min_installs_experiment=1000,
+            min_duration_days=7, max_duration_days=28, audience_skew=0,
+            minimum_detectable_effect=MinimumDetectableEffectEnum.EFFECT_2_5,
+            confidence_interval=ConfidenceIntervalEnum.CI_90,
+            target_metric=TargetMetric.FIRST_TIME_INSTALLERS,
+            early_kill_min_installs=1000, early_kill_cvr_decrease=-0.1, kill_performance_value=0,
+        )
+        session.add(settings)
+        session.flush()
+    count = session.scalar(select(func.count()).select_from(ExperimentModel))
+    experiment = ExperimentModel(
+        settings_id=settings.id, app_id=app.id, csl_id=csl_id, locale_id=locale_id,
+        internal_experiment_id=count, experiment_title=f"experiment {count}", priority=count,
+        status=status, asset_type=AssetType.ICON, experiment_type=ExperimentType.MANUAL,
+        google_play_experiment_id=play_experiment_id,
+        experiment_name_auto_populated=f"{app.abbreviation}-{count:06d}-de-DE",
+    )
+    session.add(experiment)
+    session.commit()
+    return experiment
+
+
+@pytest.fixture
+def add_experiment():
+    return _add_experiment
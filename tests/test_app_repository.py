@@ -0,0 +1,31 @@
+"""
+Timeout outcome of an app, recorded on the app and cleared by the next completed run
+"""
+from datetime import datetime, timedelta, timezone
+
+from src.database.unit_of_work import UnitOfWork
+from src.modules.app.repository import mark_app_timed_out, update_app_sync_status
+
+
+def test_timeout_recorded_without_moving_the_next_sync(session, apps):
+    app = apps[0]
+    mark_app_timed_out(app.id, session, "RUNNING_EXPERIMENTS")
+
+    session.refresh(app)
+    assert app.timed_out_stage == "RUNNING_EXPERIMENTS" and app.timed_out_at is not None
+    # The app stays due
+    assert app.next_sync is None and app.last_sync is None
+    assert all(other.timed_out_at is None for other in apps[1:])
+
+
+def test_timeout_cleared_by_the_next_completed_run(session, apps):
+    app = apps[0]
+    mark_app_timed_out(app.id, session, "APP")
+
+    next_sync = datetime.now(timezone.utc) + timedelta(hours=6)
+    with UnitOfWork(session, app.package_id):
+        update_app_sync_status(app.id, session, next_sync)
+
+    session.refresh(app)
+    assert app.timed_out_at is None and app.timed_out_stage is None
+    assert app.last_sync is not None
@@ -0,0 +1,75 @@
+"""
+Conditions under which main.py skips the scrapes of an app whose experiments
+overview is unchanged since its last full run
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import main
+from src.config.settings import AUTOMATION
+from src.modules.app.repository import get_app_overview_fingerprint, update_app_overview_fingerprint
+from src.modules.experiment.schemas import ExperimentStatus
+
+FINGERPRINT = "f" * 40
+
+
+def utc_naive(delta: timedelta = timedelta(0)) -> datetime:
+    """A UTC datetime as read back from the database"""
+    return (datetime.now(timezone.utc) + delta).replace(tzinfo=None)
+
+
+def last_run(fingerprint=FINGERPRINT, age=timedelta(hours=1), threshold_in=None):
+    return fingerprint, utc_naive(-age), utc_naive(threshold_in) if threshold_in is not None else None
+
+
+def test_unchanged_app_is_skipped(session, apps):
+    assert main._is_app_unchanged(session, apps[0], FINGERPRINT, last_run())
+
+
+def test_skipped_from_the_stored_fingerprint(session, apps):
+    app = apps[0]
+    assert not main._is_app_unchanged(session, app, FINGERPRINT, get_app_overview_fingerprint(app.id, session))
+
+    update_app_overview_fingerprint(app.id, FINGERPRINT, session, datetime.now(timezone.utc) + timedelta(days=2))
+    assert main._is_app_unchanged(session, app, FINGERPRINT, get_app_overview_fingerprint(app.id, session))
+
+    # A run that changed the console clears the fingerprint
+    update_app_overview_fingerprint(app.id, None, session)
+    assert not main._is_app_unchanged(session, app, FINGERPRINT, get_app_overview_fingerprint(app.id, session))
+
+
+@pytest.mark.parametrize("case, overview, stored", [
+    ("no overview scraped", None, last_run()),
+    ("fingerprint mismatch", "e" * 40, last_run()),
+    ("never run in full", FINGERPRINT, (None, None, None)),
+    ("last full run too old", FINGERPRINT, last_run(age=timedelta(hours=AUTOMATION['MAX_SKIP_HOURS'], minutes=1))),
+    ("duration threshold passed", FINGERPRINT, last_run(threshold_in=-timedelta(minutes=1))),
+])
+def test_app_runs_in_full(session, apps, case, overview, stored):
+    assert not main._is_app_unchanged(session, apps[0], overview, stored), case
+
+
+def test_duration_threshold_ahead_is_skipped(session, apps):
+    assert main._is_app_unchanged(session, apps[0], FINGERPRINT, last_run(threshold_in=timedelta(hours=2)))
+
+
+def test_sync_now_runs_in_full(session, apps):
+    app = apps[0]
+    app.sync_now = True
+    session.commit()
+    assert not main._is_app_unchanged(session, app, FINGERPRINT, last_run())
+
+
+@pytest.mark.parametrize("status, skipped", [
+    (ExperimentStatus.READY, False),
+    (ExperimentStatus.STOPPING, False),
+    (ExperimentStatus.IN_PROGRESS, True),
+    (ExperimentStatus.FINISHED, True),
+    (ExperimentStatus.NOT_READY, True),
+])
+def test_pending_experiment_actions_run_in_full(session, apps, add_experiment, status, skipped):
+    add_experiment(session, apps[0], status)
+    # The experiments of another app do not count
+    add_experiment(session, apps[1], ExperimentStatus.READY)
+    assert main._is_app_unchanged(session, apps[0], FINGERPRINT, last_run()) is skipped
@@ -0,0 +1,80 @@
+"""
+Next sync of an app from its experiments state, and the time left before the
+duration thresholds of its running experiments
+"""
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from src.config.settings import CADENCE
+from src.modules.app.cadence import compute_next_sync, get_threshold_delays
+from src.modules.experiment.schemas import ScrapedExperiment
+
+NOW = datetime(2026, 1, 10, 12, tzinfo=timezone.utc)
+BUSY = timedelta(hours=CADENCE['BUSY_HOURS'])
+RUNNING = timedelta(hours=CADENCE['RUNNING_HOURS'])
+IDLE = timedelta(hours=CADENCE['IDLE_HOURS'])
+MARGIN = timedelta(minutes=CADENCE['THRESHOLD_MARGIN_MINUTES'])
+
+
+@pytest.mark.parametrize("case, kwargs, delay", [
+    ("busy, an experiment to create", dict(running=True, can_create=True), BUSY),
+    ("busy, recent activity", dict(running=False, active=True), BUSY),
+    ("running", dict(running=True), RUNNING),
+    ("idle", dict(running=False), IDLE),
+    ("threshold brings the sync forward", dict(running=True, threshold_delays=[timedelta(hours=3)]),
+     timedelta(hours=3) + MARGIN),
+    ("earliest threshold", dict(running=True, threshold_delays=[timedelta(hours=4), timedelta(hours=2)]),
+     timedelta(hours=2) + MARGIN),
+    ("threshold later than the running sync", dict(running=True, threshold_delays=[timedelta(days=3)]), RUNNING),
+    ("threshold clamped to BUSY_HOURS", dict(running=True, threshold_delays=[timedelta(minutes=5)]), BUSY),
+    ("busy is not brought forward", dict(running=True, can_create=True, threshold_delays=[timedelta(0)]), BUSY),
+    ("idle threshold", dict(running=False, threshold_delays=[timedelta(hours=12)]), timedelta(hours=12) + MARGIN),
+])
+def test_compute_next_sync(case, kwargs, delay):
+    assert compute_next_sync(now=NOW, **kwargs) == NOW + delay, case
+
+
+def test_compute_next_sync_clamped_to_idle_hours(monkeypatch):
+    monkeypatch.setitem(CADENCE, "IDLE_HOURS", 4)
+    assert compute_next_sync(running=False, now=NOW) == NOW + timedelta(hours=4)
+    monkeypatch.setitem(CADENCE, "RUNNING_HOURS", 48)
+    assert compute_next_sync(running=True, now=NOW) == NOW + timedelta(hours=4)
+
+
+def running(play_experiment_id: str, start_time) -> ScrapedExperiment:
+    return ScrapedExperiment(
+        experiment_name="Plans", experiment_id=play_experiment_id, locale="de-DE", store_listing="Plans",
+        experiment_type="Translated", start_date=start_time, start_time=start_time, status="In progress",
+        variants=(),
+    )
+
+
+def experiment(min_days: int, max_days: int) -> SimpleNamespace:
+    return SimpleNamespace(settings=SimpleNamespace(min_duration_days=min_days, max_duration_days=max_days))
+
+
+LOCAL_NOW = datetime(2026, 1, 10, 12)
+
+
+@pytest.mark.parametrize("case, started_days_ago, delays", [
+    ("both thresholds ahead", 1, [timedelta(days=6), timedelta(days=13)]),
+    ("min duration reached", 8, [timedelta(days=6)]),
+    ("both thresholds passed", 20, []),
+    ("threshold reached right now", 7, [timedelta(days=7)]),
+])
+def test_get_threshold_delays(case, started_days_ago, delays):
+    scraped = [running("1000", LOCAL_NOW - timedelta(days=started_days_ago))]
+    assert get_threshold_delays(scraped, {1000: experiment(7, 14)}, now=LOCAL_NOW) == delays, case
+
+
+def test_get_threshold_delays_skips_unknown_experiments():
+    scraped = [
+        running("1000", LOCAL_NOW - timedelta(days=1)),
+        running("1001", LOCAL_NOW - timedelta(days=1)),
+        running("1002", None),
+        running("1003", LOCAL_NOW - timedelta(days=1)),
+    ]
+    experiments = {1001: SimpleNamespace(settings=None), 1002: experiment(7, 14), 1003: experiment(2, 3)}
+    assert get_threshold_delays(scraped, experiments, now=LOCAL_NOW) == [timedelta(days=1), timedelta(days=2)]
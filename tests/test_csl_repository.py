@@ -0,0 +1,98 @@
+"""
+Set based add_csls: CSLs, locales and links written only when they changed
+"""
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import func, select
+
+from src.db_associations import csl_locale
+from src.modules.csl.models import CSLModel, LocaleModel
+from src.modules.csl.repository import add_csls
+
+# Locales fetch time as read back from the database, eg: from the graph snapshot
+FETCHED_AT = datetime(2026, 1, 1, 10)
+
+
+def records(app, play_console_id: str, name: str, locales: List[str], fingerprint: str = "a" * 40) -> List[Dict]:
+    return [
+        {
+            "app": app, "csl_play_console_id": play_console_id, "name": name, "locale": locale,
+            "fingerprint": fingerprint, "locales_fetched_at": FETCHED_AT,
+        }
+        for locale in locales
+    ]
+
+
+def locales_of(session, app_id: int, play_console_id: str) -> List[str]:
+    return sorted(session.scalars(
+        select(LocaleModel.name)
+        .join(csl_locale, csl_locale.c.locale_id == LocaleModel.id)
+        .join(CSLModel, CSLModel.id == csl_locale.c.csl_id)
+        .where(CSLModel.app_id == app_id, CSLModel.play_console_id == play_console_id)
+    ))
+
+
+def test_new_csl_with_its_locales(session, apps):
+    app = apps[0]
+    summary = add_csls(session, records(app, "", "Default store listing", ["German – de-DE", "French – fr-FR"])
+                       + records(app, "42", "Plans", ["German – de-DE"]))
+
+    assert sorted(summary["added"]) == ["", "42"]
+    assert summary["updated"] == [] and summary["unchanged"] == [] and summary["removed"] == []
+    assert summary["locales_added"] == 3 and summary["locales_unchanged"] == 0 and summary["locales_removed"] == 0
+    assert locales_of(session, app.id, "") == ["French – fr-FR", "German – de-DE"]
+    assert locales_of(session, app.id, "42") == ["German – de-DE"]
+    # The locale shared by both CSLs is stored once
+    assert session.scalar(select(func.count()).select_from(LocaleModel)) == 2
+
+
+def test_locales_added_to_an_existing_csl(session, apps):
+    app = apps[0]
+    add_csls(session, records(app, "42", "Plans", ["German – de-DE", "French – fr-FR"]))
+    csl_id = session.scalar(select(CSLModel.id).where(CSLModel.play_console_id == "42"))
+
+    summary = add_csls(session, records(app, "42", "Plans", ["German – de-DE", "Italian – it-IT"]))
+
+    assert summary["added"] == [] and summary["updated"] == ["42"]
+    assert summary["locales_added"] == 1 and summary["locales_unchanged"] == 1 and summary["locales_removed"] == 1
+    # The CSL keeps its ID, the link of a locale gone from the console is kept for the experiments
+    assert session.scalar(select(CSLModel.id).where(CSLModel.play_console_id == "42")) == csl_id
+    assert locales_of(session, app.id, "42") == ["French – fr-FR", "German – de-DE", "Italian – it-IT"]
+
+
+def test_unchanged_csl_is_not_written(session, apps, writes):
+    app = apps[0]
+    scraped = records(app, "", "Default store listing", ["German – de-DE"]) + records(app, "42", "Plans", ["German – de-DE"])
+    add_csls(session, scraped)
+    assert writes
+
+    writes.clear()
+    summary = add_csls(session, scraped)
+
+    assert writes == []
+    assert sorted(summary["unchanged"]) == ["", "42"]
+    assert summary["added"] == [] and summary["updated"] == [] and summary["removed"] == []
+    assert summary["locales_added"] == 0 and summary["locales_unchanged"] == 2 and summary["locales_removed"] == 0
+
+
+def test_changed_fingerprint_updates_the_csl_only(session, apps, writes):
+    app = apps[0]
+    add_csls(session, records(app, "42", "Plans", ["German – de-DE"]) + records(app, "43", "Other", ["German – de-DE"]))
+
+    writes.clear()
+    add_csls(session, records(app, "42", "Plans", ["German – de-DE"], fingerprint="b" * 40)
+             + records(app, "43", "Other", ["German – de-DE"]))
+
+    assert len(writes) == 1 and writes[0][0].lstrip().upper().startswith("UPDATE CSLS")
+    assert session.scalar(select(CSLModel.fingerprint).where(CSLModel.play_console_id == "42")) == "b" * 40
+
+
+def test_csl_missing_from_the_console_is_reported_and_kept(session, apps):
+    app = apps[0]
+    add_csls(session, records(app, "42", "Plans", ["German – de-DE"]) + records(app, "43", "Other", ["German – de-DE"]))
+
+    summary = add_csls(session, records(app, "42", "Plans", ["German – de-DE"]))
+
+    assert summary["removed"] == ["43"]
+    assert session.scalar(select(func.count()).select_from(CSLModel)) == 2
@@ -0,0 +1,102 @@
+"""
+update_experiment_statuses reconciles the experiments with the console in
+one read and one bulk update of the changed rows
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+
+from src.database.unit_of_work import UnitOfWork
+from src.modules.experiment.models import ExperimentModel
+from src.modules.experiment.repository import update_experiment_statuses
+from src.modules.experiment.schemas import ExperimentStatus, ScrapedExperiment
+
+
+def console(experiment: ExperimentModel, play_experiment_id: str) -> ScrapedExperiment:
+    return ScrapedExperiment(
+        experiment_name=experiment.experiment_name_auto_populated, experiment_id=play_experiment_id,
+        locale="de-DE", store_listing="Plans", experiment_type="Translated",
+        start_date=datetime(2026, 1, 1), start_time=datetime(2026, 1, 1, 10), status="In progress", variants=(),
+    )
+
+
+def url(play_experiment_id: int) -> str:
+    return f"https://play.google.com/console/u/0/developers/1/app/1/store-listing-experiments/{play_experiment_id}/report"
+
+
+def updated_ids(writes) -> set:
+    return {
+        parameters[-1]
+        for statement, batch in writes if statement.lstrip().upper().startswith("UPDATE EXPERIMENTS")
+        for parameters in (batch if isinstance(batch, list) else [batch])
+    }
+
+
+def test_only_changed_experiments_are_updated(session, apps, add_experiment, writes):
+    app = apps[0]
+    started = add_experiment(session, app, ExperimentStatus.READY)
+    running = add_experiment(session, app, ExperimentStatus.IN_PROGRESS, 1001)
+    running.url = url(1001)
+    finished = add_experiment(session, app, ExperimentStatus.IN_PROGRESS, 1002)
+    untouched = add_experiment(session, app, ExperimentStatus.READY)
+    session.commit()
+    writes.clear()
+
+    update_experiment_statuses(
+        session, app.id,
+        [console(started, "1000"), console(running, "1001"), console(finished, "1002")],
+        [console(finished, "1002")],
+        "1", "1",
+    )
+
+    assert updated_ids(writes) == {started.id, finished.id}
+    statuses = dict(session.execute(select(ExperimentModel.id, ExperimentModel.status)).tuples().all())
+    assert statuses == {
+        started.id: ExperimentStatus.IN_PROGRESS,
+        running.id: ExperimentStatus.IN_PROGRESS,
+        finished.id: ExperimentStatus.FINISHED,
+        untouched.id: ExperimentStatus.READY,
+    }
+
+    # Nothing left to reconcile
+    writes.clear()
+    update_experiment_statuses(
+        session, app.id, [console(started, "1000"), console(running, "1001")], [console(finished, "1002")], "1", "1"
+    )
+    assert updated_ids(writes) == set()
+
+
+def test_loaded_experiments_see_the_new_status(session, apps, add_experiment):
+    app = apps[0]
+    experiment = add_experiment(session, app, ExperimentStatus.READY)
+    assert experiment.status == ExperimentStatus.READY
+
+    with UnitOfWork(session, app.package_id):
+        update_experiment_statuses(session, app.id, [console(experiment, "1000")], [], "1", "1")
+        # Same object, refreshed from the bulk update before the commit
+        assert experiment.status == ExperimentStatus.IN_PROGRESS
+        assert experiment.google_play_experiment_id == 1000 and experiment.url == url(1000)
+
+
+def test_pending_changes_are_flushed_before_the_update(session, apps, add_experiment):
+    app = apps[0]
+    experiment = add_experiment(session, app, ExperimentStatus.READY)
+
+    with UnitOfWork(session, app.package_id):
+        experiment.error = "Retried"
+        update_experiment_statuses(session, app.id, [console(experiment, "1000")], [], "1", "1")
+
+    session.refresh(experiment)
+    assert experiment.status == ExperimentStatus.IN_PROGRESS and experiment.error == "Retried"
+
+
+def test_experiments_of_other_apps_are_not_updated(session, apps, add_experiment):
+    experiment = add_experiment(session, apps[0], ExperimentStatus.READY)
+    other = add_experiment(session, apps[1], ExperimentStatus.READY)
+    other.experiment_name_auto_populated = experiment.experiment_name_auto_populated
+    session.commit()
+
+    update_experiment_statuses(session, apps[0].id, [console(experiment, "1000")], [], "1", "1")
+
+    session.refresh(other)
+    assert other.status == ExperimentStatus.READY and other.google_play_experiment_id is None
@@ -0,0 +1,170 @@
+"""
+Claim, heartbeat, lease expiry and dedupe of the shared jobs table, on SQLite
+
+SQLite has no SELECT ... FOR UPDATE SKIP LOCKED, the conditional update of
+claim_job alone must keep a job from being claimed twice.
+"""
+import multiprocessing
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import func, select, update
+
+from src.config.settings import JOBS
+from src.database.connection import Database
+from src.modules.job.models import JobModel
+# Registered here too, the spawned workers import this module but not conftest
+from src.modules.app.models import AppModel  # noqa: F401
+from src.modules.publishing_overview.models import PublishingOverviewModel  # noqa: F401
+from src.modules.previous_experiment.models import PreviousExperimentModel  # noqa: F401
+from src.modules.job.repository import (
+    claim_job, enqueue_jobs, finish_job, heartbeat_job, requeue_expired_jobs,
+)
+from src.modules.job.schemas import JobKind, JobStatus
+
+
+def claim_until_empty(database_url: str, worker: str) -> List[int]:
+    """Claim jobs in a worker process until no job is pending"""
+    database = Database(database_url)
+    claimed = []
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        with database.session() as session:
+            job = claim_job(session, worker)
+            if job is not None:
+                claimed.append(job.id)
+                continue
+            # None is also returned when the database was locked by another worker
+            pending = session.scalar(
+                select(func.count()).select_from(JobModel).where(JobModel.status == JobStatus.PENDING)
+            )
+        if not pending:
+            break
+        time.sleep(0.01)
+    database.dispose()
+    return claimed
+
+
+def expire_lease(session, job_id: int) -> None:
+    session.execute(
+        update(JobModel)
+        .where(JobModel.id == job_id)
+        .values(lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1))
+    )
+    session.commit()
+
+
+def test_job_claimed_once_across_processes(database, database_url, session, add_apps):
+    apps = add_apps(session, 40)
+    assert enqueue_jobs(session, [(app.id, JobKind.EXPERIMENTS, "1") for app in apps]) == 40
+    job_ids = session.scalars(select(JobModel.id)).all()
+
+    # Spawned like the worker hosts, each process with its own engine
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(4) as pool:
+        claimed = pool.starmap(claim_until_empty, [(database_url, f"worker-{i}") for i in range(4)])
+
+    all_claimed = [job_id for worker_claimed in claimed for job_id in worker_claimed]
+    assert sorted(all_claimed) == sorted(job_ids)
+    session.expire_all()
+    jobs = session.scalars(select(JobModel)).all()
+    assert all(job.status == JobStatus.RUNNING and job.attempts == 1 for job in jobs)
+    for i, worker_claimed in enumerate(claimed):
+        assert all(job.worker == f"worker-{i}" for job in jobs if job.id in worker_claimed)
+
+
+def test_one_running_job_per_app(session, apps):
+    app = apps[0]
+    enqueue_jobs(session, [(app.id, JobKind.EXPERIMENTS, "1"), (app.id, JobKind.CSLS, "after 0")])
+
+    first = claim_job(session, "a")
+    assert first is not None and first.running_app_id == app.id
+    # The other job of the app waits, even for another worker
+    assert claim_job(session, "b") is None
+
+    assert finish_job(session, first.id, "a")
+    second = claim_job(session, "b")
+    assert second is not None and second.id != first.id and second.running_app_id == app.id
+
+
+def test_heartbeat_extends_only_the_owned_lease(session, apps):
+    enqueue_jobs(session, [(apps[0].id, JobKind.EXPERIMENTS, "1")])
+    job = claim_job(session, "a", lease_seconds=60)
+    lease = job.lease_expires_at
+
+    assert not heartbeat_job(session, job.id, "b", lease_seconds=600)
+    assert heartbeat_job(session, job.id, "a", lease_seconds=600)
+    session.refresh(job)
+    assert job.lease_expires_at > lease
+
+
+def test_heartbeat_lost_once_the_lease_expired(session, apps):
+    enqueue_jobs(session, [(apps[0].id, JobKind.EXPERIMENTS, "1")])
+    job = claim_job(session, "a")
+    expire_lease(session, job.id)
+
+    assert requeue_expired_jobs(session) == 1
+    assert not heartbeat_job(session, job.id, "a")
+    # The result of the worker that lost the lease is dropped
+    assert not finish_job(session, job.id, "a")
+
+    again = claim_job(session, "b")
+    assert again.id == job.id and again.worker == "b" and again.attempts == 2
+
+
+def test_expired_lease_requeued_then_failed_at_max_attempts(session, apps):
+    enqueue_jobs(session, [(apps[0].id, JobKind.EXPERIMENTS, "1")])
+    job_id = None
+    for attempt in range(1, JOBS['MAX_ATTEMPTS'] + 1):
+        job = claim_job(session, f"worker-{attempt}")
+        assert job is not None and job.attempts == attempt
+        job_id = job.id
+        expire_lease(session, job_id)
+        assert requeue_expired_jobs(session) == 1
+
+    job = session.get(JobModel, job_id)
+    session.refresh(job)
+    assert job.status == JobStatus.FAILED
+    assert job.error == "Lease expired"
+    assert job.running_app_id is None and job.dedupe_key is None
+    assert claim_job(session, "late") is None
+
+
+def test_failed_job_retried_then_failed_at_max_attempts(session, apps):
+    enqueue_jobs(session, [(apps[0].id, JobKind.EXPERIMENTS, "1")])
+    for attempt in range(1, JOBS['MAX_ATTEMPTS'] + 1):
+        job = claim_job(session, "a")
+        assert job is not None and job.attempts == attempt
+        assert finish_job(session, job.id, "a", error="boom")
+        session.refresh(job)
+        if attempt < JOBS['MAX_ATTEMPTS']:
+            assert job.status == JobStatus.PENDING
+            # Due again after RETRY_MINUTES, run the retry now
+            session.execute(update(JobModel).where(JobModel.id == job.id).values(due_at=datetime.now(timezone.utc)))
+            session.commit()
+
+    assert job.status == JobStatus.FAILED and job.dedupe_key is None
+
+
+def test_enqueue_is_idempotent_per_occurrence(session, apps):
+    app = apps[0]
+    jobs = [(app.id, JobKind.EXPERIMENTS, "2026-01-01 10:00:00")]
+
+    assert enqueue_jobs(session, jobs * 2) == 1
+    assert enqueue_jobs(session, jobs) == 0
+    # Another occurrence of the sync is a new job
+    assert enqueue_jobs(session, [(app.id, JobKind.EXPERIMENTS, "2026-01-01 16:00:00")]) == 1
+    assert session.scalar(select(func.count()).select_from(JobModel)) == 2
+
+
+def test_failed_job_can_be_queued_again(session, apps):
+    jobs = [(apps[0].id, JobKind.EXPERIMENTS, "1")]
+    enqueue_jobs(session, jobs)
+    job = claim_job(session, "a")
+    session.execute(update(JobModel).where(JobModel.id == job.id).values(attempts=JOBS['MAX_ATTEMPTS']))
+    session.commit()
+    assert finish_job(session, job.id, "a", error="boom")
+
+    # The failed job released its dedupe key
+    assert enqueue_jobs(session, jobs) == 1
@@ -0,0 +1,77 @@
+"""
+Token bucket pacing on a fake clock: burst, refill and a budget shared through the state file
+"""
+import time
+
+import pytest
+
+from src.utils.pacing import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(time, "time", clock.time)
+    monkeypatch.setattr(time, "sleep", clock.sleep)
+    return clock
+
+
+def test_burst_is_free_then_one_token_per_interval(clock):
+    bucket = TokenBucket(rate_per_minute=30, burst=5)
+
+    assert [bucket.acquire() for _ in range(5)] == [0.0] * 5
+    assert clock.sleeps == []
+    # Empty, the next token comes 60 / 30 seconds later
+    assert bucket.acquire() == pytest.approx(2.0)
+    assert bucket.acquire() == pytest.approx(2.0)
+    assert clock.sleeps == [pytest.approx(2.0)] * 2
+
+
+def test_refill_is_capped_at_the_burst(clock):
+    bucket = TokenBucket(rate_per_minute=30, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+
+    # Idle long enough for 30 tokens, only the burst is saved
+    clock.now += 60
+    assert [bucket.acquire() for _ in range(3)] == [0.0] * 3
+    assert bucket.acquire() == pytest.approx(2.0)
+
+    # Half an interval after the wait, the next token is half way refilled
+    clock.now += 1
+    assert bucket.acquire() == pytest.approx(1.0)
+
+
+def test_zero_rate_is_not_paced(clock):
+    bucket = TokenBucket(rate_per_minute=0, burst=0)
+    assert [bucket.acquire() for _ in range(10)] == [0.0] * 10
+
+
+def test_buckets_on_one_state_file_share_the_budget(clock, tmp_path):
+    state_file = str(tmp_path / "pacing.json")
+    first = TokenBucket(rate_per_minute=60, burst=4, state_file=state_file)
+    second = TokenBucket(rate_per_minute=60, burst=4, state_file=state_file)
+    if first.state_file is None:
+        pytest.skip("No fcntl, the buckets are per process")
+
+    assert [first.acquire(), second.acquire(), first.acquire(), second.acquire()] == [0.0] * 4
+    # The burst is spent by both, each one waits its turn
+    assert second.acquire() == pytest.approx(1.0)
+    assert first.acquire() == pytest.approx(1.0)
+
+    # A bucket of another file has its own budget
+    other = TokenBucket(rate_per_minute=60, burst=4, state_file=str(tmp_path / "other.json"))
+    assert other.acquire() == 0.0
@@ -0,0 +1,84 @@
+"""
+Scraped completed experiments saved once per Play Console experiment ID,
+without cutting the values longer than their column
+"""
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from src.modules.csl.models import LocaleModel
+from src.modules.csl.repository import add_csls
+from src.modules.experiment.schemas import ScrapedExperiment, ScrapedVariant
+from src.modules.previous_experiment.models import PreviousExperimentModel, PreviousVariantModel
+from src.modules.previous_experiment.repository import save_previous_experiments
+
+
+def scraped(play_experiment_id: str, name: str = "Plans", variant: ScrapedVariant = None) -> ScrapedExperiment:
+    return ScrapedExperiment(
+        experiment_name=name, experiment_id=play_experiment_id, locale="de-DE",
+        store_listing="Plans", experiment_type="Translated", start_date=datetime(2026, 1, 1),
+        start_time=datetime(2026, 1, 1, 10), status="Keep current",
+        variants=(
+            ScrapedVariant(name="Current listing", audience=50, installs=10, installs_scaled=20),
+            variant or ScrapedVariant(name="Variant A", audience=50, installs=12, installs_scaled=24),
+        ),
+    )
+
+
+def count(session, model) -> int:
+    return session.scalar(select(func.count()).select_from(model))
+
+
+def test_saved_once_per_play_experiment_id(session, apps):
+    app = apps[0]
+    experiments = [scraped("1000"), scraped("1001"), scraped("1000")]
+
+    assert save_previous_experiments(session, app.id, experiments, "1", "1") == 2
+    assert save_previous_experiments(session, app.id, experiments, "1", "1") == 0
+    assert count(session, PreviousExperimentModel) == 2
+    assert count(session, PreviousVariantModel) == 4
+
+    # A new experiment in the list is the only one added
+    assert save_previous_experiments(session, app.id, experiments + [scraped("1002")], "1", "1") == 1
+    assert count(session, PreviousExperimentModel) == 3
+    # The same experiment ID of another app is another experiment
+    assert save_previous_experiments(session, apps[1].id, experiments, "1", "1") == 2
+
+
+def test_drafts_are_not_saved(session, apps):
+    draft = scraped("draft")
+    assert save_previous_experiments(session, apps[0].id, [draft], "1", "1") == 0
+    assert count(session, PreviousExperimentModel) == 0
+
+
+def test_long_values_are_not_cut(session, apps):
+    icon = "https://play-lh.googleusercontent.com/" + "a" * 400
+    variant = ScrapedVariant(
+        name="Variant A", audience=50, installs=12, installs_scaled=24,
+        icon=icon, screenshots=(icon, icon), short_description="b" * 81,
+    )
+    save_previous_experiments(session, apps[0].id, [scraped("1000", "c" * 601, variant)], "1", "1")
+
+    experiment = session.scalars(select(PreviousExperimentModel)).one()
+    saved = session.scalars(select(PreviousVariantModel).where(PreviousVariantModel.name == "Variant A")).one()
+    # The asset URLs fit their columns whole
+    assert saved.icon == icon and saved.screen1 == icon and saved.screen2 == icon and saved.screen3 is None
+    # The values longer than their column are skipped
+    assert saved.short_description is None
+    assert experiment.name == ""
+
+
+def test_locale_of_the_app_csls(session, apps):
+    app = apps[0]
+    add_csls(session, [
+        {"app": app, "csl_play_console_id": "", "name": "Default store listing", "locale": "German – de-DE"},
+    ])
+    german = session.scalar(select(LocaleModel.id).where(LocaleModel.name == "German – de-DE"))
+    save_previous_experiments(session, app.id, [scraped("1000")], "1", "1")
+    # de-DE is not a locale of the CSLs of the other app
+    save_previous_experiments(session, apps[1].id, [scraped("1001")], "1", "1")
+
+    locales = dict(session.execute(
+        select(PreviousExperimentModel.app_id, PreviousExperimentModel.locale_id)
+    ).tuples().all())
+    assert locales == {app.id: german, apps[1].id: None}
@@ -0,0 +1,73 @@
+"""
+Resume of a crashed run from its journal: the run picked, and the stages and
+console actions skipped once the journal is reopened
+"""
+import pytest
+
+import main
+from src.modules.app.snapshot import get_graph_snapshot
+from src.services.run_journal import (
+    close_run, get_journal, is_action_taken, is_stage_done, mark_stage_done, open_run, record_action, start_run,
+)
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    yield str(tmp_path / "journal.db")
+    close_run()
+
+
+def test_resume_picks_the_last_unfinished_run(journal_path):
+    first = start_run("main", path=journal_path).run_id
+    second = start_run("main", path=journal_path).run_id
+    # Another command is not resumed by main
+    start_run("pipeline", path=journal_path)
+
+    assert start_run("main", resume=True, path=journal_path).run_id == second
+    assert first != second
+
+
+def test_finished_run_is_not_resumed(journal_path):
+    unfinished = start_run("main", path=journal_path).run_id
+    finished = start_run("main", path=journal_path)
+    finished.finish()
+
+    assert start_run("main", resume=True, path=journal_path).run_id == unfinished
+
+    get_journal().finish()
+    resumed = start_run("main", resume=True, path=journal_path).run_id
+    assert resumed not in (unfinished, finished.run_id)
+
+
+def test_stages_and_actions_survive_reopening(journal_path):
+    run_id = start_run("main", path=journal_path).run_id
+    mark_stage_done(1, "running_experiments")
+    mark_stage_done(1)
+    record_action(2, "stop", 1234)
+    close_run()
+
+    assert not is_stage_done(1)
+    assert start_run("main", resume=True, path=journal_path).run_id == run_id
+    assert is_stage_done(1) and is_stage_done(1, "running_experiments")
+    assert not is_stage_done(2) and not is_stage_done(2, "running_experiments")
+    assert is_action_taken(2, "stop", 1234) and is_action_taken(2, "stop", "1234")
+    assert not is_action_taken(2, "stop", 1235) and not is_action_taken(1, "stop", 1234)
+
+    # A worker process opens the same run
+    close_run()
+    open_run(run_id, "main", journal_path)
+    assert is_stage_done(1) and is_action_taken(2, "stop", 1234)
+
+
+def test_apps_completed_by_the_run_are_not_processed_again(journal_path, session, apps):
+    publisher = get_graph_snapshot(session).get_publisher(apps[0].publisher_id)
+    start_run("main", path=journal_path)
+    assert [app.id for app in main._get_apps_to_process(publisher, False)] == [app.id for app in apps]
+
+    mark_stage_done(apps[0].id)
+    # A stage done is not the app done
+    mark_stage_done(apps[1].id, "create_experiments")
+    close_run()
+
+    start_run("main", resume=True, path=journal_path)
+    assert [app.id for app in main._get_apps_to_process(publisher, False)] == [apps[1].id, apps[2].id]
@@ -0,0 +1,43 @@
+"""
+Results of run_in_workers, a task with failures must not be reported as ok
+and the span totals of the workers are merged in the calling process
+"""
+from src.config.settings import TRACING
+from src.services.worker_pool import TaskFailed, run_in_workers
+from src.utils import tracing
+
+
+def process_item(item: int) -> int:
+    with tracing.span("item"):
+        pass
+    if item % 2:
+        raise TaskFailed(f"Item {item} failed", [item])
+    if item == 4:
+        raise ValueError("boom")
+    return item * 10
+
+
+def shutdown() -> None:
+    pass
+
+
+def test_task_failed_marks_the_result_not_ok():
+    results = run_in_workers([0, 1, 2, 3, 4], process_item, shutdown, 2)
+
+    assert [result.item for result in results] == [0, 1, 2, 3, 4]
+    assert [result.ok for result in results] == [True, False, True, False, False]
+    assert results[0].value == 0 and results[2].value == 20
+    # The failed items are kept in the value of the result
+    assert results[1].value == [1] and results[1].error == "Item 1 failed"
+    assert results[3].value == [3]
+    assert results[4].value is None and results[4].error == "boom"
+
+
+def test_worker_span_totals_merged_once_per_task(monkeypatch, tmp_path):
+    monkeypatch.setitem(TRACING, "DIR", str(tmp_path))
+    tracing.start_trace()
+    run_in_workers([0, 1, 2, 3], process_item, shutdown, 2)
+
+    stats = tracing.get_stats()
+    # Each task is counted once, whatever worker ran it
+    assert stats[(tracing.STAGE, "item")].count == 4
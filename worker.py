@@ -0,0 +1,113 @@
+from dotenv import load_dotenv
+import argparse
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from src.config.settings import JOBS
+from src.database.connection import get_database
+from src.modules.job.repository import claim_job, enqueue_due_jobs, finish_job, heartbeat_job, requeue_expired_jobs
+import src.utils.logger as logger
+from scheduler import JobRunner
+load_dotenv(override=True)
+
+
+class Worker:
+    """
+    Claim and run the app jobs of the jobs table, any number of hosts can run one
+
+    Every worker also queues the due jobs and releases the expired leases,
+    no host is special. The lease of the running job is extended by a
+    heartbeat thread, a job whose worker died is run again once it expires.
+    """
+
+    def __init__(self, name: str, poll_interval: int = JOBS['POLL_INTERVAL'], lease_seconds: int = JOBS['LEASE_SECONDS']):
+        self.name = name
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.runner = JobRunner()
+        self.stopping = False
+
+    def stop(self, signum=None, frame=None) -> None:
+        logger.logger.info(f"Worker {self.name} stopping after the current job")
+        self.stopping = True
+
+    def run(self) -> None:
+        """Run the jobs until stopped"""
+        logger.logger.info(f"Worker {self.name} started")
+        try:
+            while not self.stopping:
+                with get_database().session() as session:
+                    enqueue_due_jobs(session)
+                    requeue_expired_jobs(session)
+                    job = claim_job(session, self.name, self.lease_seconds)
+                    if job is not None:
+                        job_id, kind, app_id = job.id, job.kind, job.app_id
+
+                if job is None:
+                    self._sleep(self.poll_interval)
+                else:
+                    self.run_job(job_id, kind, app_id)
+        finally:
+            self.runner.shutdown()
+            logger.logger.info(f"Worker {self.name} stopped")
+
+    def run_job(self, job_id: int, kind, app_id: int) -> None:
+        """Run a claimed job while its lease is extended"""
+        logger.logger.info(f"Worker {self.name} running job {job_id} ({kind.value} for app {app_id})")
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, done), daemon=True)
+        heartbeat.start()
+        error = None
+        try:
+            self.runner.run(kind, app_id)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            logger.logger.error(traceback.format_exc())
+        finally:
+            done.set()
+            heartbeat.join()
+
+        with get_database().session() as session:
+            finish_job(session, job_id, self.name, error)
+
+    def _heartbeat(self, job_id: int, done: threading.Event) -> None:
+        # Extend the lease well before it expires
+        while not done.wait(self.lease_seconds / 3):
+            with get_database().session() as session:
+                if not heartbeat_job(session, job_id, self.name, self.lease_seconds):
+                    logger.logger.error(f"Worker {self.name} lost the lease of job {job_id}")
+                    return
+
+    def _sleep(self, seconds: float) -> None:
+        # Short sleeps, a stop signal is handled within a second
+        end = time.monotonic() + seconds
+        while not self.stopping and time.monotonic() < end:
+            time.sleep(min(1.0, end - time.monotonic()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the app jobs of the shared jobs table.")
+
+    parser.add_argument(
+        "--name",
+        type=str,
+        default=f"{socket.gethostname()}:{os.getpid()}",
+        help="Worker name, host:pid by default"
+    )
+
+    parser.add_argument(
+        "--poll_interval",
+        type=int,
+        default=JOBS['POLL_INTERVAL'],
+        help="Seconds between two polls of the jobs table when idle"
+    )
+
+    args = parser.parse_args()
+
+    worker = Worker(args.name, args.poll_interval)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()